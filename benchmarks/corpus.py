@@ -0,0 +1,94 @@
+# Representative Cicinlang programs used by the benchmark runner. Every entry is a function
+# of a scale factor returning the source, so the same corpus runs quickly for a smoke test
+# and long enough for stable numbers.
+
+from benchmarks.lexer_bench import generate_source
+
+def fib( scale ):
+    return f'''
+var fib = ( n ) {{
+    if ( n < 2 ) {{ return n; }} else {{ return fib( n - 1 ) + fib( n - 2 ); }}
+}}
+print( fib( {14 + scale} ) );
+'''
+
+def nested_loops( scale ):
+    return f'''
+var total = 0;
+var j = 0;
+for ( var i = 0; i < {40 * scale}; i = i + 1 ) {{
+    for ( j = 0; j < 100; j = j + 1 ) {{
+        total = total + i * j - 1;
+    }}
+}}
+print( total );
+'''
+
+def string_building( scale ):
+    return f'''
+var s = "";
+var line = "";
+for ( var i = 0; i < {2000 * scale}; i = i + 1 ) {{
+    line = "item " + str( i ) + ";";
+    s = s + line;
+}}
+print( line );
+'''
+
+def elif_chain( scale ):
+    # One function with a 40-way if/elif chain, called with values spread over every branch
+    branches = [ f'if ( x < 1 ) {{ return 0; }}' ]
+    branches += [ f'elif ( x < {k + 1} ) {{ return {k}; }}' for k in range( 1, 40 ) ]
+    branches.append( 'else { return 40; }' )
+    chain = '\n    '.join( branches )
+
+    return f'''
+var classify = ( x ) {{
+    {chain}
+}}
+var total = 0;
+for ( var i = 0; i < {500 * scale}; i = i + 1 ) {{
+    total = total + classify( i / {12.5 * scale} );
+}}
+print( total );
+'''
+
+def small_functions( scale ):
+    # Many tiny functions calling each other, most of the time goes to call overhead
+    funcs = [ 'var f_0 = ( x ) { return x + 1; }' ]
+    funcs += [ f'var f_{k} = ( x ) {{ return f_{k - 1}( x ) + 1; }}' for k in range( 1, 50 ) ]
+
+    return '\n'.join( funcs ) + f'''
+var total = 0;
+for ( var i = 0; i < {100 * scale}; i = i + 1 ) {{
+    total = total + f_49( i );
+}}
+print( total );
+'''
+
+def long_expressions( scale ):
+    # Operator chains of a few hundred terms, longer than Python can nest when transpiled naively
+    terms = ' + '.join( f'i * {k}' for k in range( 300 ) )
+    powers = ' ^ '.join( [ '1' ] * 300 )
+
+    return f'''
+var total = 0;
+for ( var i = 0; i < {200 * scale}; i = i + 1 ) {{
+    total = total + {terms} - {powers};
+}}
+print( total );
+'''
+
+def generated( scale ):
+    # A large program of many similar functions, mostly interesting for the lexer and parser
+    return generate_source( 100_000 * scale )
+
+CORPUS = {
+    'fib': fib,
+    'nested_loops': nested_loops,
+    'string_building': string_building,
+    'elif_chain': elif_chain,
+    'small_functions': small_functions,
+    'long_expressions': long_expressions,
+    'generated': generated,
+}
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# Runs programs whose results once differed between engines on every engine, plain, optimized
+# and streamed, and reports any output or error that differs from the tree engine's. Exits with
+# status 1 when one does.
+#
+#   python -m benchmarks.engine_check [--only NAME ...]
+
+import sys
+import argparse
+
+from cicinlang.cicinlang import ENGINES, Session, run
+from cicinlang.budget import Budget
+from cicinlang.streams import CaptureSink
+
+# Name -> ( source, limits of the Budget it runs with )
+PROGRAMS = {
+    'shadowed_read': ( '''
+var f = () { var x = 1; var g = () { print( x ); var x = 2; return x; } return g(); }
+print( f() );
+''', {} ),
+    'assign_before_declare': ( '''
+var h = () { var y = 1; var k = () { y = 5; var y = 3; return y; } var r = k(); print( y ); return r; }
+print( h() );
+''', {} ),
+    'operand_order': ( '''
+var f = ( x ) { print( x ); return x; }
+print( f( 1 ) - f( 2 ) * ( f( 3 ) - f( 4 ) ^ f( 5 ) ) );
+var a = 1;
+print( a + ( a = 5 ) * ( a = 7 ) );
+''', {} ),
+    'long_power_chain': ( 'print( 2' + ' ^ 1' * 300 + ' ); print( 1 / 0 );', {} ),
+    'int_bits_message': ( 'print( 3 ^ 6 ); print( 3 ^ 700 );', { 'max_int_bits': 1000 } ),
+    'array_overflow': ( '''
+print( [ 2 ] * 4611686018427387903 + [ 1 ] );
+print( [ -2 ] ^ 63 );
+print( [ 3037000499 ] * [ 3037000499 ] );
+print( [ 2 ] ^ 100 );
+''', {} ),
+}
+
+# Name -> ( output, first line of the error ) the tree engine must give, for programs where all
+# engines could agree on a wrong result
+EXPECTED = {
+    'shadowed_read': ( '1\n2\n', None ),
+    'assign_before_declare': ( '5\n3\n', None ),
+    'int_bits_message': ( '729\n', "Runtime Exception : Integer result of '^' would have more than 1000 bits" ),
+    'array_overflow': ( '[9223372036854775807]\n[-9223372036854775808]\n[9223372030926249001]\n', 'Runtime Exception : Integer too large for an Array' ),
+}
+
+MODES = { 'plain': {}, 'optimized': { 'optimize': True }, 'streamed': { 'stream': True } }
+
+def outcome( source, engine, limits, options ):
+    # Printed output and error message of one run
+    output = CaptureSink()
+    budget = Budget( **limits ) if len( limits ) > 0 else None
+    _, error = run( '<check>', source, engine=engine, output=output, budget=budget, session=Session(), **options )
+
+    return output.getvalue(), str( error ) if error != None else None
+
+def check( names ):
+    # ( name, mode, engine, what it differs from ) of every run that differs from the tree engine,
+    # or of the tree engine's runs that differ from the expected result
+    failures = []
+
+    for name in names:
+        source, limits = PROGRAMS[name]
+
+        for mode, options in MODES.items():
+            expected = outcome( source, 'tree', limits, options )
+
+            if name in EXPECTED and ( expected[0], expected[1] and expected[1].split( '\n' )[0] ) != EXPECTED[name]:
+                failures.append( ( name, mode, 'tree', 'the expected result' ) )
+
+            for engine in ENGINES[1:]:
+                if outcome( source, engine, limits, options ) != expected:
+                    failures.append( ( name, mode, engine, 'tree' ) )
+
+    return failures
+
+def main():
+    arg_parser = argparse.ArgumentParser( description='Cross-engine checks' )
+    arg_parser.add_argument( '--only', nargs='+', choices=list( PROGRAMS ), default=list( PROGRAMS ), metavar='NAME', help='programs to run' )
+    args = arg_parser.parse_args()
+
+    failures = check( args.only )
+
+    for name, mode, engine, other in failures:
+        print( f'DIFFERS {name} ( {mode} ): {engine} and {other}' )
+
+    if len( failures ) > 0: sys.exit( 1 )
+
+    print( f'All engines agree on {len( args.only )} programs' )
+
+if __name__ == '__main__':
+    main()
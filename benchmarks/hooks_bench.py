@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+# Checks that execution hooks cost nothing while none are installed. Every corpus program is
+# run by an interpreter that never had hooks, one that had a hook added and removed again,
+# and one with a hook that does nothing installed, for comparison.
+#
+#   python -m benchmarks.hooks_bench [--scale N] [--repeat N] [--only NAME ...]
+
+import time
+import argparse
+
+from cicinlang.interpreter import Interpreter
+from cicinlang.resolver import Resolver
+from cicinlang.cicinlang import new_context
+from cicinlang.streams import CaptureSink
+from benchmarks.corpus import CORPUS
+from benchmarks.runner import lex, parse
+
+def noop_hook( event, node, context, arg ):
+    pass
+
+def plain():
+    return Interpreter( output=CaptureSink() )
+
+def removed():
+    interpreter = Interpreter( output=CaptureSink() )
+    interpreter.add_hook( noop_hook )
+    interpreter.remove_hook( noop_hook )
+
+    return interpreter
+
+def hooked():
+    interpreter = Interpreter( output=CaptureSink() )
+    interpreter.add_hook( noop_hook )
+
+    return interpreter
+
+VARIANTS = { 'no hooks': plain, 'removed': removed, 'noop hook': hooked }
+
+def run_variants( tokens, repeat ):
+    # Variants take turns in every repetition, so a slow spell of the machine hits all of them alike
+    times = { variant: [] for variant in VARIANTS }
+
+    for i in range( repeat + 1 ):
+        for variant, make in VARIANTS.items():
+            ast_list = parse( tokens )
+            Resolver().resolve( ast_list )
+            interpreter = make()
+
+            start = time.perf_counter()
+            interpreter.interpret( ast_list, new_context() )
+            elapsed = time.perf_counter() - start
+
+            # The first round is a warmup
+            if i > 0: times[variant].append( elapsed )
+
+    return { variant: min( elapsed ) for variant, elapsed in times.items() }
+
+def main():
+    arg_parser = argparse.ArgumentParser( description='Execution hook overhead benchmark' )
+    arg_parser.add_argument( '--scale', type=int, default=1 )
+    arg_parser.add_argument( '--repeat', type=int, default=10 )
+    arg_parser.add_argument( '--only', nargs='+', choices=list( CORPUS ), default=[ name for name in CORPUS if name != 'generated' ], metavar='NAME' )
+    args = arg_parser.parse_args()
+
+    print( f'{"":>16}  ' + '  '.join( f'{name:>10}' for name in VARIANTS ) )
+
+    for name in args.only:
+        tokens = lex( CORPUS[name]( args.scale ) )
+        times = run_variants( tokens, args.repeat )
+
+        cols = '  '.join( f'{times[variant] * 1000:8.2f}ms' for variant in VARIANTS )
+        print( f'{name:>16}: {cols}  ( removed {times["removed"] / times["no hooks"] - 1:+.1%} )' )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# Compares lexing and parsing a whole file against an incremental Document when one statement
+# in the middle of the file is typed again character by character, as an editor would send it.
+# The incremental time should stay flat as the file grows.
+#
+#   python -m benchmarks.incremental_bench [--sizes BYTES ...] [--repeat N]
+
+import time
+import argparse
+
+from cicinlang.incremental import Document
+from cicinlang.lexer import Lexer
+from cicinlang.parser_ import Parser
+from cicinlang import errors
+from benchmarks.lexer_bench import generate_source
+
+STATEMENT = 'var typed = 2 * ( 3 + 4 );\n'
+
+def full_parse( text ):
+    try:
+        Parser( Lexer( '<bench>', text ).create_tokens() ).parse()
+
+    except errors.Exception:
+        pass
+
+def bench_size( size, repeat ):
+    text = generate_source( size )
+    offset = text.index( '# generated function', len( text ) // 2 )
+
+    start = time.perf_counter()
+    document = Document( '<bench>', text )
+    initial = time.perf_counter() - start
+
+    full_times = []
+    edit_times = []
+
+    for _ in range( repeat ):
+        for i, char in enumerate( STATEMENT ):
+            start = time.perf_counter()
+            document.update( offset + i, 0, char )
+            edit_times.append( time.perf_counter() - start )
+
+        typed = document.text
+
+        start = time.perf_counter()
+        full_parse( typed )
+        full_times.append( time.perf_counter() - start )
+
+        document.update( offset, len( STATEMENT ), '' )
+
+    return initial, min( full_times ), sum( edit_times ) / len( edit_times )
+
+def main():
+    arg_parser = argparse.ArgumentParser( description='Incremental parsing benchmark' )
+    arg_parser.add_argument( '--sizes', type=int, nargs='+', default=[ 10_000, 100_000, 1_000_000 ], metavar='BYTES' )
+    arg_parser.add_argument( '--repeat', type=int, default=3 )
+    args = arg_parser.parse_args()
+
+    for size in args.sizes:
+        initial, full, edit = bench_size( size, args.repeat )
+
+        print( f'{size:>10} bytes: first parse {initial * 1000:9.2f}ms  full parse {full * 1000:9.2f}ms  edit {edit * 1000:7.3f}ms  ( {full / edit:.0f}x )' )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# Times the tree-walking interpreter on a few workloads that stress calls,
+# returns, loops and branches, and the lexer and parser on a large generated program.
+#
+#   python -m benchmarks.interpreter_bench [--repeat N] [--scale N] [--size BYTES]
+
+import time
+import argparse
+
+from cicinlang.lexer import Lexer
+from cicinlang.parser_ import Parser
+from cicinlang.resolver import Resolver
+from cicinlang.interpreter import Interpreter
+from cicinlang.cicinlang import new_context
+from cicinlang.streams import CaptureSink
+from benchmarks.lexer_bench import generate_source
+
+WORKLOADS = {
+    'calls': '''
+var fib = ( n ) {{
+    if ( n < 2 ) {{ return n; }} else {{ return fib( n - 1 ) + fib( n - 2 ); }}
+}}
+print( fib( {n} ) );
+''',
+    'loops': '''
+var total = 0;
+for ( var i = 0; i < {n} * 4000; i = i + 1 ) {{
+    total = total + i * 2 - 1;
+}}
+print( total );
+''',
+    'branches': '''
+var classify = ( x ) {{
+    if ( x < 10 ) {{ return 0; }} elif ( x < 20 ) {{ return 1; }} elif ( x < 30 ) {{ return 2; }} else {{ return 3; }}
+}}
+var counts = 0;
+for ( var i = 0; i < {n} * 1000; i = i + 1 ) {{
+    counts = counts + classify( i / ( {n} * 25 ) );
+}}
+print( counts );
+''',
+}
+
+def timed( func ):
+    start = time.perf_counter()
+    res = func()
+
+    return res, time.perf_counter() - start
+
+def best_time( func, repeat ):
+    best = None
+
+    for _ in range( repeat ):
+        res, elapsed = timed( func )
+        best = elapsed if best == None else min( best, elapsed )
+
+    return res, best
+
+def run_program( source ):
+    ast_list = Parser( Lexer( '<bench>', source ).create_tokens() ).parse()
+    Resolver().resolve( ast_list )
+
+    return Interpreter( output=CaptureSink() ).interpret( ast_list, new_context() )
+
+def main():
+    arg_parser = argparse.ArgumentParser( description='Tree interpreter benchmark' )
+    arg_parser.add_argument( '--repeat', type=int, default=3 )
+    arg_parser.add_argument( '--scale', type=int, default=20, help='workload size, fib( scale ) for the call workload' )
+    arg_parser.add_argument( '--size', type=int, default=500_000, help='approximate size in bytes of the program that is parsed' )
+    args = arg_parser.parse_args()
+
+    for name, template in WORKLOADS.items():
+        source = template.format( n=args.scale )
+        _, elapsed = best_time( lambda: run_program( source ), args.repeat )
+
+        print( f'{name:>8}: {elapsed:.3f}s' )
+
+    source = generate_source( args.size )
+    tokens, lex_time = best_time( lambda: Lexer( '<bench>', source ).create_tokens(), args.repeat )
+    _, parse_time = best_time( lambda: Parser( tokens ).parse(), args.repeat )
+
+    print( f'     lex: {lex_time:.3f}s  ( {len( source )} bytes )' )
+    print( f'   parse: {parse_time:.3f}s  ( {len( tokens )} tokens )' )
+
+if __name__ == '__main__':
+    main()
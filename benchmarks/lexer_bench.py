@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+# Compares the throughput of the regex lexer against the old
+# character-at-a-time lexer on a large generated program.
+#
+#   python -m benchmarks.lexer_bench [--size BYTES] [--repeat N]
+
+import time
+import argparse
+
+from cicinlang.lexer import Lexer
+from benchmarks.char_lexer import Lexer as CharLexer
+
+SNIPPET = '''# generated function number {i}
+var func_{i} = ( a, b ) {{
+    var total_{i} = 0;
+    for ( var k = 0; k < a; k = k + 1 ) {{
+        if ( k >= b ) {{ total_{i} = total_{i} + k * 2.5; }} else {{ total_{i} = total_{i} - 1; }}
+    }}
+    return total_{i};
+}}
+print( "result " + str( func_{i}( {i}, 3 ) ) );
+'''
+
+def generate_source( size ):
+    parts = []
+    length = 0
+    i = 0
+
+    while length < size:
+        part = SNIPPET.format( i=i )
+        parts.append( part )
+        length += len( part )
+        i += 1
+
+    return ''.join( parts )
+
+def char_lex( source ):
+    # The reference lexer still returns ( tokens, error )
+    tokens, error = CharLexer( '<bench>', source ).create_tokens()
+
+    if error: raise RuntimeError( repr( error ) )
+
+    return tokens
+
+def regex_lex( source ):
+    return Lexer( '<bench>', source ).create_tokens()
+
+def best_time( lex, source, repeat ):
+    best = None
+
+    for _ in range( repeat ):
+        start = time.perf_counter()
+        tokens = lex( source )
+        elapsed = time.perf_counter() - start
+
+        best = elapsed if best == None else min( best, elapsed )
+
+    return best, len( tokens )
+
+def main():
+    arg_parser = argparse.ArgumentParser( description='Lexer throughput benchmark' )
+    arg_parser.add_argument( '--size', type=int, default=1_000_000, help='approximate source size in bytes' )
+    arg_parser.add_argument( '--repeat', type=int, default=3 )
+    args = arg_parser.parse_args()
+
+    source = generate_source( args.size )
+    mb = len( source ) / 1e6
+
+    print( f'Source: {len( source )} bytes' )
+
+    results = {}
+
+    for name, lex in [ ( 'char', char_lex ), ( 'regex', regex_lex ) ]:
+        elapsed, n_tokens = best_time( lex, source, args.repeat )
+        results[name] = elapsed
+
+        print( f'{name:>6}: {elapsed:.3f}s  {mb / elapsed:6.2f} MB/s  {n_tokens / elapsed / 1e6:5.2f} Mtok/s' )
+
+    print( f'speedup: {results["char"] / results["regex"]:.2f}x' )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+# Times the lexer, the parser and the interpreter separately on every program of the corpus.
+# Each phase is run a few times untimed first, then timed repeatedly. Results can be saved
+# to JSON and compared against a saved baseline, any phase slower than the baseline by more
+# than the threshold is reported and makes the runner exit with status 1.
+#
+#   python -m benchmarks.runner [--engine E] [--scale N] [--repeat N] [--warmup N]
+#                               [--only NAME ...] [--save FILE] [--baseline FILE] [--threshold F]
+
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+
+from cicinlang.lexer import Lexer
+from cicinlang.parser_ import Parser
+from cicinlang.resolver import Resolver
+from cicinlang.compiler import Compiler
+from cicinlang.interpreter import Interpreter
+from cicinlang.vm import VM
+from cicinlang.transpiler import Transpiler
+from cicinlang.cicinlang import ENGINES, new_context
+from cicinlang.streams import CaptureSink
+from benchmarks.corpus import CORPUS
+
+PHASES = [ 'lex', 'parse', 'run' ]
+DEFAULT_THRESHOLD = 0.10  # Allowed slowdown against the baseline, as a fraction
+
+def lex( source ):
+    return Lexer( '<bench>', source ).create_tokens()
+
+def parse( tokens ):
+    return Parser( tokens ).parse()
+
+def execute( ast_list, engine ):
+    # Like cicinlang.execute, but every run gets fresh globals and its output is kept in memory
+    output = CaptureSink()
+
+    if engine != 'py':
+        Resolver().resolve( ast_list )
+
+    if engine == 'vm':
+        return VM( output=output ).run( Compiler().compile( ast_list ), new_context() )
+
+    elif engine == 'py':
+        return Transpiler( output=output ).run( ast_list, new_context() )
+
+    return Interpreter( output=output ).interpret( ast_list, new_context() )
+
+def measure( func, prepare, warmup, repeat ):
+    # prepare() builds the input of every call outside the timed region
+    for _ in range( warmup ):
+        func( prepare() )
+
+    times = []
+
+    for _ in range( repeat ):
+        arg = prepare()
+
+        start = time.perf_counter()
+        func( arg )
+        times.append( time.perf_counter() - start )
+
+    return {
+        'min': min( times ),
+        'median': statistics.median( times ),
+        'mean': statistics.fmean( times ),
+        'times': times,
+    }
+
+def bench_program( source, engine, warmup, repeat ):
+    tokens = lex( source )
+
+    return {
+        'lex': measure( lex, lambda: source, warmup, repeat ),
+        'parse': measure( parse, lambda: tokens, warmup, repeat ),
+        # The tree is parsed again for every run, the resolver annotates it in place
+        'run': measure( lambda ast_list: execute( ast_list, engine ), lambda: parse( tokens ), warmup, repeat ),
+        'bytes': len( source ),
+        'tokens': len( tokens ),
+    }
+
+def run_benchmarks( names, engine='tree', scale=1, warmup=1, repeat=5, report=None ):
+    results = {}
+
+    for name in names:
+        results[name] = bench_program( CORPUS[name]( scale ), engine, warmup, repeat )
+
+        if report != None: report( name, results[name] )
+
+    return {
+        'meta': {
+            'engine': engine,
+            'scale': scale,
+            'warmup': warmup,
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'time': time.strftime( '%Y-%m-%dT%H:%M:%S' ),
+        },
+        'results': results,
+    }
+
+def compare( current, baseline, threshold=DEFAULT_THRESHOLD ):
+    # Returns ( program, phase, baseline time, current time ) for every phase that got slower than allowed.
+    # The minimum is compared, it is the least affected by other load on the machine.
+    regressions = []
+
+    for name, phases in current['results'].items():
+        base = baseline['results'].get( name )
+
+        if base == None: continue
+
+        for phase in PHASES:
+            old, new = base[phase]['min'], phases[phase]['min']
+
+            if new > old * ( 1 + threshold ):
+                regressions.append( ( name, phase, old, new ) )
+
+    return regressions
+
+def print_result( name, result ):
+    cols = '  '.join( f'{phase} {result[phase]["min"] * 1000:9.2f}ms' for phase in PHASES )
+
+    print( f'{name:>16}: {cols}  ( {result["bytes"]} bytes, {result["tokens"]} tokens )' )
+
+def main():
+    arg_parser = argparse.ArgumentParser( description='Lexer, parser and interpreter benchmarks' )
+    arg_parser.add_argument( '--engine', choices=ENGINES, default='tree', help='engine of the run phase ( default: tree )' )
+    arg_parser.add_argument( '--scale', type=int, default=1, help='workload size of every program' )
+    arg_parser.add_argument( '--repeat', type=int, default=5 )
+    arg_parser.add_argument( '--warmup', type=int, default=1 )
+    arg_parser.add_argument( '--only', nargs='+', choices=list( CORPUS ), default=list( CORPUS ), metavar='NAME', help='programs to run' )
+    arg_parser.add_argument( '--save', default=None, metavar='FILE', help='write the results to FILE as JSON' )
+    arg_parser.add_argument( '--baseline', default=None, metavar='FILE', help='compare against results saved earlier' )
+    arg_parser.add_argument( '--threshold', type=float, default=DEFAULT_THRESHOLD, help=f'allowed slowdown against the baseline ( default: {DEFAULT_THRESHOLD} )' )
+    args = arg_parser.parse_args()
+
+    current = run_benchmarks( args.only, args.engine, args.scale, args.warmup, args.repeat, print_result )
+
+    if args.save != None:
+        with open( args.save, 'w' ) as f:
+            json.dump( current, f, indent=2 )
+
+    if args.baseline == None: return
+
+    with open( args.baseline ) as f:
+        baseline = json.load( f )
+
+    regressions = compare( current, baseline, args.threshold )
+
+    for name, phase, old, new in regressions:
+        print( f'REGRESSION {name} {phase}: {old * 1000:.2f}ms -> {new * 1000:.2f}ms ( {new / old - 1:+.0%} )' )
+
+    if len( regressions ) > 0: sys.exit( 1 )
+
+    print( f'No regressions over {args.threshold:.0%} against {args.baseline}' )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import numpy
+
+from cicinlang.utils import Constants
+from cicinlang.errors import RuntimeException
+
+# Arrays of Numbers stored in contiguous NumPy buffers. values.py imports this module when a program
+# makes its first Array, dispatches to it and keeps the type rules shared with the other values.
+
+
+class Array( numpy.ndarray ):
+    '''
+    A one-dimensional array of Numbers. Programs cannot change an Array once it is made, so
+    slices can share the buffer of the Array they are taken from. Integers are 64 bits wide and
+    results that do not fit are errors, any float element makes the whole Array floats.
+
+    '==' and '!=' in Python compare identity, as for Functions, so the engines can test values
+    against None. Programs compare elements through bin_op.
+    '''
+
+    def __str__( self ):
+        return str( self.tolist() )
+
+    __repr__ = __str__
+
+    def __format__( self, spec ):
+        return format( str( self ), spec )
+
+    def __eq__( self, other ):
+        return self is other
+
+    def __ne__( self, other ):
+        return self is not other
+
+    __hash__ = None
+
+
+BIN_UFUNCS = {
+    Constants.TT_PLUS: numpy.add,
+    Constants.TT_MINUS: numpy.subtract,
+    Constants.TT_MUL: numpy.multiply,
+    Constants.TT_DIV: numpy.true_divide,
+    Constants.TT_EXP: numpy.power,
+    Constants.TT_LT: numpy.less,
+    Constants.TT_LTE: numpy.less_equal,
+    Constants.TT_GT: numpy.greater,
+    Constants.TT_GTE: numpy.greater_equal,
+    Constants.TT_EE: numpy.equal,
+    Constants.TT_NE: numpy.not_equal,
+}
+
+REDUCTIONS = { 'sum': numpy.sum, 'min': numpy.min, 'max': numpy.max }
+
+WRAPPING_UFUNCS = { numpy.add, numpy.subtract, numpy.multiply, numpy.power }  # Their integer results can overflow
+INT_LIMIT = 2.0 ** 63
+NEAR_LIMIT = INT_LIMIT - 4096  # Float results this large may be off by enough to hide an overflow
+
+def make_array( values, node ):
+    # Array of Python Numbers. Integers that do not fit in 64 bits are refused instead of becoming floats.
+    try:
+        res = numpy.array( values, dtype=None if len( values ) > 0 else numpy.int64 )
+
+    except OverflowError:
+        res = None
+
+    if res is None or res.dtype.kind not in 'iufc':
+        raise RuntimeException( 'Integer too large for an Array', node )
+
+    return res.view( Array )
+
+def bin_op( left, right, tok, node ):
+    # Elementwise operation on two Arrays of the same length, or on an Array and a Number.
+    # Comparisons give Arrays of 1 and 0 like they give 1 and 0 on Numbers.
+    if type( left ) is Array and type( right ) is Array and len( left ) != len( right ):
+        raise RuntimeException( f"Arrays of different lengths: {len( left )} and {len( right )}", node )
+
+    if tok.type == Constants.TT_DIV and not numpy.all( right ):
+        raise RuntimeException( 'Division by 0', tok )
+
+    if tok.type == Constants.TT_EXP and numpy.min_scalar_type( left ).kind in 'iu' and numpy.min_scalar_type( right ).kind in 'iu' and numpy.any( numpy.less( right, 0 ) ):
+        # NumPy refuses negative integer powers of integers, Numbers give a float for them
+        left = numpy.asarray( left, dtype=numpy.float64 )
+
+    try:
+        # Invalid results such as the square root of a negative float are nan, as in NumPy
+        with numpy.errstate( all='ignore' ):
+            res = BIN_UFUNCS[tok.type]( left, right )
+
+    except OverflowError:
+        raise RuntimeException( 'Integer too large for an Array', node )
+
+    if res.dtype.kind == 'b':
+        res = res.astype( numpy.int64 )
+
+    elif res.dtype.kind == 'i' and BIN_UFUNCS[tok.type] in WRAPPING_UFUNCS:
+        check_overflow( left, right, BIN_UFUNCS[tok.type], node )
+
+    return res.view( Array )
+
+def check_overflow( left, right, ufunc, node ):
+    # NumPy integers wrap around silently, while Numbers never overflow. The operation is done
+    # again on floats, and on Python integers for the elements that come close to 64 bits.
+    with numpy.errstate( all='ignore' ):
+        approx = numpy.abs( ufunc( numpy.asarray( left, dtype=numpy.float64 ), numpy.asarray( right, dtype=numpy.float64 ) ) )
+
+    if not numpy.any( approx >= NEAR_LIMIT ): return
+
+    if numpy.any( approx >= 2 * INT_LIMIT ):
+        raise RuntimeException( 'Integer too large for an Array', node )
+
+    exact = ufunc( numpy.asarray( left, dtype=object ), numpy.asarray( right, dtype=object ) )
+
+    if any( not -INT_LIMIT <= value < INT_LIMIT for value in numpy.ravel( exact ) ):
+        raise RuntimeException( 'Integer too large for an Array', node )
+
+def index( value, idx, node ):
+    # Element at idx as a Number, negative indices count from the end
+    if not -len( value ) <= idx < len( value ):
+        raise RuntimeException( f"Index {idx} out of range for Array of length {len( value )}", node )
+
+    return value[idx].item()
+
+def slice_( value, start, end ):
+    # Elements from start up to end, both clamped to the Array like Python slices
+    return value[start:end]
+
+def reduce( name, value, node ):
+    # sum, min or max of the elements as a Number. The sum of no elements is 0.
+    if name != 'sum' and len( value ) == 0:
+        raise RuntimeException( f"{name}() of an empty Array", node )
+
+    return REDUCTIONS[name]( value ).item()
@@ -0,0 +1,103 @@
+import glob
+import errno
+from concurrent.futures import ProcessPoolExecutor
+
+from cicinlang.cicinlang import run, Session
+from cicinlang.cache import ProgramCache
+from cicinlang.streams import CaptureSink, FileInput, IteratorInput
+from cicinlang.budget import Budget
+from cicinlang.values import DEFAULT_MEMO_SIZE
+
+def expand_paths( patterns ):
+    # Paths with wildcards are replaced by the files they match, in sorted order. '**' matches any number of directories.
+    # A pattern that matches nothing is kept as it is and reported as a missing file.
+    paths = []
+
+    for pattern in patterns:
+        matches = sorted( glob.glob( pattern, recursive=True ) ) if glob.has_magic( pattern ) else []
+        paths += matches if len( matches ) > 0 else [ pattern ]
+
+    return paths
+
+def describe_io_error( x ):
+    if x.errno == errno.ENOENT:
+        return f"Error: {x.filename} does not exist"
+
+    elif x.errno == errno.EISDIR:
+        return f"Error: {x.filename} is a directory"
+
+    elif x.errno == errno.EACCES:
+        return f"Error: You don't have permissions to open {x.filename}"
+
+    return "Unknown Error. Please try again."
+
+
+class BatchWorker:
+    # Runs script files one after another in one process. The program cache and the
+    # budget are built once and used for every file, and each file gets fresh globals.
+    def __init__( self, engine='tree', stream=False, optimize=False, memo_size=DEFAULT_MEMO_SIZE, cache=None, input_path=None, limits=None ):
+        self.engine = engine
+        self.stream = stream
+        self.optimize = optimize
+        self.memo_size = memo_size
+        self.cache = cache
+        self.input_path = input_path  # Every file reads its input from the start of this file
+        self.budget = Budget( *limits ) if limits != None else None
+
+    def run( self, path ):
+        # Returns the output of the file and its error message, None if it ran fine.
+        # Errors of the program are prefixed with the path, the output alone does not tell the files apart.
+        output = CaptureSink()
+
+        try:
+            with open( path, "r" ) as f:
+                statement = f.read()
+
+            inputs = FileInput( self.input_path ) if self.input_path != None else IteratorInput( [] )
+
+            try:
+                _, error = run( path, statement, engine=self.engine, stream=self.stream, cache=self.cache, optimize=self.optimize, memo_size=self.memo_size, output=output, inputs=inputs, budget=self.budget, session=Session() )
+
+            finally:
+                inputs.close()
+
+        except IOError as x:
+            return output.getvalue(), describe_io_error( x )
+
+        except Exception:
+            return output.getvalue(), "Unknown Error. Please try again."
+
+        return output.getvalue(), f'{path}: {error}' if error else None
+
+
+worker = None  # BatchWorker of a pool process, built once when the process starts
+
+def init_worker( options, cache_options ):
+    global worker
+
+    cache = ProgramCache( *cache_options ) if cache_options != None else None
+    worker = BatchWorker( cache=cache, **options )
+
+def run_file( path ):
+    return worker.run( path )
+
+def run_batch( paths, jobs=1, options={}, cache_options=None ):
+    # Yields ( path, output, error ) for every path in the given order, each as soon as
+    # it and the files before it are done. The pool processes stay alive for the whole
+    # batch, so imports and setup are paid once per process instead of once per file.
+    if jobs <= 1:
+        init_worker( options, cache_options )
+
+        for path in paths:
+            yield ( path, *run_file( path ) )
+
+        return
+
+    with ProcessPoolExecutor( jobs, initializer=init_worker, initargs=( options, cache_options ) ) as executor:
+        try:
+            for path, res in zip( paths, executor.map( run_file, paths ) ):
+                yield ( path, *res )
+
+        except BaseException:
+            executor.shutdown( wait=False, cancel_futures=True )
+            raise
@@ -0,0 +1,97 @@
+import time
+
+from cicinlang.utils import Constants
+from cicinlang.errors import RuntimeException
+from cicinlang.values import bin_op, STRING_TYPES
+
+CHECK_INTERVAL = 1000  # Steps between two looks at the clock when there is a time limit
+UNLIMITED = 1 << 62  # Steps between checks when only the call depth is limited
+
+
+class Budget:
+    '''
+    Limits on the resources one run may use, None meaning no limit:
+
+    - max_steps: loop iterations plus function calls. Everything else a program does is
+      bounded by its length, so this bounds the work of a run.
+    - timeout: seconds of wall-clock time, looked at every CHECK_INTERVAL steps
+    - max_depth: nesting of function calls that have not returned yet
+    - max_int_bits: bit length of the result of '*' and '^' on integers, checked before a
+      power is computed. '+' and '-' add at most one bit per step, max_steps bounds them.
+    - max_str_len: length of a string built by '+'
+
+    Engines count a step by decrementing ticks and only call tick() once it drops below 0,
+    so the common path is a subtraction and a comparison.
+    '''
+
+    def __init__( self, max_steps=None, timeout=None, max_depth=None, max_int_bits=None, max_str_len=None ):
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.max_depth = max_depth if max_depth != None else UNLIMITED
+        self.max_int_bits = max_int_bits
+        self.max_str_len = max_str_len
+
+        self.counted = max_steps != None or timeout != None  # Whether steps have to be counted at all
+        self.caps = max_int_bits != None or max_str_len != None  # Whether results of operators are checked
+        self.bin_op = self.checked_bin_op if self.caps else bin_op
+
+        self.start()
+
+    def start( self ):
+        # Called by run() before the program starts, a budget is used up by one run
+        self.steps = 0  # Steps counted up to the last check
+        self.depth = 0  # Calls running in the tree engine
+        self.deadline = time.monotonic() + self.timeout if self.timeout != None else None
+        self.quantum = self.next_quantum()
+        self.ticks = self.quantum  # Steps left until the next check
+
+    def next_quantum( self ):
+        quantum = UNLIMITED
+
+        if self.max_steps != None: quantum = min( quantum, self.max_steps - self.steps )
+
+        if self.deadline != None: quantum = min( quantum, CHECK_INTERVAL )
+
+        return max( quantum, 0 )
+
+    def tick( self, node, depth=0 ):
+        # Called when ticks went below 0, or when depth passed max_depth
+        if depth > self.max_depth:
+            raise RuntimeException( f"Maximum call depth of {self.max_depth} exceeded", node )
+
+        if self.ticks >= 0: return
+
+        self.steps += self.quantum - self.ticks
+
+        if self.max_steps != None and self.steps > self.max_steps:
+            raise RuntimeException( f"Step limit of {self.max_steps} exceeded", node )
+
+        if self.deadline != None and time.monotonic() > self.deadline:
+            raise RuntimeException( f"Time limit of {self.timeout}s exceeded", node )
+
+        self.quantum = self.next_quantum()
+        self.ticks = self.quantum
+
+    def checked_bin_op( self, left, tok, right, node ):
+        # bin_op, refusing results over the size caps. Powers are checked before they are computed.
+        if type( left ) is int and type( right ) is int and self.max_int_bits != None:
+            if tok.type == Constants.TT_EXP and right > 0 and ( abs( left ).bit_length() - 1 ) * right >= self.max_int_bits:
+                raise RuntimeException( f"Integer result of '^' would have more than {self.max_int_bits} bits", node )
+
+            if tok.type == Constants.TT_MUL and left.bit_length() + right.bit_length() - 1 > self.max_int_bits:
+                raise RuntimeException( f"Integer result of '*' would have more than {self.max_int_bits} bits", node )
+
+            res = bin_op( left, tok, right, node )
+
+            if ( tok.type == Constants.TT_EXP or tok.type == Constants.TT_MUL ) and type( res ) is int and res.bit_length() > self.max_int_bits:
+                # The parser's '^' tokens have no value, so the symbol is spelled out
+                symbol = '^' if tok.type == Constants.TT_EXP else '*'
+                raise RuntimeException( f"Integer result of '{symbol}' would have more than {self.max_int_bits} bits", node )
+
+            return res
+
+        if type( left ) in STRING_TYPES and type( right ) in STRING_TYPES and tok.type == Constants.TT_PLUS and self.max_str_len != None:
+            if len( left ) + len( right ) > self.max_str_len:
+                raise RuntimeException( f"String result of '+' would be longer than {self.max_str_len} characters", node )
+
+        return bin_op( left, tok, right, node )
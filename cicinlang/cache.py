@@ -0,0 +1,190 @@
+import gc
+import os
+import sys
+import pickle
+import hashlib
+
+import cicinlang
+
+CACHE_SUFFIX = '.cache'
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+def default_cache_dir():
+    if os.environ.get( 'CICINLANG_CACHE_DIR' ):
+        return os.environ['CICINLANG_CACHE_DIR']
+
+    base = os.environ.get( 'XDG_CACHE_HOME' ) or os.path.join( os.path.expanduser( '~' ), '.cache' )
+
+    return os.path.join( base, 'cicinlang' )
+
+def interpreter_version():
+    # Cached syntax trees are pickled instances of this package's classes, so any change
+    # to its modules or to the Python version has to invalidate them. Sizes and mtimes are
+    # used instead of file contents to keep the check cheap on every run.
+    package_dir = os.path.dirname( os.path.abspath( __file__ ) )
+    parts = [ cicinlang.__version__, sys.version ]
+
+    for name in sorted( os.listdir( package_dir ) ):
+        if name.endswith( '.py' ):
+            st = os.stat( os.path.join( package_dir, name ) )
+            parts.append( f'{name}:{st.st_size}:{st.st_mtime_ns}' )
+
+    return '\n'.join( parts )
+
+
+class ProgramCache:
+    # Stores parsed programs on disk, keyed by a hash of the file name, the source and
+    # the interpreter version. Entries are never updated in place: a changed source simply
+    # hashes to a different key and its old entry is eventually evicted.
+    def __init__( self, directory=None, max_size=DEFAULT_MAX_SIZE ):
+        self.directory = directory if directory != None else default_cache_dir()
+        self.max_size = max_size
+        self.version = interpreter_version()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __repr__( self ):
+        return f'cache: {self.hits} hits, {self.misses} misses, {self.stores} stores, {self.evictions} evictions ( {self.directory} )'
+
+    def key( self, fn, ftext ):
+        digest = hashlib.sha256()
+
+        for part in ( self.version, fn, ftext ):
+            digest.update( part.encode( 'utf-8', 'surrogatepass' ) )
+            digest.update( b'\0' )
+
+        return digest.hexdigest()
+
+    def path( self, key ):
+        return os.path.join( self.directory, key + CACHE_SUFFIX )
+
+    def load( self, fn, ftext ):
+        # Returns the cached syntax tree, or None on a miss
+        key = self.key( fn, ftext )
+        path = self.path( key )
+
+        # Unpickling a tree allocates one object per node and token, which would otherwise
+        # trigger the cyclic garbage collector many times over for nothing
+        gc_enabled = gc.isenabled()
+        gc.disable()
+
+        try:
+            with open( path, 'rb' ) as f:
+                entry_key, ast_list = pickle.load( f )
+
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        except Exception:
+            # Truncated or otherwise unreadable entries are dropped and rebuilt
+            self.discard( path )
+            self.misses += 1
+            return None
+
+        finally:
+            if gc_enabled: gc.enable()
+
+        if entry_key != key:
+            self.discard( path )
+            self.misses += 1
+            return None
+
+        try:
+            # Touch the entry so eviction removes the least recently used ones first
+            os.utime( path )
+
+        except OSError:
+            pass
+
+        self.hits += 1
+
+        return ast_list
+
+    def store( self, fn, ftext, ast_list ):
+        key = self.key( fn, ftext )
+        path = self.path( key )
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+
+        try:
+            data = pickle.dumps( ( key, ast_list ), pickle.HIGHEST_PROTOCOL )
+
+        except Exception:
+            # Very deeply nested programs can exceed the pickler's recursion limit, run them uncached
+            return False
+
+        try:
+            os.makedirs( self.directory, exist_ok=True )
+
+            # Written under a temporary name and renamed, so concurrent runs never see a partial entry
+            with open( tmp_path, 'wb' ) as f:
+                f.write( data )
+
+            os.replace( tmp_path, path )
+
+        except OSError:
+            self.discard( tmp_path )
+            return False
+
+        self.stores += 1
+        self.evict()
+
+        return True
+
+    def evict( self ):
+        entries = []
+        total = 0
+
+        try:
+            names = os.listdir( self.directory )
+
+        except OSError:
+            return
+
+        for name in names:
+            if not name.endswith( CACHE_SUFFIX ): continue
+
+            path = os.path.join( self.directory, name )
+
+            try:
+                st = os.stat( path )
+
+            except OSError:
+                continue
+
+            entries.append( ( st.st_mtime_ns, st.st_size, path ) )
+            total += st.st_size
+
+        if total <= self.max_size: return
+
+        entries.sort()
+
+        for _, size, path in entries:
+            if total <= self.max_size: break
+
+            if self.discard( path ):
+                self.evictions += 1
+
+            total -= size
+
+    def clear( self ):
+        try:
+            names = os.listdir( self.directory )
+
+        except OSError:
+            return
+
+        for name in names:
+            if name.endswith( CACHE_SUFFIX ):
+                self.discard( os.path.join( self.directory, name ) )
+
+    def discard( self, path ):
+        try:
+            os.remove( path )
+
+        except OSError:
+            return False
+
+        return True
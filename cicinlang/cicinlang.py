@@ -1,28 +1,245 @@
+import threading
+
 from cicinlang.lexer import Lexer 
 from cicinlang.parser_ import Parser
 from cicinlang.interpreter import Interpreter
+from cicinlang.profiler import ProfilingInterpreter
+from cicinlang.compiler import Compiler
+from cicinlang.vm import VM
+from cicinlang.transpiler import Transpiler
+from cicinlang.optimizer import Optimizer
+from cicinlang.resolver import Resolver
 from cicinlang.utils import Context, SymbolTable
+from cicinlang.values import DEFAULT_MEMO_SIZE
+from cicinlang.streams import StdoutSink, make_input
+from cicinlang import errors
+
+ENGINES = [ 'tree', 'vm', 'py' ]
+
+def new_context( globals=None ):
+    # Module context with an empty symbol table, or one holding a copy of the given globals
+    context = Context( '<module>', None, None )
+    context.set_symbol_table( SymbolTable( context ) )
+
+    if globals != None: context.globals.update( globals )
+
+    return context
+
+
+class Session:
+    '''
+    The globals that the programs run in it share. Nothing is shared between sessions, so
+    each can serve a different user, and different sessions can run at the same time in
+    different threads. Runs within one session are serialized, they all use its globals.
+    '''
+
+    def __init__( self, globals=None ):
+        self.context = new_context( globals )
+        self.lock = threading.RLock()  # Reentrant, so a program's output or input may run another program in the same session
+
+    @property
+    def globals( self ):
+        return self.context.globals
+
+    def run( self, fn, ftext, **options ):
+        # run() in this session, it takes the same options
+        return run( fn, ftext, session=self, **options )
+
+
+class Program:
+    '''
+    A program lexed, parsed, optimized and compiled for one engine once, to be run any
+    number of times. Running it never changes it, so one Program can run in several
+    threads at once, as long as each run has its own Session.
+
+    The optimizer folds constants within the size caps of a Budget, so an optimized program
+    is built again for every set of caps it runs with, the first time it runs with them.
+    '''
+
+    def __init__( self, fn, ftext, engine='tree', optimize=False ):
+        # Raises the lexing and syntax errors of the program
+        self.engine = engine
+        self.optimize = optimize
+        self.tokens = Lexer( fn, ftext ).create_tokens()
+
+        self.builds = { None: Build( self.tokens, engine, Optimizer() if optimize else None ) }  # Size caps -> Build
+        self.lock = threading.Lock()
+
+    def build( self, budget ):
+        # Build of the program for the size caps of the budget, only optimized programs depend on them
+        if not self.optimize or budget == None or not budget.caps: return self.builds[None]
+
+        caps = ( budget.max_int_bits, budget.max_str_len )
+
+        with self.lock:
+            if caps not in self.builds:
+                self.builds[caps] = Build( self.tokens, self.engine, Optimizer( budget ) )
+
+            return self.builds[caps]
+
+    def run( self, session=None, memo_size=DEFAULT_MEMO_SIZE, output=None, inputs=None, profile=None, budget=None ):
+        # Returns ( result, error ) like run(). Every run gets fresh globals unless a Session is given.
+        if session == None: session = Session()
+
+        if output == None: output = StdoutSink()
+        inputs = make_input( inputs )
+
+        if budget != None: budget.start()
+
+        try:
+            build = self.build( budget )
+
+            with session.lock:
+                if len( build.ast_list ) == 0: return '', None
+
+                return self.execute( build, session.context, memo_size, output, inputs, profile, budget ), None
+
+        except errors.Exception as error:
+            return None, error
+
+        except RecursionError:
+            # The engines report this at the call that ran out of stack, anything else that does is nested too deeply
+            return None, errors.RuntimeException( 'Maximum call depth exceeded', None )
+
+        finally:
+            output.flush()
+
+    def execute( self, build, context, memo_size, output, inputs, profile, budget ):
+        if self.engine == 'vm':
+            return VM( memo_size, output, inputs, budget ).run( build.code, context )
+
+        elif self.engine == 'py':
+            transpiler = Transpiler( memo_size, output, inputs, budget )
+            counted = transpiler.budget.counted
+
+            with self.lock:
+                if counted not in build.py_code:
+                    build.py_code[counted] = transpiler.compile( build.ast_list )
+
+            code, namespace = build.py_code[counted]
+
+            return transpiler.execute( code, namespace, context )
+
+        if profile != None:
+            return ProfilingInterpreter( memo_size, output, inputs, profile, budget ).interpret( build.ast_list, context )
+
+        return Interpreter( memo_size, output, inputs, budget ).interpret( build.ast_list, context )
+
+
+class Build:
+    # A program parsed, optimized with the given Optimizer if any, and compiled for one engine
+
+    def __init__( self, tokens, engine, optimizer ):
+        self.ast_list = Parser( tokens ).parse() if len( tokens ) > 1 else []
+
+        if optimizer != None: self.ast_list = optimizer.optimize( self.ast_list )
+
+        self.code = None  # Bytecode for the vm engine
+        self.py_code = {}  # Budget.counted -> ( code, namespace ) for the py engine, generated on first use
+
+        if engine != 'py': Resolver().resolve( self.ast_list )
+
+        if engine == 'vm': self.code = Compiler().compile( self.ast_list )
+
+
+# Session of run() calls that do not name one, its globals are kept from one call to the next
+default_session = Session()
+global_context = default_session.context
+
+def run( fn, ftext, engine='tree', stream=False, cache=None, optimize=False, memo_size=DEFAULT_MEMO_SIZE, output=None, inputs=None, profile=None, budget=None, session=None ):
+    # Returns ( result, error ). Everything below raises its errors instead, they are only caught here.
+    # Printed lines go to the output sink, block-buffered stdout unless another OutputSink is given.
+    # inputs is an InputSource or an iterable of lines, stdin is read by default.
+    # Given a Profile, the tree engine records function times and line hits into it.
+    # A Budget limits the steps, time, call depth and value sizes of the run.
+    # The program runs in the globals of the given Session, or of default_session.
+    if output == None: output = StdoutSink()
+    inputs = make_input( inputs )
+
+    if session == None: session = default_session
+
+    if budget != None: budget.start()
+
+    try:
+        with session.lock:
+            context = session.context
+
+            if stream: return run_stream( fn, ftext, engine, optimize, memo_size, output, inputs, profile, budget, context ), None
+
+            return run_program( fn, ftext, engine, cache, optimize, memo_size, output, inputs, profile, budget, context ), None
+
+    except errors.Exception as error:
+        return None, error
+
+    except RecursionError:
+        # The engines report this at the call that ran out of stack, anything else that does is nested too deeply
+        return None, errors.RuntimeException( 'Maximum call depth exceeded', None )
+
+    finally:
+        # Everything printed before an error is written out before the error is reported
+        output.flush()
+
+def run_program( fn, ftext, engine='tree', cache=None, optimize=False, memo_size=DEFAULT_MEMO_SIZE, output=None, inputs=None, profile=None, budget=None, context=None ):
+    if cache != None:
+        ast_list = cache.load( fn, ftext )
+
+        if ast_list != None:
+            if len( ast_list ) == 0: return ''
+
+            if optimize: ast_list = Optimizer( budget ).optimize( ast_list )
+
+            return execute( ast_list, engine, memo_size, output, inputs, profile, budget, context )
+
+    tokens = Lexer( fn, ftext ).create_tokens()
+
+    if len( tokens ) == 1:
+        if cache != None: cache.store( fn, ftext, [] )
+
+        return ''
+
+    ast_list = Parser( tokens ).parse()
+
+    # Only programs that parsed are cached, syntax errors are reported fresh every time
+    if cache != None: cache.store( fn, ftext, ast_list )
+
+    if optimize: ast_list = Optimizer( budget ).optimize( ast_list )
+
+    return execute( ast_list, engine, memo_size, output, inputs, profile, budget, context )
+
+def run_stream( fn, ftext, engine='tree', optimize=False, memo_size=DEFAULT_MEMO_SIZE, output=None, inputs=None, profile=None, budget=None, context=None ):
+    # Lexes, parses and executes one top-level statement at a time, so only the
+    # statement currently being run is held in memory. A lexing error is raised
+    # when the parser reaches it, so the statement it cuts short never runs.
+    parser = Parser( Lexer( fn, ftext ).iter_tokens() )
+
+    if parser.at_end(): return ''
+
+    res = None
+
+    while not parser.at_end():
+        node = parser.parse_statement()
 
-global_context = Context( '<module>', None, None )
-global_symbol_table = SymbolTable( global_context )
-global_context.set_symbol_table( global_symbol_table )
+        ast_list = Optimizer( budget ).optimize( [ node ] ) if optimize else [ node ]
+        res = execute( ast_list, engine, memo_size, output, inputs, profile, budget, context )
 
-def run( fn, ftext ):
-    lexer = Lexer( fn, ftext )
-    tokens, error = lexer.create_tokens()
+    return res
 
-    if error: return None, error 
+def execute( ast_list, engine='tree', memo_size=DEFAULT_MEMO_SIZE, output=None, inputs=None, profile=None, budget=None, context=None ):
+    if context == None: context = global_context
 
-    if len( tokens ) == 1: return '', None 
+    if engine != 'py':
+        # The Python engine maps variables to Python locals instead of frame slots
+        Resolver().resolve( ast_list )
 
-    parser = Parser( tokens )
-    ast_list, error = parser.parse()
+    if engine == 'vm':
+        code = Compiler().compile( ast_list )
 
-    if error: return None, error 
+        return VM( memo_size, output, inputs, budget ).run( code, context )
 
-    interpreter = Interpreter()
-    res, error = interpreter.interpret( ast_list, global_context )
+    elif engine == 'py':
+        return Transpiler( memo_size, output, inputs, budget ).run( ast_list, context )
 
-    if error: return None, error
+    if profile != None:
+        return ProfilingInterpreter( memo_size, output, inputs, profile, budget ).interpret( ast_list, context )
 
-    return res, None
\ No newline at end of file
+    return Interpreter( memo_size, output, inputs, budget ).interpret( ast_list, context )
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+# Thin client of 'cicinlang serve'. It only imports the standard library, so starting it costs
+# a fraction of starting the interpreter. The script and all of stdin are sent to the server in
+# one request, and the output is written as the server streams it back.
+#
+#   python -m cicinlang.client [--socket PATH] [--engine E] [-O] [--input FILE] [--max-steps N] ... <path_to_file>
+
+import os
+import sys
+import json
+import struct
+import socket
+import argparse
+
+ENGINES = [ 'tree', 'vm', 'py' ]
+LIMITS = [ 'max_steps', 'timeout', 'max_depth', 'max_int_bits', 'max_str_len' ]
+
+def default_socket_path():
+    if os.environ.get( 'CICINLANG_SOCKET' ):
+        return os.environ['CICINLANG_SOCKET']
+
+    if os.environ.get( 'XDG_RUNTIME_DIR' ):
+        return os.path.join( os.environ['XDG_RUNTIME_DIR'], f'cicinlang-{os.getuid()}.sock' )
+
+    return os.path.join( private_dir(), 'cicinlang.sock' )
+
+def private_dir():
+    # Directory of the socket without $XDG_RUNTIME_DIR. Its name is predictable, so the server
+    # makes it accessible only to its owner and refuses one made by someone else.
+    return os.path.join( '/tmp', f'cicinlang-{os.getuid()}' )
+
+def check_server( conn, socket_path ):
+    # Scripts and their input are only sent to a server run by the same user
+    if hasattr( socket, 'SO_PEERCRED' ):
+        _, uid, _ = struct.unpack( '3i', conn.getsockopt( socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize( '3i' ) ) )
+
+    else:
+        uid = os.stat( socket_path ).st_uid
+
+    if uid != os.getuid():
+        raise PermissionError( f'The server on {socket_path} is run by another user' )
+
+def send_request( request, socket_path=None, stdout=None ):
+    # Sends one request and writes the output it produces to stdout as it arrives.
+    # Returns ( error, status ), error being None when the program ran fine.
+    if socket_path == None: socket_path = default_socket_path()
+    if stdout == None: stdout = sys.stdout
+
+    error, status = None, 1
+
+    with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as conn:
+        conn.connect( socket_path )
+        check_server( conn, socket_path )
+        conn.sendall( json.dumps( request ).encode( 'utf-8' ) + b'\n' )
+
+        for line in conn.makefile( 'rb' ):
+            message = json.loads( line )
+
+            if 'output' in message:
+                stdout.write( message['output'] )
+                stdout.flush()
+
+            if 'error' in message: error = message['error']
+
+            if 'status' in message: status = message['status']
+
+    return error, status
+
+def main():
+    arg_parser = argparse.ArgumentParser( prog='cicinlang.client', usage='python -m cicinlang.client [--socket PATH] [--engine={tree,vm,py}] [-O] [--unbuffered] [--input FILE] [--max-steps N] [--timeout SECONDS] <path_to_file>' )
+    arg_parser.add_argument( 'path' )
+    arg_parser.add_argument( '--socket', default=None, metavar='PATH', help='socket of the server ( default: $CICINLANG_SOCKET or cicinlang-<uid>.sock in $XDG_RUNTIME_DIR or /tmp/cicinlang-<uid> )' )
+    arg_parser.add_argument( '--engine', choices=ENGINES, default='tree', help='execution engine ( default: tree )' )
+    arg_parser.add_argument( '-O', dest='optimize', action='store_true', help='fold constants and remove dead code before running' )
+    arg_parser.add_argument( '--unbuffered', action='store_true', help='send every printed line straight away instead of in blocks' )
+    arg_parser.add_argument( '--input', default=None, metavar='FILE', help='read input_str and input_num lines from FILE instead of stdin' )
+    arg_parser.add_argument( '--memo-size', type=int, default=None, help='cache size of memo functions that do not give one' )
+    arg_parser.add_argument( '--max-steps', type=int, default=None, metavar='N', help='stop after N loop iterations and function calls' )
+    arg_parser.add_argument( '--timeout', type=float, default=None, metavar='SECONDS', help='stop after SECONDS of wall-clock time' )
+    arg_parser.add_argument( '--max-depth', type=int, default=None, metavar='N', help='maximum depth of nested function calls' )
+    arg_parser.add_argument( '--max-int-bits', type=int, default=None, metavar='N', help='maximum bit length of integers computed by * and ^' )
+    arg_parser.add_argument( '--max-str-len', type=int, default=None, metavar='N', help='maximum length of strings built by +' )
+    args = arg_parser.parse_args()
+
+    socket_path = args.socket if args.socket != None else default_socket_path()
+
+    try:
+        with open( args.path, "r" ) as f:
+            source = f.read()
+
+        # Input is sent along with the script, a terminal has none to send
+        if args.input != None:
+            with open( args.input, "r", encoding='utf-8' ) as f:
+                stdin = f.read()
+
+        else:
+            stdin = sys.stdin.read() if not sys.stdin.isatty() else ''
+
+    except IOError as x:
+        print( f"Error: Cannot open {x.filename}: {x.strerror}" )
+        sys.exit( 1 )
+
+    request = {
+        'name': '<stdin>',
+        'source': source,
+        'stdin': stdin,
+        'engine': args.engine,
+        'optimize': args.optimize,
+        'unbuffered': args.unbuffered,
+        'limits': { limit: getattr( args, limit ) for limit in LIMITS if getattr( args, limit ) != None },
+    }
+
+    if args.memo_size != None: request['memo_size'] = args.memo_size
+
+    try:
+        error, status = send_request( request, socket_path )
+
+    except ( FileNotFoundError, ConnectionRefusedError ):
+        print( f"Error: No cicinlang server is listening on {socket_path}, start one with 'cicinlang serve'", file=sys.stderr )
+        sys.exit( 2 )
+
+    except PermissionError as x:
+        print( f"Error: {x}", file=sys.stderr )
+        sys.exit( 2 )
+
+    except KeyboardInterrupt:
+        sys.exit( 130 )
+
+    if error != None: print( error )
+
+    sys.exit( status )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+from cicinlang.utils import Constants
+from cicinlang.values import NONE, BUILTINS
+from cicinlang.resolver import DECL_FRESH
+
+class Opcodes:
+    LOAD_CONST = 0
+    LOAD_NAME = 1
+    STORE_NEW = 2
+    STORE_OLD = 3
+    POP_TOP = 4
+
+    ADD = 5
+    SUB = 6
+    MUL = 7
+    DIV = 8
+    EXP = 9
+    LT = 10
+    LTE = 11
+    GT = 12
+    GTE = 13
+    EE = 14
+    NE = 15
+    AND = 16
+    OR = 17
+
+    UNARY_POS = 18
+    UNARY_NEG = 19
+    UNARY_NOT = 20
+
+    JUMP = 21
+    IF_JUMP_IF_FALSE = 22
+    LOOP_JUMP_IF_FALSE = 23
+
+    MAKE_FUNCTION = 24
+    GET_CALLEE = 25
+    CALL = 26
+    RETURN_VALUE = 27
+
+    PRINT = 28
+    INPUT = 29
+    STRINGIFY = 30
+
+    LOAD_FAST = 31
+    STORE_FAST = 32
+    STORE_NEW_FAST = 33
+    STORE_NEW_CHECKED = 34
+
+    TAIL_CALL = 35
+
+    BUILD_ARRAY = 36
+    INDEX = 37
+    SLICE = 38
+    CALL_BUILTIN = 39
+
+    COUNTER_TEST = 40
+    COUNTER_STEP = 41
+
+    STORE_FAST_POP = 42
+    STORE_OLD_POP = 43
+
+
+BIN_OPCODES = {
+    Constants.TT_PLUS: Opcodes.ADD,
+    Constants.TT_MINUS: Opcodes.SUB,
+    Constants.TT_MUL: Opcodes.MUL,
+    Constants.TT_DIV: Opcodes.DIV,
+    Constants.TT_EXP: Opcodes.EXP,
+    Constants.TT_LT: Opcodes.LT,
+    Constants.TT_LTE: Opcodes.LTE,
+    Constants.TT_GT: Opcodes.GT,
+    Constants.TT_GTE: Opcodes.GTE,
+    Constants.TT_EE: Opcodes.EE,
+    Constants.TT_NE: Opcodes.NE,
+    'and': Opcodes.AND,
+    'or': Opcodes.OR,
+}
+
+
+class Code:
+    def __init__( self, name ):
+        self.name = name
+        self.ops = []  # Flat list of ( opcode, argument ) pairs
+        self.consts = []
+        self.names = []
+        self.addrs = []  # ( name, frame slots to try ) of every name that is not a plain local
+        self.nodes = []  # AST node of every instruction, used to position errors
+        self.layout = None  # Frame layout of a function body
+
+    def __repr__( self ):
+        return f'<Code {self.name}: {len( self.ops ) // 2} instructions>'
+
+
+class Compiler:
+    def compile( self, ast_list, name='<module>' ):
+        self.code = Code( name )
+        self.const_idx = {}
+        self.name_idx = {}
+        self.addr_idx = {}
+
+        for node in ast_list:
+            self.statement( node )
+
+        self.emit( Opcodes.LOAD_CONST, self.add_const( NONE, 'None' ), None )
+        self.emit( Opcodes.RETURN_VALUE, 0, None )
+
+        return self.code
+
+    def compile_function( self, func_node ):
+        code = Compiler().compile( func_node.func_body_nodes_list, '<function>' )
+        code.args = tuple( tok.value for tok in func_node.func_arg_toks_list )
+        code.layout = func_node.layout
+
+        return code
+
+    def emit( self, op, arg, node ):
+        self.code.ops.append( op )
+        self.code.ops.append( arg )
+        self.code.nodes.append( node )
+
+        return len( self.code.ops ) - 1  # Index of the argument, used for jump patching
+
+    def patch( self, arg_idx, target=None ):
+        self.code.ops[arg_idx] = len( self.code.ops ) if target == None else target
+
+    def add_const( self, value, key=None ):
+        # Literal constants are deduplicated by key, compiled functions never are
+        if key != None and key in self.const_idx:
+            return self.const_idx[key]
+
+        self.code.consts.append( value )
+
+        if key != None:
+            self.const_idx[key] = len( self.code.consts ) - 1
+
+        return len( self.code.consts ) - 1
+
+    def add_name( self, name ):
+        if name not in self.name_idx:
+            self.code.names.append( name )
+            self.name_idx[name] = len( self.code.names ) - 1
+
+        return self.name_idx[name]
+
+    def add_addr( self, name, addr ):
+        key = ( name, addr )
+
+        if key not in self.addr_idx:
+            self.code.addrs.append( key )
+            self.addr_idx[key] = len( self.code.addrs ) - 1
+
+        return self.addr_idx[key]
+
+    def statement( self, node ):
+        node_type = type( node ).__name__
+
+        if node_type == 'IfNode': self.if_stmt( node )
+
+        elif node_type == 'ForNode': self.for_loop( node )
+
+        elif node_type == 'PrintNode':
+            self.expr( node.node )
+            self.emit( Opcodes.PRINT, 0, node )
+
+        elif node_type == 'ReturnNode':
+            if type( node.node ).__name__ == 'FunctionCallNode':
+                # The callee's frame replaces this one, so tail recursion runs in constant space
+                self.call( node.node, Opcodes.TAIL_CALL )
+
+                # Only reached when the VM turns the tail call into a plain call, e.g. for memoized functions
+                self.emit( Opcodes.RETURN_VALUE, 0, node )
+
+            else:
+                self.expr( node.node )
+                self.emit( Opcodes.RETURN_VALUE, 0, node )
+
+        elif node_type == 'NoneType':
+            pass
+
+        elif node_type == 'VarAssignNode' and node.assign_type == Constants.AT_OLD:
+            # The value of an assignment statement is unused, so it is stored without a POP_TOP
+            self.expr( node.var_value_node )
+
+            if node.slot != None:
+                self.emit( Opcodes.STORE_FAST_POP, node.slot, node )
+
+            else:
+                self.emit( Opcodes.STORE_OLD_POP, self.add_addr( node.var_name_token.value, node.addr ), node )
+
+        else:
+            self.expr( node )
+            self.emit( Opcodes.POP_TOP, 0, node )
+
+    def block( self, node_list ):
+        for node in node_list:
+            self.statement( node )
+
+    def if_stmt( self, node ):
+        end_jumps = []
+        conds = [ node.if_condition_node ] + node.elif_condition_node_list
+        bodies = [ node.if_body_node_list ] + node.elif_body_node_lists
+
+        for cond, body in zip( conds, bodies ):
+            self.expr( cond )
+            # Every condition reports errors at the 'if' condition, like the tree-walking interpreter
+            skip = self.emit( Opcodes.IF_JUMP_IF_FALSE, 0, node.if_condition_node )
+            self.block( body )
+            end_jumps.append( self.emit( Opcodes.JUMP, 0, node ) )
+            self.patch( skip )
+
+        self.block( node.else_body_node_list )
+
+        for jump in end_jumps:
+            self.patch( jump )
+
+    def for_loop( self, node ):
+        self.statement( node.init_node )
+
+        loop_start = len( self.code.ops )
+
+        if node.counter != None:
+            # Only the bound is pushed, the counter is compared and stepped in its slot, see resolver.loop_counter
+            self.expr( node.cond_node.right_node )
+            exit_jump = self.emit( Opcodes.COUNTER_TEST, 0, node )
+
+            self.block( node.body_node_list )
+
+            self.emit( Opcodes.COUNTER_STEP, loop_start, node )
+            self.patch( exit_jump )
+
+            return
+
+        self.expr( node.cond_node )
+        exit_jump = self.emit( Opcodes.LOOP_JUMP_IF_FALSE, 0, node.cond_node )
+
+        self.block( node.body_node_list )
+        self.statement( node.update_node )
+
+        self.emit( Opcodes.JUMP, loop_start, node )
+        self.patch( exit_jump )
+
+    def expr( self, node ):
+        node_type = type( node ).__name__
+
+        if node_type == 'NumberNode':
+            self.emit( Opcodes.LOAD_CONST, self.add_const( node.tok.value, ( type( node.tok.value ), node.tok.value ) ), node )
+
+        elif node_type == 'StringNode':
+            self.emit( Opcodes.LOAD_CONST, self.add_const( node.tok.value, ( str, node.tok.value ) ), node )
+
+        elif node_type == 'BinOpNode':
+            self.expr( node.left_node )
+            self.expr( node.right_node )
+
+            op = BIN_OPCODES[node.tok.value if node.tok.type == Constants.TT_KEYWORD else node.tok.type]
+            self.emit( op, 0, node )
+
+        elif node_type == 'UnOpNode':
+            self.expr( node.node )
+
+            if node.tok.type == Constants.TT_PLUS: op = Opcodes.UNARY_POS
+
+            elif node.tok.type == Constants.TT_KEYWORD and node.tok.value == 'not': op = Opcodes.UNARY_NOT
+
+            else: op = Opcodes.UNARY_NEG
+
+            self.emit( op, 0, node )
+
+        elif node_type == 'VarAccessNode':
+            if node.slot != None:
+                self.emit( Opcodes.LOAD_FAST, node.slot, node )
+
+            else:
+                self.emit( Opcodes.LOAD_NAME, self.add_addr( node.var_name_token.value, node.addr ), node )
+
+        elif node_type == 'VarAssignNode':
+            self.expr( node.var_value_node )
+
+            name = node.var_name_token.value
+
+            if node.assign_type == Constants.AT_OLD:
+                if node.slot != None:
+                    self.emit( Opcodes.STORE_FAST, node.slot, node )
+
+                else:
+                    self.emit( Opcodes.STORE_OLD, self.add_addr( name, node.addr ), node )
+
+            elif node.decl_slot == None:
+                self.emit( Opcodes.STORE_NEW, self.add_name( name ), node )
+
+            else:
+                op = Opcodes.STORE_NEW_FAST if node.decl_status == DECL_FRESH else Opcodes.STORE_NEW_CHECKED
+                self.emit( op, node.decl_slot, node )
+
+        elif node_type == 'FunctionDefNode':
+            code = self.compile_function( node )
+            self.emit( Opcodes.MAKE_FUNCTION, self.add_const( code ), node )
+
+        elif node_type == 'FunctionCallNode':
+            self.call( node, Opcodes.CALL )
+
+        elif node_type == 'InputNode':
+            if node.node != None:
+                self.expr( node.node )
+
+            self.emit( Opcodes.INPUT, 1 if node.node != None else 0, node )
+
+        elif node_type == 'StringifyNode':
+            self.expr( node.node )
+            self.emit( Opcodes.STRINGIFY, 0, node )
+
+        elif node_type == 'ArrayNode':
+            for element_node in node.element_nodes:
+                self.expr( element_node )
+
+            self.emit( Opcodes.BUILD_ARRAY, len( node.element_nodes ), node )
+
+        elif node_type == 'IndexNode':
+            self.expr( node.node )
+
+            if not node.is_slice:
+                self.expr( node.start_node )
+                self.emit( Opcodes.INDEX, 0, node )
+
+            else:
+                # The argument tells which of the bounds were pushed: 1 for the start, 2 for the end
+                for bound in [ node.start_node, node.end_node ]:
+                    if bound != None: self.expr( bound )
+
+                self.emit( Opcodes.SLICE, ( 1 if node.start_node != None else 0 ) | ( 2 if node.end_node != None else 0 ), node )
+
+    def call( self, node, op ):
+        # A call to a builtin's name may find a declared function or the builtin, only known at runtime
+        if node.func_name_tok.value in BUILTINS: op = Opcodes.CALL_BUILTIN
+
+        addr_idx = self.add_addr( node.func_name_tok.value, node.addr )
+        self.emit( Opcodes.GET_CALLEE, addr_idx, node )
+
+        for arg_node in node.func_arg_nodes_list:
+            self.expr( arg_node )
+
+        self.emit( op, len( node.func_arg_nodes_list ), node )
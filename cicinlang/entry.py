@@ -1,47 +1,134 @@
 #!/usr/bin/env python3
 
-import sys 
-import errno
+import sys
+import argparse
 
-from cicinlang.cicinlang import run 
+from cicinlang.cicinlang import run, ENGINES
+from cicinlang.cache import ProgramCache, DEFAULT_MAX_SIZE
+from cicinlang.values import MemoCache, DEFAULT_MEMO_SIZE
+from cicinlang.streams import StdoutSink, StdinInput, FileInput
+from cicinlang.profiler import Profile
+from cicinlang.budget import Budget
+from cicinlang.batch import expand_paths, describe_io_error, run_batch
+from cicinlang.server import main as serve
 
 def main():
-    if len( sys.argv ) != 2:
-        print( "Usage: cicinlang <path_to_file>" )
-        return 
+    if len( sys.argv ) > 1 and sys.argv[1] == 'serve':
+        return serve( sys.argv[2:] )
+
+    arg_parser = argparse.ArgumentParser( prog='cicinlang', usage=f'cicinlang [--engine={{{",".join( ENGINES )}}}] [-O] [--stream] [--unbuffered] [--input FILE] [--profile] [--profile-stacks FILE] [--max-steps N] [--timeout SECONDS] [--no-cache] [--cache-dir DIR] [--jobs N] <path_to_file> ...\n       cicinlang serve [--socket PATH] [--workers N]' )
+    arg_parser.add_argument( 'paths', nargs='+', metavar='path', help='files to run, wildcards such as scripts/*.cicin are expanded' )
+    arg_parser.add_argument( '--jobs', '-j', type=int, default=1, metavar='N', help='run several files in N processes at a time ( default: 1 )' )
+    arg_parser.add_argument( '--engine', choices=ENGINES, default='tree', help='execution engine ( default: tree )' )
+    arg_parser.add_argument( '-O', dest='optimize', action='store_true', help='fold constants and remove dead code before running' )
+    arg_parser.add_argument( '--stream', action='store_true', help='run each top-level statement as soon as it is parsed' )
+    arg_parser.add_argument( '--unbuffered', action='store_true', help='write every printed line straight away instead of in blocks' )
+    arg_parser.add_argument( '--input', default=None, metavar='FILE', help='read input_str and input_num lines from FILE instead of stdin' )
+    arg_parser.add_argument( '--no-cache', action='store_true', help='always lex and parse the file instead of using the program cache' )
+    arg_parser.add_argument( '--cache-dir', default=None, help='program cache directory ( default: $CICINLANG_CACHE_DIR or ~/.cache/cicinlang )' )
+    arg_parser.add_argument( '--cache-size', type=int, default=DEFAULT_MAX_SIZE, help='maximum size of the program cache in bytes' )
+    arg_parser.add_argument( '--cache-stats', action='store_true', help='print program cache hits and misses to stderr' )
+    arg_parser.add_argument( '--memo-size', type=int, default=DEFAULT_MEMO_SIZE, help=f'cache size of memo functions that do not give one ( default: {DEFAULT_MEMO_SIZE} )' )
+    arg_parser.add_argument( '--memo-stats', action='store_true', help='print memo function hits and misses to stderr' )
+    arg_parser.add_argument( '--profile', action='store_true', help='print the time spent in every function and the most run lines to stderr' )
+    arg_parser.add_argument( '--profile-stacks', default=None, metavar='FILE', help='write profiled call stacks to FILE in the collapsed format of flame graph tools' )
+    arg_parser.add_argument( '--max-steps', type=int, default=None, metavar='N', help='stop after N loop iterations and function calls' )
+    arg_parser.add_argument( '--timeout', type=float, default=None, metavar='SECONDS', help='stop after SECONDS of wall-clock time' )
+    arg_parser.add_argument( '--max-depth', type=int, default=None, metavar='N', help='maximum depth of nested function calls' )
+    arg_parser.add_argument( '--max-int-bits', type=int, default=None, metavar='N', help='maximum bit length of integers computed by * and ^' )
+    arg_parser.add_argument( '--max-str-len', type=int, default=None, metavar='N', help='maximum length of strings built by +' )
+    args = arg_parser.parse_args()
+
+    profiling = args.profile or args.profile_stacks != None
+
+    if profiling and args.engine != 'tree':
+        arg_parser.error( 'only the tree engine can be profiled' )
+
+    paths = expand_paths( args.paths )
+
+    if len( paths ) > 1 or args.jobs > 1:
+        if profiling or args.memo_stats or args.cache_stats:
+            arg_parser.error( '--profile, --profile-stacks, --memo-stats and --cache-stats only work with a single file' )
+
+        return run_files( paths, args )
 
-    path = sys.argv[1]
+    path = paths[0]
+    cache = None if args.no_cache or args.stream else ProgramCache( args.cache_dir, args.cache_size )
+    output = StdoutSink( buffer_size=0 ) if args.unbuffered else StdoutSink()
+    profile = Profile() if profiling else None
+
+    limits = ( args.max_steps, args.timeout, args.max_depth, args.max_int_bits, args.max_str_len )
+    budget = Budget( *limits ) if any( limit != None for limit in limits ) else None
 
     try:
         with open( path, "r" ) as f:
             statement = f.read()
+
+        # Without --input, stdin is read in batch unless it is a terminal
+        inputs = FileInput( args.input ) if args.input != None else StdinInput()
         
         try: 
-            _, error = run( '<stdin>', statement )
+            _, error = run( '<stdin>', statement, engine=args.engine, stream=args.stream, cache=cache, optimize=args.optimize, memo_size=args.memo_size, output=output, inputs=inputs, profile=profile, budget=budget )
 
         except KeyboardInterrupt:
             pass 
 
         else:
             if error: print( error )
-    
-    except IOError as x:
-        if x.errno == errno.ENOENT:
-            print( f"Error: {path} does not exist" )
-        
-        elif x.errno == errno.EISDIR:
-            print( f"Error: {path} is a directory" )
 
-        elif x.errno == errno.EACCES:
-            print( f"Error: You don't have permissions to open {path}" )
+        finally:
+            inputs.close()
 
-        else:
-            print( "Unknown Error. Please try again." )
-            return 
+        if args.cache_stats and cache != None: print( cache, file=sys.stderr )
+
+        if args.profile: print( profile.report(), file=sys.stderr )
+
+        if args.profile_stacks != None: profile.write_collapsed( args.profile_stacks )
+
+        if args.memo_stats:
+            for memo in sorted( MemoCache.caches, key=lambda memo: memo.node.start or 0 ):
+                print( f'memo {memo}', file=sys.stderr )
+    
+    except IOError as x:
+        print( describe_io_error( x ) )
     
     except: 
         print( "Unknown Error. Please try again." )
         return 
 
+def run_files( paths, args ):
+    # Every file runs with fresh globals. Its output is shown once it is done, in the order the
+    # files were given, followed by its error. Exits with status 1 if any of the files failed.
+    options = {
+        'engine': args.engine,
+        'stream': args.stream,
+        'optimize': args.optimize,
+        'memo_size': args.memo_size,
+        'input_path': args.input,
+        'limits': ( args.max_steps, args.timeout, args.max_depth, args.max_int_bits, args.max_str_len ),
+    }
+
+    if all( limit == None for limit in options['limits'] ): options['limits'] = None
+
+    cache_options = None if args.no_cache or args.stream else ( args.cache_dir, args.cache_size )
+    failed = 0
+
+    try:
+        for path, output, error in run_batch( paths, args.jobs, options, cache_options ):
+            sys.stdout.write( output )
+
+            if error != None:
+                print( error )
+                failed += 1
+
+            sys.stdout.flush()
+
+    except KeyboardInterrupt:
+        sys.exit( 130 )
+
+    if failed > 0:
+        print( f'{failed} of {len( paths )} files failed', file=sys.stderr )
+        sys.exit( 1 )
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
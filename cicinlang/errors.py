@@ -1,54 +1,61 @@
-class Exception:
-    def __init__( self, name, desc, start_pos, end_pos=None ):
+import builtins
+
+# Errors only keep offsets into their source. Line and column are worked out
+# when the error is printed, which for most runs never happens.
+# They are raised by the lexer, the parser and every engine, and caught by run().
+
+class Exception( builtins.Exception ):
+    def __init__( self, name, desc, start, end=None ):
         self.name = name 
         self.desc = desc
-        self.start_pos = start_pos 
-
-        if end_pos == None and start_pos != None:
-            end_pos = start_pos.copy()
-            end_pos.advance()
-            self.end_pos = end_pos
-        
-        else:
-            self.end_pos = end_pos 
+        self.source = start.source if start != None else None
+        self.start = start.start if start != None else None
+        self.end = ( end if end != None else start ).end if start != None else None
+
+    @property
+    def start_pos( self ):
+        return self.source.position( self.start ) if self.source != None else None
+
+    @property
+    def end_pos( self ):
+        return self.source.position( self.end ) if self.source != None else None
     
     def __repr__( self ):
         res = f'{self.name} : {self.desc}\n'
-        if self.start_pos != None:
-            res += f'Line {self.start_pos.ln + 1}, Col {self.start_pos.coln + 1}'
+        if self.source != None:
+            ln, coln = self.source.line_col( self.start )
+            res += f'Line {ln + 1}, Col {coln + 1}'
 
         return res
-    
 
-class Error:
-    def __init__( self, name, desc, start_pos, end_pos=None ):
-        self.name = name 
-        self.desc = desc
-        self.start_pos = start_pos 
-        self.end_pos = end_pos 
+    def __str__( self ):
+        return self.__repr__()
     
+
+class Error( Exception ):
     def __repr__( self ):
+        ln, coln = self.source.line_col( self.start )
         res = f'{self.name} : {self.desc}\n'
-        res += f'Line {self.start_pos.ln + 1}, Col {self.start_pos.coln + 1}'
+        res += f'Line {ln + 1}, Col {coln + 1}'
 
         return res
 
 
 class IllegalCharException( Exception ):
-    def __init__( self, desc, start_pos, end_pos=None ):
-        super().__init__( 'Illegal Character', desc, start_pos, end_pos )
+    def __init__( self, desc, start, end=None ):
+        super().__init__( 'Illegal Character', desc, start, end )
 
 
 class RuntimeException( Exception ):
-    def __init__( self, desc, start_pos, end_pos=None ):
-        super().__init__( 'Runtime Exception', desc, start_pos, end_pos )
+    def __init__( self, desc, start, end=None ):
+        super().__init__( 'Runtime Exception', desc, start, end )
 
 
 class SyntaxError( Error ):
-    def __init__( self, desc, start_pos, end_pos=None ):
-        super().__init__( 'Syntax Error', desc, start_pos, end_pos )
+    def __init__( self, desc, start, end=None ):
+        super().__init__( 'Syntax Error', desc, start, end )
 
 
 class NameNotFoundError( Error ):
-    def __init__( self, desc, start_pos, end_pos=None ):
-        super().__init__( 'Name Error', desc, start_pos, end_pos )
\ No newline at end of file
+    def __init__( self, desc, start, end=None ):
+        super().__init__( 'Name Error', desc, start, end )
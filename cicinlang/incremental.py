@@ -0,0 +1,215 @@
+import bisect
+
+from cicinlang.lexer import Lexer
+from cicinlang.parser_ import Parser
+from cicinlang.utils import Token, Source, SourceSegment, Constants
+from cicinlang import errors
+
+
+class Statement:
+    # A top-level statement of a Document. It covers the text from the end of the statement before
+    # it, whitespace and comments included, to the end of its last token. Statements that do not
+    # parse are kept as one chunk of text with the error instead of a node.
+    __slots__ = ( 'segment', 'length', 'node', 'tokens', 'error' )
+
+    def __init__( self, segment, length, node, tokens, error=None ):
+        self.segment = segment  # Its tokens, nodes and error are relative to segment.base
+        self.length = length
+        self.node = node
+        self.tokens = tokens
+        self.error = error
+
+    @property
+    def start( self ):
+        return self.segment.base
+
+    @property
+    def end( self ):
+        return self.segment.base + self.length
+
+
+class TokenFeed:
+    # Hands the tokens of the lexer to the parser, moving each one into the segment of the
+    # statement being parsed. The parser looks one token ahead, so when a statement is done the
+    # token after it was already moved and has to be moved again into the next segment.
+    def __init__( self, tokens, segment ):
+        self.tokens = tokens
+        self.segment = segment
+        self.taken = []  # Tokens given to the parser since the current statement started
+
+    def __iter__( self ):
+        for tok in self.tokens:
+            base = self.segment.base
+
+            tok.source = self.segment
+            tok.start -= base
+            tok.end -= base
+
+            self.taken.append( tok )
+            yield tok
+
+    def next_statement( self, source ):
+        # Closes the statement just parsed and returns its segment, length and tokens
+        segment = self.segment
+        lookahead = self.taken.pop()
+        tokens = self.taken
+        length = tokens[-1].end if len( tokens ) > 0 else 0
+
+        self.segment = SourceSegment( source, segment.base + length )
+        self.taken = [ lookahead ]
+
+        lookahead.source = self.segment
+        lookahead.start -= length
+        lookahead.end -= length
+
+        return segment, length, tokens
+
+
+class Document:
+    '''
+    The text of a program together with its tokens and syntax tree, kept up to date as the
+    text is edited. An edit is lexed and parsed again from the top-level statement before it,
+    up to the first statement end after it that is also the end of an old statement. All other
+    statements are reused as they are: their tokens and nodes are relative to a SourceSegment,
+    and moving them only changes its base. The work of an edit is therefore proportional to the
+    statements it touches, plus one addition per statement after it.
+
+    The result is the same as lexing and parsing the whole text. A text that does not parse
+    keeps the statement that failed as a chunk of unparsed text, and the error is reported
+    like run() with the stream option does: at the first statement that fails.
+    '''
+
+    def __init__( self, fn, text='' ):
+        self.source = Source( fn, '' )
+        self.statements = []
+
+        self.update( 0, 0, text )
+
+    @property
+    def text( self ):
+        return self.source.text
+
+    @property
+    def error( self ):
+        # Error of the first statement that does not parse, None if the whole text parses
+        for statement in self.statements:
+            if statement.node == None: return statement.error
+
+        return None
+
+    @property
+    def ast_list( self ):
+        # Nodes of the top-level statements, which the engines can execute. Raises the error if the text does not parse.
+        error = self.error
+
+        if error != None: raise error
+
+        return [ statement.node for statement in self.statements ]
+
+    @property
+    def tokens( self ):
+        # Tokens of the whole text, ending with EOF like Lexer.create_tokens
+        res = []
+
+        for statement in self.statements:
+            res += statement.tokens
+
+        n = len( self.source.text )
+        res.append( Token( Constants.TT_EOF, None, self.source, n, n ) )
+
+        return res
+
+    def edit( self, offset, deleted, inserted ):
+        # Replaces deleted characters at offset by the inserted text. Returns the nodes of the
+        # statements that were parsed again, or raises the error if the new text does not parse.
+        nodes = self.update( offset, deleted, inserted )
+
+        error = self.error
+
+        if error != None: raise error
+
+        return nodes
+
+    def update( self, offset, deleted, inserted ):
+        text = self.source.text
+
+        if offset < 0 or deleted < 0 or offset + deleted > len( text ):
+            raise ValueError( f'Edit of {deleted} characters at {offset} is outside of the text' )
+
+        self.source.text = text[:offset] + inserted + text[offset + deleted:]
+        self.source.line_starts = None
+
+        try:
+            return self.reparse( offset, deleted, len( inserted ) - deleted )
+
+        except BaseException:
+            # Anything but an error of the program leaves the document as it was
+            self.source.text = text
+            self.source.line_starts = None
+            raise
+
+    def reparse( self, offset, deleted, delta ):
+        old_end = offset + deleted  # End of the replaced text, old statements ending here or later can be reused
+        statements = self.statements
+
+        # Parsing starts one statement before the edit, the edit may continue it, such as an 'elif' after an 'if'
+        first = bisect.bisect_right( statements, offset, key=lambda statement: statement.start ) - 1
+        first = max( first - 1, 0 )
+        start = statements[first].start if first < len( statements ) else ( statements[-1].end if len( statements ) > 0 else 0 )
+
+        feed = TokenFeed( Lexer( self.source.fn, None, self.source ).iter_tokens( start ), SourceSegment( self.source, start ) )
+        new = []
+        j = first  # Next old statement that may be where parsing gets back in step
+        resync = None
+
+        try:
+            parser = Parser( feed )
+
+            while not parser.at_end():
+                node = parser.parse_statement()
+                segment, length, tokens = feed.next_statement( self.source )
+                new.append( Statement( segment, length, node, tokens ) )
+
+                end = segment.base + length
+
+                while j < len( statements ) and ( statements[j].end < old_end or statements[j].end + delta < end ):
+                    j += 1
+
+                # Text after this end is unchanged and was parsed from the same point before
+                if j < len( statements ) and statements[j].node != None and statements[j].end + delta == end:
+                    resync = j + 1
+                    break
+
+        except errors.Exception as error:
+            segment = feed.segment
+
+            if error.source is self.source:
+                # Lexing errors point into the whole Source
+                error.source = segment
+                error.start -= segment.base
+                error.end -= segment.base
+
+            error_end = segment.base + error.end
+
+            # The unparsed chunk reaches up to the next old statement end after the error
+            while j < len( statements ) and ( statements[j].end < old_end or statements[j].end + delta < error_end or statements[j].node == None ):
+                j += 1
+
+            chunk_end = statements[j].end + delta if j < len( statements ) else len( self.source.text )
+
+            new.append( Statement( segment, chunk_end - segment.base, None, [], error ) )
+            resync = j + 1 if j < len( statements ) else None
+
+        if resync == None:
+            self.statements = statements[:first] + new
+
+        else:
+            rest = statements[resync:]
+
+            if delta != 0:
+                for statement in rest:
+                    statement.segment.base += delta
+
+            self.statements = statements[:first] + new + rest
+
+        return [ statement.node for statement in new if statement.node != None ]
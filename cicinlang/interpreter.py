@@ -1,381 +1,420 @@
-from cicinlang.utils import Constants, Context, SymbolTable
+from cicinlang.utils import Constants
 from cicinlang.errors import RuntimeException, NameNotFoundError
+from cicinlang.values import Function, ReturnSignal, NONE, NUMBER_TYPES, memo_state, UNSET, DEFAULT_MEMO_SIZE, un_op, type_name, stringify, read_input, load_name, store_name, make_memo, memo_key, make_array, index_value, slice_value, builtin_callee, COUNTER_COMPARISONS
+from cicinlang.resolver import Resolver, DECL_FRESH
+from cicinlang.nodes import IfNode, ReturnNode, ForNode, NumberNode
+from cicinlang.streams import StdoutSink, StdinInput
+from cicinlang.budget import Budget
 
-class Number:
-    def __init__( self, value ):
-        self.value = value 
+class Interpreter:   
+    def __init__( self, memo_size=DEFAULT_MEMO_SIZE, output=None, inputs=None, budget=None ):
+        self.memo_size = memo_size  # Cache size of 'memo' functions that do not give one
+        self.output = output if output != None else StdoutSink( buffer_size=0 )  # OutputSink of print statements
+        self.inputs = inputs if inputs != None else StdinInput()  # InputSource of input_str and input_num
+        self.budget = budget if budget != None else Budget()  # Resource limits, none by default
+        self.bin_op = self.budget.bin_op  # bin_op, or a version checking the size caps of the budget
+        self.hooks = []  # Callables given to add_hook
 
+    def interpret( self, ast_list, context ):
+        # Runs top-level statements. Errors are raised, run() turns them back into a result
+        for ast in ast_list:
+            self.visit( ast, context )
 
-class String:
-    def __init__( self, value ):
-        self.value = value 
+        return NONE
 
+    def visit( self, root, context ):
+        node_type = type( root ).__name__ 
 
-class Function:
-    def __init__( self, args, nodes ):
-        self.args = args 
-        self.nodes = nodes
+        if node_type == 'BinOpNode':
+            left = self.visit( root.left_node, context )
+            right = self.visit( root.right_node, context )
 
-class ReturnValue:
-    def __init__( self, payload ):
-        self.payload = payload
+            return self.bin_op( left, root.tok, right, root )
 
+        elif node_type == 'UnOpNode':
+            return un_op( root.tok, self.visit( root.node, context ), root )
+        
+        elif node_type == 'NumberNode':
+            return root.tok.value
+        
+        elif node_type == 'StringNode':
+            return root.tok.value
 
-class NoneValue:
-    def __init__( self ):
-        self.value = None 
+        elif node_type == 'VarAssignNode':
+            val = self.visit( root.var_value_node, context )
 
+            tok = root.var_name_token.value
 
-class Interpreter:   
-    def interpret( self, ast_list, context ):
-        for ast in ast_list:
-            res, error = self.visit( ast, context ) 
+            if root.assign_type == Constants.AT_OLD:
+                if root.slot != None:
+                    context.slots[root.slot] = val
 
-            if error: return None, error
+                elif not store_name( context, root.addr, tok, val ):
+                    raise NameNotFoundError( f"'{tok}' not found", root.var_name_token )
 
-            if type( res ).__name__ == 'ReturnValue':
-                return res, None 
-        
-        return NoneValue(), None 
+            elif root.decl_slot == None:
+                table = context.globals
 
-    def visit( self, root, context ):
-        type_name = type( root ).__name__ 
+                if tok in table:
+                    raise NameNotFoundError( f"'{tok}' is already declared.", root.var_name_token )
+
+                table[tok] = val
+
+            else:
+                slot = root.decl_slot
+
+                if root.decl_status != DECL_FRESH and context.slots[slot] is not UNSET:
+                    raise NameNotFoundError( f"'{tok}' is already declared.", root.var_name_token )
+
+                context.slots[slot] = val
 
-        if type_name == 'BinOpNode':
-            left, error = self.visit( root.left_node, context )
+            return val
 
-            if error: return None, error 
+        elif node_type == 'VarAccessNode':
+            if root.slot != None:
+                return context.slots[root.slot]
 
-            l_type = type( left ).__name__
+            value = load_name( context, root.addr, root.var_name_token.value )
+            
+            if value == None:
+                raise NameNotFoundError( f"'{root.var_name_token.value}' not found", root.var_name_token )
 
-            if l_type == 'ReturnValue':
-                left = left.payload
+            return value
 
-            tok = root.tok
+        elif node_type == 'IfNode':
+            return self.interpret( self.branch( root, context ), context )
+          
+        elif node_type == 'ForNode':
+            if root.init_node != None:
+                self.visit( root.init_node, context )
 
-            right, error = self.visit( root.right_node, context )
+            if root.counter != None: return self.counted_loop( root, context )
 
-            if error: return None, error
+            cond_res = self.visit( root.cond_node, context )
 
-            r_type = type( right ).__name__
+            if type( cond_res ) not in NUMBER_TYPES:
+                raise RuntimeException( f"Output of condition statement in for loop should be number, got {type_name( cond_res )}", root.cond_node )
 
-            if r_type == 'ReturnValue':
-                right = right.payload
+            budget = self.budget
 
-            is_func = l_type == 'Function' or r_type == 'Function'
+            while cond_res == 1:
+                budget.ticks -= 1
+                if budget.ticks < 0: budget.tick( root.cond_node )
 
-            diff_types_wo_and_or_ee_ne = ( l_type != r_type ) and ( tok.type not in [ Constants.TT_KEYWORD, Constants.TT_EE, Constants.TT_NE ] )
+                self.interpret( root.body_node_list, context )
+                self.visit( root.update_node, context )
 
-            str_and_not_add_and_or = l_type == 'String' and tok.type not in [ Constants.TT_PLUS, Constants.TT_EE, Constants.TT_NE, Constants.TT_KEYWORD ]
+                cond_res = self.visit( root.cond_node, context )
 
-            if is_func or diff_types_wo_and_or_ee_ne or str_and_not_add_and_or:
-                return None, RuntimeException( f"Unsupported binary operation '{tok.value}' on types: '{l_type}' and '{r_type}'", root.start_pos, root.end_pos )
-            
-            return self.bin_op( left, tok, right )
+                if type( cond_res ) not in NUMBER_TYPES:
+                    raise RuntimeException( f"Output of condition statement in for loop should be number, got {type_name( cond_res )}", root.cond_node )
 
-        elif type_name == 'UnOpNode':
-            res, error = self.interpret( root.node, context )
+            return NONE
 
-            if error: return None, error 
+        elif node_type == 'FunctionDefNode':
+            func = Function( root.func_arg_toks_list, root.func_body_nodes_list, context, layout=root.layout )
+            func.memo = make_memo( root, self.memo_size )
 
-            res_type = type( res ).__name__
+            return func
 
-            if res_type == 'ReturnValue':
-                res = res.payload
+        elif node_type == 'FunctionCallNode':
+            func_name = root.func_name_tok.value
 
-            is_func = res_type == 'Function'
+            func = context.slots[root.slot] if root.slot != None else load_name( context, root.addr, func_name )
 
-            str_and_not_not = res_type == 'String' and root.tok.value != 'not'
+            if func == None:
+                builtin = builtin_callee( func_name, root )
 
-            if is_func or str_and_not_not:
-                return None, RuntimeException( f"Unsupported unary operator '{root.tok.value}' on type '{res_type}'", root.start_pos, root.end_pos )
+                if builtin == None:
+                    raise NameNotFoundError( f"{func_name} not found", root.func_name_tok )
 
-            tok = root.tok 
+                return builtin( self.visit( root.func_arg_nodes_list[0], context ), root )
+            
+            if type( func ) is not Function:
+                raise RuntimeException( f"Cannot invoke function call on type { type_name( func ) }", root.func_name_tok )
 
-            if tok.type == Constants.TT_PLUS: return Number( res.value ), None 
+            n_params = len( func.args )
+            n_args = len( root.func_arg_nodes_list )
 
-            elif tok.type == Constants.TT_KEYWORD and tok.value == 'not': return ( 0 if res.value else 1 ), None 
+            if n_params != n_args:
+                raise RuntimeException( f"Expected {n_params} arguments, got {n_args}", root )
 
-            else: return Number( -1 * num.value ), None 
-        
-        elif type_name == 'NumberNode':
-            return Number( root.tok.value ), None 
-        
-        elif type_name == 'StringNode':
-            return String( root.tok.value ), None 
+            args = []
 
-        elif type_name == 'VarAssignNode':
-            val, error = self.visit( root.var_value_node, context )
+            for node in root.func_arg_nodes_list:
+                args.append( self.visit( node, context ) )
 
-            if error: return None, error 
+            if func.layout == None:
+                Resolver().resolve_function( func )
 
-            if type( val ).__name__ == 'ReturnValue':
-                val = val.payload
+            child_context = func.call_context( root.func_name_tok, args )
 
-            tok = root.var_name_token.value
-            tok_val = context.symbol_table.get_value( tok )
-            start_pos = root.var_name_token.start_pos
-            end_pos = root.var_name_token.end_pos
+            budget = self.budget
+            budget.ticks -= 1
+            budget.depth += 1
 
-            if root.assign_type == Constants.AT_OLD and tok_val == None:
-                return None, NameNotFoundError( f"'{tok}' not found", start_pos, end_pos )
+            try:
+                if budget.ticks < 0 or budget.depth > budget.max_depth: budget.tick( root, budget.depth )
 
-            elif root.assign_type == Constants.AT_NEW and tok_val != None:
-                return None, NameNotFoundError( f"'{tok}' is already declared.", start_pos, end_pos )
+                if func.memo != None:
+                    return self.call_memoized( func, child_context, args )
 
-            context.symbol_table.set_value( tok, val )
+                return self.call( func, child_context )
 
-            return val, None 
+            except RecursionError:
+                # Python's stack ran out, the innermost call reports it
+                raise RuntimeException( 'Maximum call depth exceeded', root ) from None
 
-        elif type_name == 'VarAccessNode':
-            value = context.symbol_table.get_value( root.var_name_token.value )
-            
-            if value == None:
-                return None, NameNotFoundError( f"'{root.var_name_token.value}' not found", root.var_name_token.start_pos, root.var_name_token.end_pos )
+            finally:
+                budget.depth -= 1
 
-            return value, None 
+        elif node_type == 'PrintNode':
+            res = self.visit( root.node, context )
 
-        elif type_name == 'IfNode':
-            res, error = self.visit( root.if_condition_node, context )
+            if type( res ) is Function:
+                raise RuntimeException( "Cannot print functions", root.node )
 
-            if error: return None, error 
+            if memo_state.active > 0:
+                raise RuntimeException( "Cannot print inside a memoized function", root.node )
 
-            if type( res ).__name__ == 'ReturnValue':
-                res = res.payload
+            self.output.write( f'{res}\n' )
 
-            if type( res ).__name__ != 'Number':
-                return None, RuntimeException( f"Condition value for if statement can only be Number, got {type( res ).__name__}", root.if_condition_node.start_pos, root.if_condition_node.end_pos )
+            return NONE
+        
+        elif node_type == 'InputNode':
+            if root.node != None:
+                res = self.visit( root.node, context )
+
+                if type( res ) is Function:
+                    raise RuntimeException( "Cannot print functions", root.node )
             
-            cond_val = res.value 
+            else:
+                res = None
 
-            if cond_val == 1:
-                res, error = self.interpret( root.if_body_node_list, context )
+            if memo_state.active > 0:
+                raise RuntimeException( "Cannot take input inside a memoized function", root.node if root.node != None else root )
 
-                if error: return None, error 
-                
-                return res, None 
+            return read_input( self.inputs, res, self.output, root.inp_type, root )
 
-            for elif_cond_node, elif_body_node_list in zip( root.elif_condition_node_list, root.elif_body_node_lists ):
-                res, error = self.visit( elif_cond_node )
+        elif node_type == 'ReturnNode':
+            raise ReturnSignal( self.visit( root.node, context ) )
 
-                if error: return None, error 
+        elif node_type == 'StringifyNode':
+            return stringify( self.visit( root.node, context ) )
 
-                if type( res ).__name__ == 'ReturnValue':
-                    res = res.payload
+        elif node_type == 'ArrayNode':
+            return make_array( [ self.visit( node, context ) for node in root.element_nodes ], root )
 
-                if type( res ).__name__ != 'Number':
-                    return None, RuntimeException( f"Condition value for if statement can only be Number, got {type( res ).__name__}", root.if_condition_node.start_pos, root.if_condition_node.end_pos )
-                
-                cond_val = res.value 
+        elif node_type == 'IndexNode':
+            value = self.visit( root.node, context )
+            start = self.visit( root.start_node, context ) if root.start_node != None else None
 
-                if cond_val == 1:
-                    res, error = self.interpret( elif_body_node_list, context )
+            if not root.is_slice:
+                return index_value( value, start, root )
 
-                    if error: return None, error 
+            end = self.visit( root.end_node, context ) if root.end_node != None else None
 
-                    return res, None
-            
-            res, error = self.interpret( root.else_body_node_list, context )
+            return slice_value( value, start, end, root )
 
-            if error: return None, error 
-            
-            return res, None
-          
-        elif type_name == 'ForNode':
-            if root.init_node != None:
-                _, error = self.visit( root.init_node, context )
+        elif node_type == 'NoneType':
+            pass
 
-                if error: return None, error 
+        else:
+            raise RuntimeException( 'Interpreting Error', None )
 
-            cond_res, error = self.visit( root.cond_node, context )
+    def counted_loop( self, root, context ):
+        # The rest of the ForNode case of visit for a loop with a counter, see resolver.loop_counter.
+        # While the counter and its bound are integers, the condition and the update are native
+        # operations on the counter's slot. Other values go through bin_op exactly as before.
+        slot, name, step = root.counter
+        table, key = ( context.slots, slot ) if slot != None else ( context.globals, name )
 
-            if error: return None, error 
+        cond = root.cond_node
+        compare = COUNTER_COMPARISONS[cond.tok.type]
+        bound_node = cond.right_node
+        bound = bound_node.tok.value if type( bound_node ) is NumberNode else None
+        update = root.update_node.var_value_node
 
-            if type( cond_res ).__name__ == 'ReturnValue':
-                cond_res = cond_res.payload
+        budget = self.budget
 
-            cond_res_type = type( cond_res ).__name__
+        while True:
+            i = table[key]
+            n = bound if bound != None else self.visit( bound_node, context )
 
-            if cond_res_type != "Number":
-                return None, RuntimeException( f"Output of condition statement in for loop should be number, got {cond_res_type}", root.cond_node.start_pos, root.cond_node.end_pos )
+            if type( i ) is int and type( n ) is int:
+                if not compare( i, n ): return NONE
 
-            cond_val = cond_res.value
+            else:
+                cond_res = self.bin_op( i, cond.tok, n, cond )
 
-            while cond_val == 1:
-                res, error = self.interpret( root.body_node_list, context )
+                if type( cond_res ) not in NUMBER_TYPES:
+                    raise RuntimeException( f"Output of condition statement in for loop should be number, got {type_name( cond_res )}", cond )
 
-                if error: return error 
+                if cond_res != 1: return NONE
 
-                if type( res ).__name__ == 'ReturnValue':
-                    return res, None 
-                
-                _, error = self.visit( root.update_node, context )
+            budget.ticks -= 1
+            if budget.ticks < 0: budget.tick( cond )
 
-                if error: return None, error 
+            self.interpret( root.body_node_list, context )
 
-                cond_res, error = self.visit( root.cond_node, context )
+            i = table[key]
+            table[key] = i + step if type( i ) is int else self.bin_op( i, update.tok, update.right_node.tok.value, update )
 
-                if error: return None, error 
+    def branch( self, root, context ):
+        # Body of the first if/elif branch whose condition is 1, otherwise the else body
+        res = self.visit( root.if_condition_node, context )
 
-                if type( cond_res ).__name__ == 'ReturnValue':
-                    cond_res = cond_res.payload
+        if type( res ) not in NUMBER_TYPES:
+            raise RuntimeException( f"Condition value for if statement can only be Number, got {type_name( res )}", root.if_condition_node )
 
-                cond_res_type = type( cond_res ).__name__
+        if res == 1:
+            return root.if_body_node_list
 
-                if cond_res_type != "Number":
-                    return None, RuntimeException( f"Output of condition statement in for loop should be number, got {cond_res_type}", root.cond_node.start_pos, root.cond_node.end_pos )
+        for elif_cond_node, elif_body_node_list in zip( root.elif_condition_node_list, root.elif_body_node_lists ):
+            res = self.visit( elif_cond_node, context )
 
-                cond_val = cond_res.value
-            
-            return NoneValue(), None 
+            if type( res ) not in NUMBER_TYPES:
+                raise RuntimeException( f"Condition value for if statement can only be Number, got {type_name( res )}", root.if_condition_node )
 
-        elif type_name == 'FunctionDefNode':
-            return Function( root.func_arg_toks_list, root.func_body_nodes_list ), None 
+            if res == 1:
+                return elif_body_node_list
 
-        elif type_name == 'FunctionCallNode':
-            func_name = root.func_name_tok.value
+        return root.else_body_node_list
 
-            func = context.symbol_table.get_value( func_name )
+    def call( self, func, child_context ):
+        # Runs a function body. Its value is the one given to the first return that is reached.
+        try:
+            res = self.body( func.nodes, child_context )
 
-            if func == None:
-                return None, NameNotFoundError( f"{func_name} not found", root.func_name_tok.start_pos, root.func_name_tok.end_pos )
-            
-            if type( func ).__name__ != 'Function':
-                return None, RuntimeException( f"Cannot invoke function call on type { type( func ).__name__ }", root.func_name_tok.start_pos, root.func_name_tok.end_pos )
+        except ReturnSignal as signal:
+            return signal.value
 
-            child_context = Context( func_name, context, root.func_name_tok.start_pos )
-            child_symbol_table = SymbolTable( child_context )
-            child_context.set_symbol_table( child_symbol_table )
+        return NONE if res is UNSET else res
 
-            n_params = len( func.args )
-            n_args = len( root.func_arg_nodes_list )
+    def body( self, node_list, context ):
+        # Returns reached through if statements are passed back directly, only leaving a loop
+        # needs a ReturnSignal. Gives UNSET if the statements ran to the end without returning.
+        for node in node_list:
+            node_type = type( node )
 
-            if n_params != n_args:
-                return None, RuntimeException( f"Expected {n_params} arguments, got {n_args}", root.start_pos, root.end_pos )
+            if node_type is ReturnNode:
+                return self.visit( node.node, context )
 
-            for param_tok, node in zip( func.args, root.func_arg_nodes_list ):
-                param_name = param_tok.value
-                res, error = self.visit( node, context )
+            if node_type is IfNode:
+                branch = self.branch( node, context )
 
-                if error: return None, error 
+                if len( branch ) == 1 and type( branch[0] ) is ReturnNode:
+                    # The common 'if ( ... ) { return ...; }', without a nested call
+                    return self.visit( branch[0].node, context )
 
-                if type( res ).__name__ == 'ReturnValue':
-                    res = res.payload
+                res = self.body( branch, context )
 
-                child_context.symbol_table.set_value( param_name, res )
-            
-            res, error = self.interpret( func.nodes, child_context )
+                if res is not UNSET: return res
 
-            if error: return None, error 
+            else:
+                self.visit( node, context )
 
-            return res, None 
+        return UNSET
 
-        elif type_name == 'PrintNode':
-            res, error = self.visit( root.node, context )
+    def call_memoized( self, func, child_context, args ):
+        key = memo_key( args )
+        res = func.memo.get( key )
 
-            if error: return None, error 
+        if res is not UNSET: return res
 
-            if type( res ).__name__ == 'ReturnValue':
-                res = res.payload
+        memo_state.active += 1
 
-            if type( res ).__name__ == 'Function':
-                return None, RuntimeException( "Cannot print functions", root.node.start_pos, root.node.end_pos )
+        try:
+            res = self.call( func, child_context )
 
-            print( res.value )
+        finally:
+            memo_state.active -= 1
 
-            return NoneValue(), None 
-        
-        elif type_name == 'InputNode':
-            if root.node != None:
-                res, error = self.visit( root.node, context )
+        func.memo.put( key, res )
 
-                if error: return None, error 
+        return res
 
-                if type( res ).__name__ == 'ReturnValue':
-                    res = res.payload
+    def add_hook( self, hook ):
+        # hook( event, node, context, arg ) is called for these events:
+        #   'enter'  before a node is visited
+        #   'exit'   after a node is visited, arg is its value. Not sent when the node raises, as return statements do.
+        #   'call'   before a function body runs, node is the Function and context its call frame
+        #   'return' after a function body ran, arg is the returned value
+        #   'loop'   before every iteration of a for loop, arg counts the iterations from 0
+        # The traced methods are only swapped in while hooks are installed, so without hooks nothing is slower.
+        self.hooks.append( hook )
 
-                if type( res ).__name__ == 'Function':
-                    return None, RuntimeException( "Cannot print functions", root.node.start_pos, root.node.end_pos )
-            
-            else:
-                res = None
+        self.visit = self.traced_visit
+        self.call = self.traced_call
+        self.body = self.traced_body
 
-            inp = input( res.value if res != None else '' )
+    def remove_hook( self, hook ):
+        self.hooks.remove( hook )
 
-            if root.inp_type == 'str':
-                return String( inp ), None 
-            
-            elif root.inp_type == 'num':
-                try: 
-                    num = float( inp ) if '.' in inp else int( inp )
+        if len( self.hooks ) == 0:
+            del self.visit, self.call, self.body
 
-                except:
-                    return None, RuntimeException( f"Could not convert '{inp}' to Number", root.start_pos, root.end_pos )
+    def emit( self, event, node, context, arg ):
+        for hook in self.hooks:
+            hook( event, node, context, arg )
 
-                else:
-                    return Number( num ), None 
+    def traced_visit( self, root, context ):
+        if root == None: return None
 
-        elif type_name == 'ReturnNode':
-            res, error = self.visit( root.node, context )
+        self.emit( 'enter', root, context, None )
 
-            if error: return None, error 
+        if type( root ) is ForNode:
+            res = self.traced_loop( root, context )
 
-            if type( res ).__name__ == 'ReturnValue':
-                return res, None 
-            
-            return ReturnValue( res ), None 
+        else:
+            res = type( self ).visit( self, root, context )
 
-        elif type_name == 'StringifyNode':
-            res, error = self.visit( root.node, context )
+        self.emit( 'exit', root, context, res )
 
-            if error: return None, error 
+        return res
 
-            if type( res ).__name__ == 'ReturnValue':
-                res = res.payload
-            
-            if type( res ).__name__ == 'Function':
-                return String( f'<Function object>' ), None 
+    def traced_call( self, func, child_context ):
+        self.emit( 'call', func, child_context, None )
 
-            else: 
-                return String( str( res.value ) ), None
+        res = type( self ).call( self, func, child_context )
 
-        elif type_name == 'NoneType':
-            pass
+        self.emit( 'return', func, child_context, res )
 
-        else:
-            return None, 'Interpreting Error'
-    
-    def bin_op( self, left, tok, right ):
-        if tok.type == Constants.TT_PLUS: 
-            if type( left ).__name__ == 'Number':
-                return Number( left.value + right.value ), None 
-            
-            elif type( left ).__name__ == 'String':
-                return String( left.value + right.value ), None 
-            
-        elif tok.type == Constants.TT_MINUS: return Number( left.value - right.value ), None 
+        return res
 
-        elif tok.type == Constants.TT_MUL: return Number( left.value * right.value ), None 
+    def traced_body( self, node_list, context ):
+        # Every statement goes through visit so it is reported, returns reach call() as a ReturnSignal
+        for node in node_list:
+            self.visit( node, context )
 
-        elif tok.type == Constants.TT_EXP: return Number( left.value ** right.value ), None
+        return UNSET
 
-        elif tok.type == Constants.TT_DIV:
-            if right.value == 0: return None, RuntimeException( 'Division by 0', tok.start_pos )
+    def traced_loop( self, root, context ):
+        # The ForNode case of visit, reporting every iteration
+        if root.init_node != None:
+            self.visit( root.init_node, context )
 
-            return Number( left.value / right.value ), None
+        cond_res = self.visit( root.cond_node, context )
 
-        elif tok.type == Constants.TT_LT: return Number( 1 if left.value < right.value else 0 ), None 
+        if type( cond_res ) not in NUMBER_TYPES:
+            raise RuntimeException( f"Output of condition statement in for loop should be number, got {type_name( cond_res )}", root.cond_node )
 
-        elif tok.type == Constants.TT_LTE: return Number( 1 if left.value <= right.value else 0 ), None 
+        budget = self.budget
+        iteration = 0
 
-        elif tok.type == Constants.TT_GT: return Number( 1 if left.value > right.value else 0 ), None
+        while cond_res == 1:
+            budget.ticks -= 1
+            if budget.ticks < 0: budget.tick( root.cond_node )
 
-        elif tok.type == Constants.TT_GTE: return Number( 1 if left.value >= right.value else 0 ), None
+            self.emit( 'loop', root, context, iteration )
+            iteration += 1
 
-        elif tok.type == Constants.TT_EE: return Number( 1 if left.value == right.value else 0 ), None
+            self.interpret( root.body_node_list, context )
+            self.visit( root.update_node, context )
 
-        elif tok.type == Constants.TT_NE: return Number( 1 if left.value != right.value else 0 ), None
+            cond_res = self.visit( root.cond_node, context )
 
-        elif tok.type == Constants.TT_KEYWORD and tok.value == 'and': return Number( 1 if left.value and right.value else 0 ), None
+            if type( cond_res ) not in NUMBER_TYPES:
+                raise RuntimeException( f"Output of condition statement in for loop should be number, got {type_name( cond_res )}", root.cond_node )
 
-        elif tok.type == Constants.TT_KEYWORD and tok.value == 'or': return Number( 1 if left.value or right.value else 0 ), None
\ No newline at end of file
+        return NONE
@@ -1,223 +1,106 @@
-from cicinlang.utils import Token, Position, Constants
+import re
+
+from cicinlang.utils import Token, Span, Source, Constants
 from cicinlang.errors import IllegalCharException
 
+# Every token of the language is matched by one precompiled pattern. The order of
+# the alternatives matters: strings are tried before a lone quote, which can only
+# mean the string was never closed, and two-character operators before one-character ones.
+TOKEN_REGEX = re.compile( r'''
+    (?P<WHITESPACE>[ \t\n]+)
+  | (?P<COMMENT>\#[^\n]*)
+  | (?P<WORD>[A-Za-z][A-Za-z0-9_]*)
+  | (?P<NUMBER>[0-9]+(?:\.[0-9]*)?)
+  | (?P<STRING>"[^"]*"|'[^']*')
+  | (?P<OPERATOR>>=|<=|==|!=|[-+*/^(){}\[\];,:<>=])
+  | (?P<BANG>!)
+  | (?P<QUOTE>["'])
+''', re.VERBOSE )
+
+OPERATOR_TOKENS = {
+    '+': ( Constants.TT_PLUS, '+' ),
+    '-': ( Constants.TT_MINUS, '-' ),
+    '*': ( Constants.TT_MUL, '*' ),
+    '/': ( Constants.TT_DIV, '/' ),
+    '^': ( Constants.TT_EXP, '^' ),
+    '(': ( Constants.TT_LPAREN, None ),
+    ')': ( Constants.TT_RPAREN, None ),
+    '{': ( Constants.TT_LBRACE, None ),
+    '}': ( Constants.TT_RBRACE, None ),
+    '[': ( Constants.TT_LBRACKET, None ),
+    ']': ( Constants.TT_RBRACKET, None ),
+    ';': ( Constants.TT_SEMICOLON, None ),
+    ',': ( Constants.TT_COMMA, None ),
+    ':': ( Constants.TT_COLON, None ),
+    '>': ( Constants.TT_GT, '>' ),
+    '>=': ( Constants.TT_GTE, '>=' ),
+    '<': ( Constants.TT_LT, '<' ),
+    '<=': ( Constants.TT_LTE, '<=' ),
+    '=': ( Constants.TT_EQ, None ),
+    '==': ( Constants.TT_EE, '==' ),
+    '!=': ( Constants.TT_NE, '!=' ),
+}
+
 class Lexer:
-    def __init__( self, fn, ftext ):
-        self.pos = Position( fn, ftext )
-        self.cur_char = ftext[self.pos.idx] if self.pos.idx < len( ftext ) else None
-    
-    def advance( self ):
-        self.pos.advance()
-        self.cur_char = self.pos.ftext[self.pos.idx] if self.pos.idx < len( self.pos.ftext ) else None
+    def __init__( self, fn, ftext, source=None ):
+        # The incremental parser passes the Source its other tokens point into
+        self.source = source if source != None else Source( fn, ftext )
 
     def create_tokens( self ):
-        tokens = []
-
-        while self.cur_char != None:
-            if self.cur_char in Constants.WHITESPACES:
-                self.advance()
-
-            elif self.cur_char in Constants.LETTERS:
-                tokens.append( self.create_identifier_token() )
+        return list( self.iter_tokens() )
 
-            elif self.cur_char in Constants.DIGITS:
-                tokens.append( self.create_num_token() )
-            
-            elif self.cur_char in Constants.OPERATORS:
-                tokens.append( self.create_operator_token() )
-            
-            elif self.cur_char in Constants.PARENTHESES:
-                tokens.append( self.create_parentheses_token() )
+    def iter_tokens( self, start=0 ):
+        # Yields tokens as they are matched and finishes with an EOF token.
+        # If lexing fails, the error is raised when the stream reaches it.
+        # Lexing starts at offset start, which has to be the start of a token or of whitespace.
+        source = self.source
+        ftext = source.text
+        keywords = Constants.KEYWORDS
+        operator_tokens = OPERATOR_TOKENS
 
-            elif self.cur_char == '>':
-                tokens.append( self.create_greater_than_token() )
-            
-            elif self.cur_char == '<':
-                tokens.append( self.create_less_than_token() )
-            
-            elif self.cur_char == '=':
-                tokens.append( self.create_equals_token() )
+        idx = start
+        n = len( ftext )
 
-            elif self.cur_char == '!':
-                token, error = self.create_not_equals_token()
+        for m in TOKEN_REGEX.finditer( ftext, start ):
+            # finditer skips characters no alternative matches, which shows up as a gap
+            if m.start() != idx: break
 
-                if error: return None, error 
+            kind = m.lastgroup
+            end = m.end()
 
-                tokens.append( token )
+            if kind == 'WHITESPACE' or kind == 'COMMENT':
+                idx = end
+                continue
 
-            elif self.cur_char == '#':
-                while self.cur_char not in  [ '\n', None ]:
-                    self.advance()
-            
-            elif self.cur_char == ';':
-                tokens.append( Token( Constants.TT_SEMICOLON ).set_pos( self.pos ) )
-                self.advance()
+            if kind == 'WORD':
+                value = m.group()
+                yield Token( Constants.TT_KEYWORD if value in keywords else Constants.TT_IDENTIFIER, value, source, idx, end )
 
-            elif self.cur_char == ',':
-                tokens.append( Token( Constants.TT_COMMA ).set_pos( self.pos ) )
-                self.advance()
+            elif kind == 'OPERATOR':
+                tok_type, value = operator_tokens[m.group()]
+                yield Token( tok_type, value, source, idx, end )
 
-            elif self.cur_char == '{':
-                tokens.append( Token( Constants.TT_LBRACE ).set_pos( self.pos ) )
-                self.advance()
+            elif kind == 'NUMBER':
+                value = m.group()
 
-            elif self.cur_char == '}':
-                tokens.append( Token( Constants.TT_RBRACE ).set_pos( self.pos ) )
-                self.advance()
+                if '.' in value: yield Token( Constants.TT_FLOAT, float( value ), source, idx, end )
+                else: yield Token( Constants.TT_INT, int( value ), source, idx, end )
 
-            elif self.cur_char in [ "'", '"']:
-                tok, error = self.create_string_token()
+            elif kind == 'STRING':
+                yield Token( Constants.TT_STRING, ftext[idx + 1:end - 1], source, idx, end )
 
-                if error: return None, error 
+            elif kind == 'BANG':
+                # '!' is only valid as part of '!=', report the character that should have been '='
+                c = ftext[end] if end < n else None
+                raise IllegalCharException( f"'{c}'", Span( source, idx, end + 1 ) )
 
-                tokens.append( tok )
-
-            else:
-                c = "'" + self.cur_char + "'"
-                return None, IllegalCharException( c, self.pos )
-        
-        tokens.append( Token( Constants.TT_EOF ).set_pos( self.pos, self.pos ) )
-        return tokens, None 
-    
-    def create_greater_than_token( self ):
-        start_pos = self.pos.copy() 
-        tok_type = Constants.TT_GT 
-        tok_val = '>'
-        self.advance()
-
-        if self.cur_char == '=':
-            tok_type = Constants.TT_GTE
-            tok_val = '>='
-            self.advance()
-        
-        return Token( tok_type, tok_val ).set_pos( start_pos, self.pos )
-        
-    def create_less_than_token( self ):
-        start_pos = self.pos.copy() 
-        tok_type = Constants.TT_LT 
-        tok_val = '<'
-        self.advance()
-
-        if self.cur_char == '=':
-            tok_type = Constants.TT_LTE
-            tok_val = '<='
-            self.advance()
-        
-        return Token( tok_type, tok_val ).set_pos( start_pos, self.pos )
-    
-    def create_equals_token( self ):
-        start_pos = self.pos.copy() 
-        tok_type = Constants.TT_EQ
-        tok_val = None
-        self.advance()
-
-        if self.cur_char == '=':
-            tok_type = Constants.TT_EE 
-            tok_val = '=='
-            self.advance()
-        
-        return Token( tok_type, tok_val ).set_pos( start_pos, self.pos )
-    
-    def create_not_equals_token( self ):
-        start_pos = self.pos.copy() 
-        self.advance()
-        c = self.cur_char
-        self.advance()
-
-        if self.cur_char == '=':
-            tok_type = Constants.TT_NE
-            tok_val = '!='
-            return Token( tok_type ).set_pos( start_pos, self.pos ), None 
-
-        else:
-            return None, IllegalCharException( f"'{c}'", start_pos, self.pos )
-    
-    
-    def create_identifier_token( self ):
-        id_str = ''
-        pos_start = self.pos.copy()
-        
-        while self.cur_char != None and self.cur_char in Constants.LETTERS + Constants.DIGITS + '_':
-            id_str += self.cur_char 
-            self.advance()
-        
-        tok_type = Constants.TT_KEYWORD if id_str in Constants.KEYWORDS else Constants.TT_IDENTIFIER
-
-        return Token( tok_type, id_str ).set_pos( pos_start, self.pos )
-
-    def create_num_token( self ):
-        num_str = ''
-        dot_count = 0
-        start_pos = self.pos.copy()
-
-        while self.cur_char != None and self.cur_char in Constants.DIGITS + '.':
-            if self.cur_char == '.':
-                if dot_count >= 1: break 
-                else: dot_count += 1
-
-            num_str += self.cur_char 
-            self.advance()
-
-        if dot_count > 0: return Token( Constants.TT_FLOAT, float( num_str ) ).set_pos( start_pos, self.pos )
-        else: return Token( Constants.TT_INT, int( num_str ) ).set_pos( start_pos, self.pos )
-
-    def create_operator_token( self ):
-        if self.cur_char == '+':
-            type_ = Constants.TT_PLUS
-            val = '+'
-
-        elif self.cur_char == '-':
-            type_ = Constants.TT_MINUS
-            val = '-'
-
-        elif self.cur_char == '*':
-            type_ = Constants.TT_MUL
-            val = '*'
-
-        elif self.cur_char == '/':
-            type_ = Constants.TT_DIV
-            val = '/'
-
-        elif self.cur_char == '^':
-            type_ = Constants.TT_EXP
-            val = '^'
-        
-        tok = Token( type_, val ).set_pos( self.pos )
-        self.advance()
-        return tok 
-
-    def create_parentheses_token( self ):
-        if self.cur_char == '(':
-            type_ = Constants.TT_LPAREN
-
-        elif self.cur_char == ')':
-            type_ = Constants.TT_RPAREN
-        
-        tok = Token( type_ ).set_pos( self.pos )
-        self.advance()
-        return tok 
-    
-    def create_string_token( self ):
-        end_char = self.cur_char 
-        start_pos = self.pos.copy()
-        s = ""
-
-        self.advance()
-
-        while self.cur_char != None and self.cur_char != end_char:
-            s += self.cur_char
-            self.advance()
-        
-        if self.cur_char == None:
-            if end_char == '"':
-                char_s = "'\"'"
-            
             else:
-                char_s = '"\'"'
-
-            return None, IllegalCharException( f'{char_s} expected', self.pos )
+                char_s = "'\"'" if m.group() == '"' else '"\'"'
+                raise IllegalCharException( f'{char_s} expected', Span( source, n, n + 1 ) )
 
-        self.advance()
+            idx = end
 
-        return Token( Constants.TT_STRING, s ).set_pos( start_pos, self.pos ), None
+        if idx != n:
+            raise IllegalCharException( "'" + ftext[idx] + "'", Span( source, idx, idx + 1 ) )
 
+        yield Token( Constants.TT_EOF, None, source, idx, idx )
@@ -1,8 +1,9 @@
 class NumberNode:
     def __init__( self, tok ):
         self.tok = tok 
-        self.start_pos = tok.start_pos
-        self.end_pos = tok.end_pos
+        self.source = tok.source
+        self.start = tok.start
+        self.end = tok.end
 
     def __repr__( self ):
         return f'{self.tok}'
@@ -11,8 +12,9 @@ class NumberNode:
 class StringNode:
     def __init__( self, tok ):
         self.tok = tok 
-        self.start_pos = tok.start_pos
-        self.end_pos = tok.end_pos
+        self.source = tok.source
+        self.start = tok.start
+        self.end = tok.end
 
     def __repr__( self ):
         return f'{self.tok}'
@@ -23,8 +25,9 @@ class BinOpNode:
         self.left_node = left_node
         self.tok = tok
         self.right_node = right_node
-        self.start_pos = left_node.start_pos
-        self.end_pos = right_node.end_pos
+        self.source = left_node.source
+        self.start = left_node.start
+        self.end = right_node.end
 
     def __repr__( self ):
         return f'( {self.left_node}, {self.tok}, {self.right_node} )'
@@ -34,8 +37,9 @@ class UnOpNode:
     def __init__( self, tok, node ):
         self.tok = tok 
         self.node = node 
-        self.start_pos = tok.start_pos 
-        self.end_pos = node.end_pos
+        self.source = tok.source
+        self.start = tok.start
+        self.end = node.end
     
     def __repr__( self ):
         return f'( {self.tok}, {self.node} )'
@@ -45,8 +49,9 @@ class VarAssignNode:
     def __init__( self, var_name_token, var_value_node, assign_type ):
         self.var_name_token = var_name_token  # This token is an IDENTIFIER token
         self.var_value_node = var_value_node  # This node will be an expression node
-        self.start_pos = var_name_token.start_pos
-        self.end_pos = var_value_node.end_pos
+        self.source = var_name_token.source
+        self.start = var_name_token.start
+        self.end = var_value_node.end
         self.assign_type = assign_type
     
     def __repr__( self ):
@@ -56,8 +61,9 @@ class VarAssignNode:
 class VarAccessNode:
     def __init__( self, var_name_token ):
         self.var_name_token = var_name_token 
-        self.start_pos = var_name_token.start_pos
-        self.end_pos = var_name_token.end_pos
+        self.source = var_name_token.source
+        self.start = var_name_token.start
+        self.end = var_name_token.end
 
     def __repr__( self ):
         return f'{self.var_name_token.value}'
@@ -70,23 +76,24 @@ class IfNode:
         self.elif_condition_node_list = elif_condition_node_list
         self.elif_body_node_lists = elif_body_node_lists
         self.else_body_node_list = else_body_node_list
-        self.start_pos = if_condition_node.start_pos if if_condition_node != None else None
+        self.source = if_condition_node.source if if_condition_node != None else None
+        self.start = if_condition_node.start if if_condition_node != None else None
         
         if len( else_body_node_list ) > 0:
-            self.end_pos = else_body_node_list[-1].end_pos
+            self.end = else_body_node_list[-1].end
 
         elif len( elif_condition_node_list ) > 0:
             if len( elif_body_node_lists[-1] ) > 0:
-                self.end_pos = elif_body_node_lists[-1][-1].end_pos
+                self.end = elif_body_node_lists[-1][-1].end
                 
             else:
-                self.end_pos = elif_condition_node_list[-1].end_pos
+                self.end = elif_condition_node_list[-1].end
 
         elif len( if_body_node_list ) > 0:
-            self.end_pos = if_body_node_list[-1].end_pos
+            self.end = if_body_node_list[-1].end
         
         else:
-            self.end_pos = if_condition_node.end_pos if if_condition_node != None else None
+            self.end = if_condition_node.end if if_condition_node != None else None
 
     def __repr__( self ):
         return f'( IF: {self.if_condition_node}, {self.if_body_node_list}, ELIF: {self.elif_condition_node_list}, {self.elif_body_node_lists}, ELSE: {self.else_body_node_list} )'
@@ -98,8 +105,9 @@ class ForNode:
         self.cond_node = cond_node 
         self.update_node = update_node 
         self.body_node_list = body_node_list
-        self.start_pos = init_node.start_pos if init_node != None else cond_node.start_pos
-        self.end_pos = body_node_list[-1].end_pos if len( body_node_list ) > 0 else update_node.end_pos
+        self.source = cond_node.source
+        self.start = init_node.start if init_node != None else cond_node.start
+        self.end = body_node_list[-1].end if len( body_node_list ) > 0 else update_node.end
 
     def __repr__( self ):
         return f'( FOR: {self.init_node}, {self.cond_node}, {self.update_node}, {self.body_node_list} )'
@@ -109,8 +117,11 @@ class FunctionDefNode:
     def __init__( self, func_arg_toks_list, func_body_nodes_list ):
         self.func_arg_toks_list = func_arg_toks_list
         self.func_body_nodes_list = func_body_nodes_list
-        self.start_pos = func_arg_toks_list[0].start_pos if len( func_arg_toks_list ) > 0 else func_body_nodes_list[0].start_pos
-        self.end_pos = func_body_nodes_list[-1].end_pos
+        self.memo = False  # Set by the parser for functions defined with 'memo'
+        self.memo_size = None
+        self.source = func_body_nodes_list[-1].source
+        self.start = func_arg_toks_list[0].start if len( func_arg_toks_list ) > 0 else func_body_nodes_list[0].start
+        self.end = func_body_nodes_list[-1].end
     
     def __repr__( self ):
         return f'( FUNC - ARGS:{self.func_arg_toks_list}, BODY:{self.func_body_nodes_list} )'
@@ -120,8 +131,9 @@ class FunctionCallNode:
     def __init__( self, func_name_tok, func_arg_nodes_list ):
         self.func_name_tok = func_name_tok
         self.func_arg_nodes_list = func_arg_nodes_list
-        self.start_pos = func_name_tok.start_pos
-        self.end_pos = func_arg_nodes_list[-1].end_pos if len( func_arg_nodes_list ) > 0 else func_name_tok.end_pos
+        self.source = func_name_tok.source
+        self.start = func_name_tok.start
+        self.end = func_arg_nodes_list[-1].end if len( func_arg_nodes_list ) > 0 else func_name_tok.end
 
     def __repr__( self ):
         return f'( CALLING FUNC "{self.func_name_tok.value}" WITH ARGS {self.func_arg_nodes_list} )'
@@ -130,8 +142,9 @@ class FunctionCallNode:
 class ReturnNode:
     def __init__( self, val_node ):
         self.node = val_node
-        self.start_pos = val_node.start_pos
-        self.end_pos = val_node.end_pos
+        self.source = val_node.source
+        self.start = val_node.start
+        self.end = val_node.end
     
     def __repr__( self ):
         return f'( RETURN {self.node} )'
@@ -140,8 +153,9 @@ class ReturnNode:
 class PrintNode:
     def __init__( self, node ):
         self.node = node 
-        self.start_pos = node.start_pos
-        self.end_pos = node.end_pos
+        self.source = node.source
+        self.start = node.start
+        self.end = node.end
     
     def __repr__( self ):
         return f'( PRINT: {self.node} )'
@@ -151,15 +165,44 @@ class InputNode:
     def __init__( self, node, inp_type ):
         self.node = node 
         self.inp_type = inp_type
-        self.start_pos = node.start_pos if node != None else None
-        self.end_pos = node.end_pos if node != None else None 
+        self.source = node.source if node != None else None
+        self.start = node.start if node != None else None
+        self.end = node.end if node != None else None
     
     def __repr__( self ):
         return f'( INPUT({self.inp_type}) - MSG: {self.node} )'
 
 
+class ArrayNode:
+    def __init__( self, element_nodes, lbracket_tok, rbracket_tok ):
+        self.element_nodes = element_nodes
+        self.source = lbracket_tok.source
+        self.start = lbracket_tok.start
+        self.end = rbracket_tok.end
+
+    def __repr__( self ):
+        return f'( ARRAY: {self.element_nodes} )'
+
+
+class IndexNode:
+    def __init__( self, node, start_node, end_node, is_slice, rbracket_tok ):
+        self.node = node  # The indexed expression
+        self.start_node = start_node  # Index, or start of a slice. None for a slice without one.
+        self.end_node = end_node  # End of a slice, None if it has none
+        self.is_slice = is_slice
+        self.source = node.source
+        self.start = node.start
+        self.end = rbracket_tok.end
+
+    def __repr__( self ):
+        if self.is_slice: return f'( SLICE {self.node}: {self.start_node}, {self.end_node} )'
+
+        return f'( INDEX {self.node}: {self.start_node} )'
+
+
 class StringifyNode:
     def __init__( self, node ):
         self.node = node
-        self.start_pos = node.start_pos 
-        self.end_pos = node.end_pos
\ No newline at end of file
+        self.source = node.source
+        self.start = node.start
+        self.end = node.end
\ No newline at end of file
@@ -0,0 +1,187 @@
+from cicinlang.utils import Constants, Token
+from cicinlang.nodes import NumberNode, StringNode, IfNode
+from cicinlang.values import bin_op, un_op, STRING_TYPES
+
+# Integer powers whose result would exceed this many bits are left for the program to compute,
+# so that the optimizer never spends longer than the program itself would
+MAX_FOLDED_BITS = 4096
+
+
+class Optimizer:
+    # Rewrites a parsed program before it is executed. Only rewrites that cannot change the
+    # output or the errors of a program are made: an operation that would fail at runtime is
+    # never folded, so its error is still raised at the same position when it is reached.
+    def __init__( self, budget=None ):
+        # Results over the size caps of a Budget are left unfolded, to fail when they are reached
+        self.bin_op = budget.bin_op if budget != None else bin_op
+
+    def optimize( self, ast_list ):
+        return self.block( ast_list )
+
+    def block( self, node_list ):
+        res = []
+
+        for node in node_list:
+            node = self.visit( node )
+            node_type = type( node ).__name__
+
+            if node_type == 'IfNode' and len( node.elif_condition_node_list ) == 0 and is_literal( node.if_condition_node ) == 'Number':
+                # Only the chosen branch is left, it runs in the same context so it can be inlined
+                res.extend( node.if_body_node_list if node.if_condition_node.tok.value == 1 else node.else_body_node_list )
+
+            elif node_type == 'ForNode' and is_literal( node.cond_node ) == 'Number' and node.cond_node.tok.value != 1:
+                # The loop never runs, but its initializer does
+                if node.init_node != None: res.append( node.init_node )
+
+            elif node_type in [ 'NumberNode', 'StringNode', 'FunctionDefNode', 'NoneType' ]:
+                # Statements without side effects
+                pass
+
+            else:
+                res.append( node )
+
+            if len( res ) > 0 and type( res[-1] ).__name__ == 'ReturnNode':
+                # Nothing after a return is ever executed
+                break
+
+        return res
+
+    def visit( self, node ):
+        node_type = type( node ).__name__
+
+        if node_type == 'BinOpNode':
+            node.left_node = self.visit( node.left_node )
+            node.right_node = self.visit( node.right_node )
+
+            return self.fold_bin_op( node )
+
+        elif node_type == 'UnOpNode':
+            node.node = self.visit( node.node )
+
+            return self.fold_un_op( node )
+
+        elif node_type == 'VarAssignNode':
+            node.var_value_node = self.visit( node.var_value_node )
+
+        elif node_type == 'IfNode':
+            return self.if_stmt( node )
+
+        elif node_type == 'ForNode':
+            node.init_node = self.visit( node.init_node )
+            node.cond_node = self.visit( node.cond_node )
+            node.update_node = self.visit( node.update_node )
+            node.body_node_list = self.block( node.body_node_list )
+
+        elif node_type == 'FunctionDefNode':
+            node.func_body_nodes_list = self.block( node.func_body_nodes_list )
+
+        elif node_type == 'FunctionCallNode':
+            node.func_arg_nodes_list = [ self.visit( arg_node ) for arg_node in node.func_arg_nodes_list ]
+
+        elif node_type == 'ArrayNode':
+            node.element_nodes = [ self.visit( element_node ) for element_node in node.element_nodes ]
+
+        elif node_type == 'IndexNode':
+            node.node = self.visit( node.node )
+            node.start_node = self.visit( node.start_node )
+            node.end_node = self.visit( node.end_node )
+
+        elif node_type in [ 'ReturnNode', 'PrintNode', 'StringifyNode' ]:
+            node.node = self.visit( node.node )
+
+        elif node_type == 'InputNode':
+            if node.node != None:
+                node.node = self.visit( node.node )
+
+        return node
+
+    def fold_bin_op( self, node ):
+        l_type = is_literal( node.left_node )
+        r_type = is_literal( node.right_node )
+
+        if l_type == None or r_type == None: return node
+
+        left = literal_value( node.left_node )
+        right = literal_value( node.right_node )
+
+        if node.tok.type == Constants.TT_EXP and l_type == 'Number' and r_type == 'Number':
+            if not pow_is_small( left, right ): return node
+
+        try:
+            res = self.bin_op( left, node.tok, right, node )
+
+        except Exception:
+            # A runtime error, or e.g. a float overflow, which is left to happen at runtime exactly as before
+            return node
+
+        return literal_node( res, node )
+
+    def fold_un_op( self, node ):
+        if is_literal( node.node ) == None: return node
+
+        try:
+            res = un_op( node.tok, literal_value( node.node ), node )
+
+        except Exception:
+            return node
+
+        return literal_node( res, node )
+
+    def if_stmt( self, node ):
+        conds = [ self.visit( node.if_condition_node ) ] + [ self.visit( cond ) for cond in node.elif_condition_node_list ]
+        bodies = [ self.block( node.if_body_node_list ) ] + [ self.block( body ) for body in node.elif_body_node_lists ]
+        else_body = self.block( node.else_body_node_list )
+
+        kept_conds = []
+        kept_bodies = []
+
+        for cond, body in zip( conds, bodies ):
+            if is_literal( cond ) != 'Number':
+                # Unknown at compile time, or a string that raises an error when it is reached
+                kept_conds.append( cond )
+                kept_bodies.append( body )
+
+            elif cond.tok.value == 1:
+                # Always taken, so it replaces the else branch and nothing after it is reachable
+                else_body = body
+                break
+
+        if len( kept_conds ) == 0:
+            # The chain is decided statically, block() inlines whichever branch remains
+            return IfNode( literal_node( 0, node.if_condition_node ), [], [], [], else_body )
+
+        if kept_conds[0] is not conds[0]:
+            # Errors in any condition are reported at the first one, so it is kept in place
+            kept_conds.insert( 0, conds[0] )
+            kept_bodies.insert( 0, [] )
+
+        return IfNode( kept_conds[0], kept_bodies[0], kept_conds[1:], kept_bodies[1:], else_body )
+
+
+def is_literal( node ):
+    node_type = type( node ).__name__
+
+    if node_type == 'NumberNode': return 'Number'
+
+    if node_type == 'StringNode': return 'String'
+
+    return None
+
+def literal_value( node ):
+    return node.tok.value
+
+def literal_node( value, node ):
+    # The new literal covers the same source span as the expression it replaces
+    if type( value ) in STRING_TYPES:
+        return StringNode( Token( Constants.TT_STRING, str( value ), node.source, node.start, node.end ) )
+
+    tok_type = Constants.TT_INT if type( value ) is int else Constants.TT_FLOAT
+
+    return NumberNode( Token( tok_type, value, node.source, node.start, node.end ) )
+
+def pow_is_small( base, exp ):
+    if type( base ) is not int or type( exp ) is not int: return True
+
+    if exp <= 0 or base in [ -1, 0, 1 ]: return True
+
+    return base.bit_length() * exp <= MAX_FOLDED_BITS
@@ -4,58 +4,57 @@ from cicinlang.errors import SyntaxError
 
 class Parser:
     def __init__( self, tokens ):
-        self.tokens = tokens
-        self.idx = -1
+        # tokens can be a list or a lazy iterator such as Lexer.iter_tokens()
+        self.tokens = iter( tokens )
+        self.memo_depth = 0  # Number of 'memo' function bodies being parsed
         self.advance()
     
     def advance( self ):
-        self.idx += 1
-        self.cur_tok = self.tokens[self.idx] if self.idx < len( self.tokens ) else None 
+        self.cur_tok = next( self.tokens, None )
     
     def parse( self ):
         exprs = []
 
         while self.cur_tok.type != Constants.TT_EOF:
-            head, error = self.expr()
+            head = self.parse_statement()
 
-            if error: return None, error 
+            exprs.append( head )
+        
+        return exprs
 
-            node_type = type( head ).__name__
+    def at_end( self ):
+        return self.cur_tok.type == Constants.TT_EOF
 
-            semicolon_required = node_type not in [ "ForNode", "IfNode", "FunctionDefNode" ] and ( node_type != 'VarAssignNode' or type( head.var_value_node ).__name__ != 'FunctionDefNode' )
+    def parse_statement( self ):
+        # Parses a single top-level statement, including its terminating ';'
+        head = self.expr()
 
-            if semicolon_required:
-                if self.cur_tok.type != Constants.TT_SEMICOLON:
-                    return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
-                
-                self.advance()
+        node_type = type( head ).__name__
 
-            exprs.append( head )
-        
-        return exprs, None 
+        semicolon_required = node_type not in [ "ForNode", "IfNode", "FunctionDefNode" ] and ( node_type != 'VarAssignNode' or type( head.var_value_node ).__name__ != 'FunctionDefNode' )
 
-    def bin_op_term( self, parse_func, tok_val_func ):
-        left, error = parse_func()
+        if semicolon_required:
+            if self.cur_tok.type != Constants.TT_SEMICOLON:
+                raise SyntaxError( "Expected ';'", self.cur_tok )
+            
+            self.advance()
 
-        if error: return None, error 
+        return head
+
+    def bin_op_term( self, parse_func, tok_val_func ):
+        left = parse_func()
 
         while tok_val_func( self.cur_tok ):
             tok = self.cur_tok 
             self.advance()
-            right, error = parse_func()
+            right = parse_func()
 
-            if error: return None, error 
-            
             left = BinOpNode( left, tok, right )
         
-        return left, None 
+        return left
     
     def expr( self, inside_func=False ):
-        expr_head, error = self.void_expr( inside_func ) if self.cur_tok.value in [ 'for', 'if', 'print', 'return' ] else self.value_expr()
-
-        if error: return None, error 
-
-        return expr_head, None 
+        return self.void_expr( inside_func ) if self.cur_tok.value in [ 'for', 'if', 'print', 'return' ] else self.value_expr()
 
     def value_expr( self ):
         if self.cur_tok.value == 'var': 
@@ -64,71 +63,51 @@ class Parser:
             name_tok = self.cur_tok 
 
             if name_tok.type != Constants.TT_IDENTIFIER:
-                return None, SyntaxError( "Expected Identifier", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                raise SyntaxError( "Expected Identifier", self.cur_tok )
             
             self.advance()
 
             if self.cur_tok.type != Constants.TT_EQ:
-                return None, SyntaxError( "Expected '='", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                raise SyntaxError( "Expected '='", self.cur_tok )
             
             self.advance()
 
-            value_node, error = self.value_expr()
-
-            if error: return None, error 
-
-            return VarAssignNode( name_tok, value_node, Constants.AT_NEW ), None
+            value_node = self.value_expr()
 
-        head, error = self.or_chain()
+            return VarAssignNode( name_tok, value_node, Constants.AT_NEW )
 
-        if error: return None, error 
+        head = self.or_chain()
 
         if type( head ).__name__ == 'VarAccessNode' and self.cur_tok.type == Constants.TT_EQ:
             name_tok = head.var_name_token
 
             self.advance()
 
-            value_node, error = self.value_expr()
+            value_node = self.value_expr()
 
-            if error: return None, error 
-
-            return VarAssignNode( name_tok, value_node, Constants.AT_OLD ), None
+            return VarAssignNode( name_tok, value_node, Constants.AT_OLD )
         
-        return head, None 
+        return head
 
     def void_expr( self, inside_func=False ):
         if self.cur_tok.value == 'for':
-            for_head, error = self.for_loop( inside_func )
-
-            if error: return None, error 
-
-            return for_head, None 
+            return self.for_loop( inside_func )
         
         elif self.cur_tok.value == 'if':
-            if_head, error = self.if_stmt( inside_func )
-
-            if error: return None, error 
-
-            return if_head, None 
+            return self.if_stmt( inside_func )
         
         elif self.cur_tok.value == 'print':
-            print_head, error = self.print_stmt()
-
-            if error: return None, error 
-
-            return print_head, None 
+            return self.print_stmt()
         
         elif self.cur_tok.value == 'return':
             if not inside_func: 
-                return None, SyntaxError( "Return statements only allowed as standalone statements inside functions", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                raise SyntaxError( "Return statements only allowed as standalone statements inside functions", self.cur_tok )
             
             self.advance()
 
-            head, error = self.value_expr()
-
-            if error: return None, error 
+            head = self.value_expr()
 
-            return ReturnNode( head ), None 
+            return ReturnNode( head )
 
     def or_chain( self ):
         return self.bin_op_term( self.or_operand, lambda x : x.value == 'or' )
@@ -154,20 +133,16 @@ class Parser:
     def factor( self ):
         atoms = []
 
-        head, error = self.atom()
+        head = self.atom()
 
-        if error: return None, error 
-
-        if type( head ).__name__ == 'FunctionDefNode': return head, None
+        if type( head ).__name__ == 'FunctionDefNode': return head
 
         atoms.append( head )
 
         while self.cur_tok.type == Constants.TT_EXP:
             self.advance()
 
-            head, error = self.atom()
-
-            if error: return None, error 
+            head = self.atom()
 
             atoms.append( head )
         
@@ -177,36 +152,38 @@ class Parser:
 
             atoms.append( BinOpNode( left, Token( Constants.TT_EXP ), right ) )
 
-        return atoms[0], None
+        return atoms[0]
 
     def atom( self ):
         if self.cur_tok.type in [ Constants.TT_INT, Constants.TT_FLOAT ]:
             tok = self.cur_tok 
             self.advance()
 
-            return NumberNode( tok ), None 
+            return NumberNode( tok )
         
         elif self.cur_tok.type == Constants.TT_STRING:
             tok = self.cur_tok
             self.advance()
 
-            return StringNode( tok ), None
+            return StringNode( tok )
 
         elif self.cur_tok.type == Constants.TT_IDENTIFIER:
             tok = self.cur_tok 
             self.advance()
 
+            # 'memo' only starts a definition when a size or a body follows, elsewhere it is a name
+            if tok.value == 'memo' and self.cur_tok.type == Constants.TT_INT:
+                return self.memo_def( tok )
+
             if self.cur_tok.type != Constants.TT_LPAREN:
-                return VarAccessNode( tok ), None 
+                return self.index( VarAccessNode( tok ) )
             
             self.advance()
 
             func_arg_nodes_list = [] 
 
             while self.cur_tok.type != Constants.TT_RPAREN:
-                head, error = self.value_expr()
-
-                if error: return None, error 
+                head = self.value_expr()
 
                 func_arg_nodes_list.append( head )
 
@@ -214,11 +191,14 @@ class Parser:
                     self.advance()
                 
                 elif self.cur_tok.type != Constants.TT_RPAREN:
-                    return None, SyntaxError( "Expected ',' or ')'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                    raise SyntaxError( "Expected ',' or ')'", self.cur_tok )
             
             self.advance()
 
-            return FunctionCallNode( tok, func_arg_nodes_list ), None
+            if tok.value == 'memo' and self.cur_tok.type == Constants.TT_LBRACE:
+                return self.memo_body( tok, func_arg_nodes_list )
+
+            return self.index( FunctionCallNode( tok, func_arg_nodes_list ) )
         
         elif self.cur_tok.type == Constants.TT_LPAREN:
             self.advance()
@@ -230,16 +210,14 @@ class Parser:
                 self.advance()
 
                 if self.cur_tok.type != Constants.TT_LBRACE:
-                    return None, SyntaxError( "Expected '{'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                    raise SyntaxError( "Expected '{'", self.cur_tok )
                 
                 lbrace_tok = self.cur_tok 
 
                 self.advance()
 
                 while self.cur_tok.type != Constants.TT_RBRACE:
-                    head, error = self.expr( True )
-
-                    if error: return None, error 
+                    head = self.expr( True )
 
                     node_type = type( head ).__name__
 
@@ -247,22 +225,20 @@ class Parser:
 
                     if semicolon_required:
                         if self.cur_tok.type != Constants.TT_SEMICOLON:
-                            return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                            raise SyntaxError( "Expected ';'", self.cur_tok )
                         
                         self.advance()
                     
                     func_body_nodes_list.append( head )
 
                 if len( func_body_nodes_list ) == 0:
-                    return None, SyntaxError( "Functions with empty bodies are not supported", lbrace_tok.start_pos, self.cur_tok.end_pos )
+                    raise SyntaxError( "Functions with empty bodies are not supported", lbrace_tok, self.cur_tok )
                 
                 self.advance()
 
-                return FunctionDefNode( func_arg_toks_list, func_body_nodes_list ), None 
-
-            head, error = self.value_expr()
+                return FunctionDefNode( func_arg_toks_list, func_body_nodes_list )
 
-            if error: return None, error 
+            head = self.value_expr()
 
             nt = type( head ).__name__
 
@@ -272,28 +248,24 @@ class Parser:
                 self.advance()
 
                 while self.cur_tok.type != Constants.TT_RPAREN:
-                    head, error = self.value_expr()
-
-                    if error: return None, error 
+                    head = self.value_expr()
 
                     if type( head ).__name__ != 'VarAccessNode':
-                        return None, SyntaxError( "Expected identifier", head.start_pos, head.end_pos )
+                        raise SyntaxError( "Expected identifier", head )
                     
                     func_arg_toks_list.append( head.var_name_token )
                 
                 self.advance()
 
                 if self.cur_tok.type != Constants.TT_LBRACE:
-                    return None, SyntaxError( "Expected '{'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                    raise SyntaxError( "Expected '{'", self.cur_tok )
                 
                 self.advance()
 
                 func_body_nodes_list = []
 
                 while self.cur_tok.type != Constants.TT_RBRACE:
-                    head, error = self.expr( True )
-
-                    if error: return None, error
+                    head = self.expr( True )
 
                     node_type = type( head ).__name__
 
@@ -301,37 +273,35 @@ class Parser:
 
                     if semicolon_required:
                         if self.cur_tok.type != Constants.TT_SEMICOLON:
-                            return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                            raise SyntaxError( "Expected ';'", self.cur_tok )
                         
                         self.advance()
                     
                     func_body_nodes_list.append( head )
 
                 if len( func_body_nodes_list ) == 0:
-                    return None, SyntaxError( "Functions with empty bodies are not supported", lbrace_tok.start_pos, self.cur_tok.end_pos )
+                    raise SyntaxError( "Functions with empty bodies are not supported", lbrace_tok, self.cur_tok )
 
                 self.advance()
 
-                return FunctionDefNode( func_arg_toks_list, func_body_nodes_list ), None
+                return FunctionDefNode( func_arg_toks_list, func_body_nodes_list )
 
             if self.cur_tok.type != Constants.TT_RPAREN:
-                return None, SyntaxError( "Expected ')'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                raise SyntaxError( "Expected ')'", self.cur_tok )
             
             self.advance()
 
-            func_arg_toks_list = [ head.var_name_token ]
-
             if nt != 'VarAccessNode' or self.cur_tok.type != Constants.TT_LBRACE:
-                return head, None 
+                return self.index( head )
+
+            func_arg_toks_list = [ head.var_name_token ]
             
             self.advance()
 
             func_body_nodes_list = []
 
             while self.cur_tok.type != Constants.TT_RBRACE:
-                head, error = self.expr( True )
-                
-                if error: return None, error
+                head = self.expr( True )
 
                 node_type = type( head ).__name__
 
@@ -339,7 +309,7 @@ class Parser:
 
                 if semicolon_required:
                     if self.cur_tok.type != Constants.TT_SEMICOLON:
-                        return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                        raise SyntaxError( "Expected ';'", self.cur_tok )
                     
                     self.advance()
                 
@@ -347,64 +317,107 @@ class Parser:
 
             self.advance()
 
-            return FunctionDefNode( func_arg_toks_list, func_body_nodes_list ), None
+            return FunctionDefNode( func_arg_toks_list, func_body_nodes_list )
         
+        elif self.cur_tok.type == Constants.TT_LBRACKET:
+            return self.index( self.array_literal() )
+
         elif self.cur_tok.type in [ Constants.TT_PLUS, Constants.TT_MINUS ] or self.cur_tok.value == 'not':
             tok = self.cur_tok
 
             self.advance()
 
-            node, error = self.atom()
+            node = self.atom()
 
-            if error: return None, error 
-
-            return UnOpNode( tok, node ), None 
+            return UnOpNode( tok, node )
 
         elif self.cur_tok.value in [ 'input_str', 'input_num' ]:
-            input_head, error = self.input_stmt()
+            return self.input_stmt()
 
-            if error: return None, error 
+        elif self.cur_tok.value == 'str':
+            return self.stringify_stmt()
 
-            return input_head, None
+        else:
+            raise SyntaxError( "Expected int, float, identifier, '(', '[', '+', '-' or 'not'", self.cur_tok )
 
-        elif self.cur_tok.value == 'str':
-            str_head, error = self.stringify_stmt()
+    def array_literal( self ):
+        # [ value_expr, ... ]
+        lbracket_tok = self.cur_tok
+
+        self.advance()
 
-            if error: return None, error 
+        element_nodes = []
 
-            return str_head, None
+        while self.cur_tok.type != Constants.TT_RBRACKET:
+            head = self.value_expr()
 
-        else:
-            return None, SyntaxError( "Expected int, float, identifier, '(', '+', '-' or 'not'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            element_nodes.append( head )
+
+            if self.cur_tok.type == Constants.TT_COMMA:
+                self.advance()
+
+            elif self.cur_tok.type != Constants.TT_RBRACKET:
+                raise SyntaxError( "Expected ',' or ']'", self.cur_tok )
+
+        rbracket_tok = self.cur_tok
+
+        self.advance()
+
+        return ArrayNode( element_nodes, lbracket_tok, rbracket_tok )
+
+    def index( self, head ):
+        # Any number of [ index ] or [ start? : end? ] after an atom
+        while self.cur_tok.type == Constants.TT_LBRACKET:
+            self.advance()
+
+            start_node = None
+            end_node = None
+            is_slice = False
+
+            if self.cur_tok.type != Constants.TT_COLON:
+                start_node = self.value_expr()
+
+            if self.cur_tok.type == Constants.TT_COLON:
+                is_slice = True
+
+                self.advance()
+
+                if self.cur_tok.type != Constants.TT_RBRACKET:
+                    end_node = self.value_expr()
+
+            if self.cur_tok.type != Constants.TT_RBRACKET:
+                raise SyntaxError( "Expected ']'", self.cur_tok )
+
+            head = IndexNode( head, start_node, end_node, is_slice, self.cur_tok )
+
+            self.advance()
+
+        return head
         
     def if_stmt( self, inside_func=False ):
         self.advance()
 
         if self.cur_tok.type != Constants.TT_LPAREN:
-            return None, SyntaxError( "Expected '('", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected '('", self.cur_tok )
         
         self.advance()
 
-        if_condition_node, error = self.value_expr()
-
-        if error: return None, error 
+        if_condition_node = self.value_expr()
 
         if self.cur_tok.type != Constants.TT_RPAREN:
-            return None, SyntaxError( "Expected ')'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected ')'", self.cur_tok )
         
         self.advance()
 
         if self.cur_tok.type != Constants.TT_LBRACE:
-            return None, SyntaxError( "Expected '{'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected '{'", self.cur_tok )
         
         self.advance()
 
         if_body_node_list = []
 
         while self.cur_tok.type != Constants.TT_RBRACE:
-            if_body_node, error = self.expr( inside_func )
-
-            if error: return None, error 
+            if_body_node = self.expr( inside_func )
 
             node_type = type( if_body_node ).__name__
 
@@ -412,7 +425,7 @@ class Parser:
 
             if semicolon_required:
                 if self.cur_tok.type != Constants.TT_SEMICOLON:
-                    return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                    raise SyntaxError( "Expected ';'", self.cur_tok )
                 
                 self.advance()
 
@@ -427,32 +440,28 @@ class Parser:
             self.advance()
 
             if self.cur_tok.type != Constants.TT_LPAREN:
-                return None, SyntaxError( "Expected '('", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                raise SyntaxError( "Expected '('", self.cur_tok )
         
             self.advance()
 
-            elif_cond_node, error = self.value_expr()
-
-            if error: return None, error 
+            elif_cond_node = self.value_expr()
 
             elif_cond_node_list.append( elif_cond_node )
 
             if self.cur_tok.type != Constants.TT_RPAREN:
-                return None, SyntaxError( "Expected ')'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                raise SyntaxError( "Expected ')'", self.cur_tok )
         
             self.advance()
 
             if self.cur_tok.type != Constants.TT_LBRACE:
-                return None, SyntaxError( "Expected '{'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                raise SyntaxError( "Expected '{'", self.cur_tok )
         
             self.advance()
 
             elif_body_node_list = []
 
             while self.cur_tok.type != Constants.TT_RBRACE:
-                elif_body_node, error = self.expr( inside_func )
-
-                if error: return None, error 
+                elif_body_node = self.expr( inside_func )
 
                 node_type = type( elif_body_node ).__name__
 
@@ -460,7 +469,7 @@ class Parser:
 
                 if semicolon_required:
                     if self.cur_tok.type != Constants.TT_SEMICOLON:
-                        return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                        raise SyntaxError( "Expected ';'", self.cur_tok )
                     
                     self.advance()
 
@@ -471,21 +480,19 @@ class Parser:
             elif_body_node_lists.append( elif_body_node_list )
 
         if self.cur_tok.value != 'else':
-            return None, SyntaxError( "Expected 'else'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected 'else'", self.cur_tok )
         
         self.advance()
 
         if self.cur_tok.type != Constants.TT_LBRACE:
-            return None, SyntaxError( "Expected '{'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected '{'", self.cur_tok )
 
         self.advance()
 
         else_body_node_list = []
 
         while self.cur_tok.type != Constants.TT_RBRACE:
-            else_body_node, error = self.expr( inside_func )
-
-            if error: return None, error 
+            else_body_node = self.expr( inside_func )
 
             node_type = type( else_body_node ).__name__
 
@@ -493,7 +500,7 @@ class Parser:
 
             if semicolon_required:
                 if self.cur_tok.type != Constants.TT_SEMICOLON:
-                    return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                    raise SyntaxError( "Expected ';'", self.cur_tok )
                 
                 self.advance()
 
@@ -501,7 +508,7 @@ class Parser:
         
         self.advance()
 
-        return IfNode( if_condition_node, if_body_node_list, elif_cond_node_list, elif_body_node_lists, else_body_node_list ), None
+        return IfNode( if_condition_node, if_body_node_list, elif_cond_node_list, elif_body_node_lists, else_body_node_list )
 
     def for_loop( self, inside_func=False ):
         init_node = None 
@@ -509,49 +516,41 @@ class Parser:
         self.advance()
 
         if self.cur_tok.type != Constants.TT_LPAREN:
-            return None, SyntaxError( "Expected '('", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected '('", self.cur_tok )
         
         self.advance()
 
         if self.cur_tok.type != Constants.TT_SEMICOLON:
-            init_node, error = self.expr()
-
-            if error: return None, error 
+            init_node = self.expr()
 
         if self.cur_tok.type != Constants.TT_SEMICOLON:
-            return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected ';'", self.cur_tok )
         
         self.advance()
 
-        cond_node, error = self.value_expr()
-
-        if error: return None, error 
+        cond_node = self.value_expr()
 
         if self.cur_tok.type != Constants.TT_SEMICOLON:
-            return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected ';'", self.cur_tok )
         
         self.advance()
 
-        update_node, error = self.expr()
-
-        if error: return None, error 
+        update_node = self.expr()
 
         if self.cur_tok.type != Constants.TT_RPAREN:
-            return None, SyntaxError( "Expected ')'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected ')'", self.cur_tok )
         
         self.advance()
 
         if self.cur_tok.type != Constants.TT_LBRACE:
-            return None, SyntaxError( "Expected '{'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected '{'", self.cur_tok )
         
         self.advance()
 
         body_node_list = []
 
         while self.cur_tok.type != Constants.TT_RBRACE:
-            head, error = self.expr( inside_func )
-
-            if error: return None, error 
+            head = self.expr( inside_func )
 
             node_type = type( head ).__name__
 
@@ -559,7 +558,7 @@ class Parser:
 
             if semicolon_required:
                 if self.cur_tok.type != Constants.TT_SEMICOLON:
-                    return None, SyntaxError( "Expected ';'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+                    raise SyntaxError( "Expected ';'", self.cur_tok )
                 
                 self.advance()
 
@@ -567,66 +566,135 @@ class Parser:
         
         self.advance()
 
-        return ForNode( init_node, cond_node, update_node, body_node_list ), None
+        return ForNode( init_node, cond_node, update_node, body_node_list )
+
+    def memo_def( self, memo_tok ):
+        # memo size ( args ) { body }, the 'memo' token is already consumed
+        if self.cur_tok.value < 1:
+            raise SyntaxError( "Memo size must be at least 1", self.cur_tok )
+
+        memo_size = self.cur_tok.value
+        self.advance()
+
+        if self.cur_tok.type != Constants.TT_LPAREN:
+            raise SyntaxError( "Expected '('", self.cur_tok )
+
+        # Memoized results are only valid if the body has no side effects, see print_stmt and input_stmt
+        self.memo_depth += 1
+
+        try:
+            head = self.atom()
+
+        finally:
+            self.memo_depth -= 1
+
+        if type( head ).__name__ != 'FunctionDefNode':
+            raise SyntaxError( "Expected function definition after 'memo'", memo_tok, head )
+
+        head.memo = True
+        head.memo_size = memo_size
+
+        return head
+
+    def memo_body( self, memo_tok, arg_nodes ):
+        # memo ( args ) { body }, parsed like a call to 'memo' up to the '{'
+        for node in arg_nodes:
+            if type( node ).__name__ != 'VarAccessNode':
+                raise SyntaxError( "Expected identifier", node )
+
+        lbrace_tok = self.cur_tok
+        func_body_nodes_list = []
+
+        self.advance()
+        self.memo_depth += 1
+
+        try:
+            while self.cur_tok.type != Constants.TT_RBRACE:
+                head = self.expr( True )
+
+                node_type = type( head ).__name__
+
+                semicolon_required = node_type not in [ "ForNode", "IfNode", "FunctionDefNode" ] and ( node_type != 'VarAssignNode' or type( head.var_value_node ).__name__ != 'FunctionDefNode' ) and ( node_type != 'ReturnNode' or type( head.node ).__name__ != 'FunctionDefNode' )
+
+                if semicolon_required:
+                    if self.cur_tok.type != Constants.TT_SEMICOLON:
+                        raise SyntaxError( "Expected ';'", self.cur_tok )
+
+                    self.advance()
+
+                func_body_nodes_list.append( head )
+
+        finally:
+            self.memo_depth -= 1
+
+        if len( func_body_nodes_list ) == 0:
+            raise SyntaxError( "Functions with empty bodies are not supported", lbrace_tok, self.cur_tok )
+
+        self.advance()
+
+        head = FunctionDefNode( [ node.var_name_token for node in arg_nodes ], func_body_nodes_list )
+        head.memo = True
+
+        return head
 
     def print_stmt( self ):
+        if self.memo_depth > 0:
+            raise SyntaxError( "Memoized functions cannot use print", self.cur_tok )
+
         self.advance()
 
         if self.cur_tok.type != Constants.TT_LPAREN:
-            return None, SyntaxError( "Expected '('", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected '('", self.cur_tok )
         
         self.advance()
 
-        head, error = self.value_expr()
-
-        if error: return None, error 
+        head = self.value_expr()
 
         if self.cur_tok.type != Constants.TT_RPAREN:
-            return None, SyntaxError( "Expected ')'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected ')'", self.cur_tok )
         
         self.advance()
 
-        return PrintNode( head ), None
+        return PrintNode( head )
     
     def input_stmt( self ):
+        if self.memo_depth > 0:
+            raise SyntaxError( f"Memoized functions cannot use {self.cur_tok.value}", self.cur_tok )
+
         inp_type = 'str' if self.cur_tok.value == 'input_str' else 'num'
         self.advance()
 
         if self.cur_tok.type != Constants.TT_LPAREN:
-            return None, SyntaxError( "Expected '('", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected '('", self.cur_tok )
         
         self.advance()
 
         if self.cur_tok.type == Constants.TT_RPAREN:
             self.advance()
-            return InputNode( None, inp_type ), None
-
-        head, error = self.value_expr()
+            return InputNode( None, inp_type )
 
-        if error: return None, error 
+        head = self.value_expr()
 
         if self.cur_tok.type != Constants.TT_RPAREN:
-            return None, SyntaxError( "Expected ')'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected ')'", self.cur_tok )
         
         self.advance()
 
-        return InputNode( head, inp_type ), None
+        return InputNode( head, inp_type )
     
     def stringify_stmt( self ): 
         self.advance()
 
         if self.cur_tok.type != Constants.TT_LPAREN:
-            return None, SyntaxError( "Expected '('", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected '('", self.cur_tok )
         
         self.advance()
 
-        head, error = self.value_expr()
-
-        if error: return None, error 
+        head = self.value_expr()
 
         if self.cur_tok.type != Constants.TT_RPAREN:
-            return None, SyntaxError( "Expected ')'", self.cur_tok.start_pos, self.cur_tok.end_pos )
+            raise SyntaxError( "Expected ')'", self.cur_tok )
         
         self.advance()
 
-        return StringifyNode( head ), None
+        return StringifyNode( head )
@@ -0,0 +1,201 @@
+import time
+
+from cicinlang.interpreter import Interpreter
+from cicinlang.nodes import IfNode, ReturnNode
+from cicinlang.values import NONE, UNSET, DEFAULT_MEMO_SIZE
+
+MODULE = '<module>'  # Frame name of code outside of any function
+
+
+class FunctionStats:
+    def __init__( self, name ):
+        self.name = name  # Name the function was called by, the name of its Context
+        self.line = None  # Line of the first statement of its body
+        self.calls = 0
+        self.active = 0  # Calls currently running, more than one while it recurses
+        self.inclusive = 0.0  # Seconds spent in the function and everything it called
+        self.exclusive = 0.0  # Seconds spent in the function itself
+
+    def label( self ):
+        return self.name if self.line == None else f'{self.name} (line {self.line})'
+
+
+class Profile:
+    # Statistics collected by a ProfilingInterpreter. One Profile can be shared by several
+    # interpreters, so a program run statement by statement still gives a single profile.
+    def __init__( self ):
+        self.functions = {}  # Function name -> FunctionStats
+        self.lines = {}  # Line number -> number of statements run on that line
+        self.stacks = {}  # 'outer;...;inner' -> seconds spent in inner with that call stack
+        self.source = None  # Source of the profiled program, to show the text of hot lines
+        self.total = 0.0
+
+    def stats( self, name ):
+        stats = self.functions.get( name )
+
+        if stats == None:
+            stats = self.functions[name] = FunctionStats( name )
+
+        return stats
+
+    def report( self, sort='exclusive', limit=20 ):
+        # Functions sorted by the given column, then the lines run most often
+        functions = sorted( self.functions.values(), key=lambda stats: getattr( stats, sort ), reverse=True )
+
+        res = [ f'Total time: {self.total:.6f}s', '' ]
+        res.append( f'{"calls":>10} {"inclusive":>12} {"exclusive":>12} {"per call":>12}  function' )
+
+        for stats in functions:
+            per_call = stats.inclusive / stats.calls if stats.calls > 0 else 0.0
+            res.append( f'{stats.calls:>10} {stats.inclusive:>12.6f} {stats.exclusive:>12.6f} {per_call:>12.6f}  {stats.label()}' )
+
+        res += [ '', f'{"hits":>10}  line' ]
+
+        lines = sorted( self.lines.items(), key=lambda item: ( -item[1], item[0] ) )
+
+        for line, hits in lines[:limit]:
+            res.append( f'{hits:>10}  {line:>5}: {self.line_text( line )}' )
+
+        return '\n'.join( res )
+
+    def line_text( self, line ):
+        if self.source == None: return ''
+
+        if self.source.line_starts == None:
+            self.source.line_col( 0 )
+
+        starts = self.source.line_starts
+        end = starts[line] - 1 if line < len( starts ) else len( self.source.text )
+
+        return self.source.text[starts[line - 1]:end].strip()
+
+    def collapsed( self ):
+        # One 'frame;frame;frame microseconds' line per call stack, the format flamegraph.pl and speedscope read
+        return ''.join( f'{stack} {round( seconds * 1e6 )}\n' for stack, seconds in sorted( self.stacks.items() ) )
+
+    def write_collapsed( self, path ):
+        with open( path, 'w' ) as f:
+            f.write( self.collapsed() )
+
+
+class ProfilingInterpreter( Interpreter ):
+    # Tree-walking interpreter that times every Cicinlang function call and counts the
+    # statements run on every line. Only the tree engine can be profiled.
+    def __init__( self, memo_size=DEFAULT_MEMO_SIZE, output=None, inputs=None, profile=None, budget=None ):
+        super().__init__( memo_size, output, inputs, budget )
+
+        self.profile = profile if profile != None else Profile()
+        self.frames = []  # [ stack, FunctionStats, start, time spent in calls ] of every running frame
+        self.lines = {}  # Node -> line number, positions are only looked up once per node
+
+    def interpret( self, ast_list, context ):
+        if len( self.frames ) > 0: return self.statements( ast_list, context )
+
+        # Top-level statements run in the module frame
+        self.enter( MODULE, None )
+
+        try:
+            return self.statements( ast_list, context )
+
+        finally:
+            self.profile.total += self.leave()
+
+    def statements( self, ast_list, context ):
+        for ast in ast_list:
+            self.hit( ast )
+            self.visit( ast, context )
+
+        return NONE
+
+    def call( self, func, child_context ):
+        stats = self.profile.stats( child_context.name )
+
+        if stats.line == None and len( func.nodes ) > 0:
+            stats.line = self.line( func.nodes[0] )
+
+        stats.active += 1
+        self.enter( stats.name, stats )
+
+        try:
+            return super().call( func, child_context )
+
+        finally:
+            elapsed = self.leave()
+
+            stats.calls += 1
+            stats.active -= 1
+
+            # Recursive calls are already covered by the outermost call's inclusive time
+            if stats.active == 0: stats.inclusive += elapsed
+
+    def body( self, node_list, context ):
+        # Same as Interpreter.body, with every statement counted
+        for node in node_list:
+            self.hit( node )
+            node_type = type( node )
+
+            if node_type is ReturnNode:
+                return self.visit( node.node, context )
+
+            if node_type is IfNode:
+                branch = self.branch( node, context )
+
+                if len( branch ) == 1 and type( branch[0] ) is ReturnNode:
+                    self.hit( branch[0] )
+                    return self.visit( branch[0].node, context )
+
+                res = self.body( branch, context )
+
+                if res is not UNSET: return res
+
+            else:
+                self.visit( node, context )
+
+        return UNSET
+
+    def enter( self, name, stats ):
+        stack = f'{self.frames[-1][0]};{name}' if len( self.frames ) > 0 else name
+        self.frames.append( [ stack, stats, time.perf_counter(), 0.0 ] )
+
+    def leave( self ):
+        # Closes the innermost frame and returns its inclusive time
+        stack, stats, start, in_calls = self.frames.pop()
+        elapsed = time.perf_counter() - start
+        exclusive = elapsed - in_calls
+
+        stacks = self.profile.stacks
+        stacks[stack] = stacks.get( stack, 0.0 ) + exclusive
+
+        if stats != None: stats.exclusive += exclusive
+
+        if len( self.frames ) > 0:
+            self.frames[-1][3] += elapsed
+
+        return elapsed
+
+    def hit( self, node ):
+        line = self.line( node )
+
+        if line != None:
+            lines = self.profile.lines
+            lines[line] = lines.get( line, 0 ) + 1
+
+    def line( self, node ):
+        line = self.lines.get( node, UNSET )
+
+        if line is UNSET:
+            source = getattr( node, 'source', None )
+            start = getattr( node, 'start', None )
+
+            if source == None or start == None:
+                line = None
+
+            else:
+                line = source.line_col( start )[0] + 1
+
+                if self.profile.source == None:
+                    self.profile.source = source
+
+            self.lines[node] = line
+
+        return line
@@ -0,0 +1,321 @@
+from cicinlang.utils import Constants
+from cicinlang.values import COUNTER_COMPARISONS
+
+# Status of a 'var' declaration inside a function, worked out from the statements before it
+DECL_FRESH = 'FRESH'  # The slot is certainly unset, the declaration needs no check
+DECL_MAYBE = 'MAYBE'  # The slot may already be set, e.g. inside a loop, so it is checked at runtime
+DECL_TWICE = 'TWICE'  # The slot is certainly set, the declaration always raises when it is reached
+
+
+class Layout:
+    # Frame layout of a function: the number of slots a call needs and the slot of every parameter
+    def __init__( self, size, param_slots ):
+        self.size = size
+        self.param_slots = param_slots
+
+    def __repr__( self ):
+        return f'<Layout {self.size} slots, params at {self.param_slots}>'
+
+
+class Scope:
+    def __init__( self, parent, params, declared, parent_definite ):
+        self.parent = parent
+        self.slots = {}
+
+        for name in params + sorted( declared ):
+            if name not in self.slots:
+                self.slots[name] = len( self.slots )
+
+        self.param_slots = tuple( self.slots[name] for name in params )
+
+        # Names whose slot is certainly set / possibly set at the point the walk has reached
+        self.definite = set( params )
+        self.maybe = set( params )
+
+        # Names of the parent scope that were certainly set when this function was defined.
+        # They stay set, so they are also set whenever the function is called.
+        self.parent_definite = parent_definite
+
+
+class Resolver:
+    '''
+    Gives every variable of a function a fixed slot in its call frame and works out,
+    for each reference, which frames it can be found in. Globals stay in the symbol
+    table of the module context because they outlive a single run.
+
+    A 'var' only declares the name once it is executed, so until then reads fall
+    through to enclosing scopes. The resolver follows which slots are certainly or
+    possibly set along the way, so that most references resolve to one slot and
+    only the uncertain ones are checked at runtime.
+
+    Annotations added to the nodes:
+        FunctionDefNode.layout
+        ForNode.counter, see loop_counter
+        VarAccessNode / FunctionCallNode / VarAssignNode( AT_OLD ).addr and .slot
+        VarAssignNode( AT_NEW ).decl_slot and .decl_status
+    addr is a tuple of ( hops, slot ) pairs to try in order before the globals.
+    slot is set when the name is certainly in a slot of the current frame.
+    '''
+
+    def resolve( self, ast_list ):
+        self.scope = None
+
+        for node in ast_list:
+            self.visit( node )
+
+        return ast_list
+
+    def resolve_function( self, func ):
+        # Functions made by the Python engine are never resolved, their body is resolved on first call
+        self.scope = None
+        func.layout = self.function( [ tok.value for tok in func.args ], func.nodes )
+
+        return func.layout
+
+    def block( self, node_list ):
+        for node in node_list:
+            self.visit( node )
+
+    def visit( self, node ):
+        node_type = type( node ).__name__
+
+        if node_type == 'BinOpNode':
+            self.visit( node.left_node )
+            self.visit( node.right_node )
+
+        elif node_type == 'VarAccessNode':
+            node.addr, node.slot = self.address( node.var_name_token.value )
+
+        elif node_type == 'VarAssignNode':
+            self.visit( node.var_value_node )
+
+            name = node.var_name_token.value
+
+            if node.assign_type == Constants.AT_OLD:
+                node.addr, node.slot = self.address( name )
+
+            elif self.scope == None:
+                node.decl_slot = None
+                node.decl_status = None
+
+            else:
+                scope = self.scope
+                node.decl_slot = scope.slots[name]
+
+                if name in scope.definite: node.decl_status = DECL_TWICE
+
+                elif name in scope.maybe: node.decl_status = DECL_MAYBE
+
+                else: node.decl_status = DECL_FRESH
+
+                scope.definite.add( name )
+                scope.maybe.add( name )
+
+        elif node_type == 'IfNode':
+            conds = [ node.if_condition_node ] + node.elif_condition_node_list
+            bodies = [ node.if_body_node_list ] + node.elif_body_node_lists
+            states = []
+
+            for cond, body in zip( conds, bodies ):
+                # A condition is only evaluated when all the ones before it were false
+                self.visit( cond )
+                after_cond = self.state()
+
+                self.block( body )
+                states.append( self.state() )
+                self.set_state( after_cond )
+
+            self.block( node.else_body_node_list )
+            states.append( self.state() )
+
+            self.merge( states )
+
+        elif node_type == 'ForNode':
+            self.visit( node.init_node )
+
+            if self.scope != None:
+                # From the second iteration on, anything the loop declares may already be set
+                declared = set()
+
+                for child in [ node.cond_node, node.update_node ] + node.body_node_list:
+                    collect_declarations( child, declared )
+
+                self.scope.maybe |= declared
+
+            self.visit( node.cond_node )
+
+            # The loop is left right after a condition, where only the first evaluation is certain to have happened
+            after_cond = self.state()
+
+            self.block( node.body_node_list )
+            self.visit( node.update_node )
+
+            self.set_state( after_cond )
+
+            node.counter = loop_counter( node )
+
+        elif node_type == 'FunctionDefNode':
+            params = [ tok.value for tok in node.func_arg_toks_list ]
+            node.layout = self.function( params, node.func_body_nodes_list )
+
+        elif node_type == 'FunctionCallNode':
+            node.addr, node.slot = self.address( node.func_name_tok.value )
+
+            for arg_node in node.func_arg_nodes_list:
+                self.visit( arg_node )
+
+        elif node_type == 'ArrayNode':
+            self.block( node.element_nodes )
+
+        elif node_type == 'IndexNode':
+            self.visit( node.node )
+            self.visit( node.start_node )
+            self.visit( node.end_node )
+
+        elif node_type in [ 'UnOpNode', 'ReturnNode', 'PrintNode', 'StringifyNode', 'InputNode' ]:
+            self.visit( node.node )
+
+    def function( self, params, body ):
+        declared = set()
+
+        for child in body:
+            collect_declarations( child, declared )
+
+        parent_definite = frozenset( self.scope.definite ) if self.scope != None else frozenset()
+        outer = self.scope
+
+        self.scope = Scope( outer, params, declared, parent_definite )
+        self.block( body )
+
+        layout = Layout( len( self.scope.slots ), self.scope.param_slots )
+        self.scope = outer
+
+        return layout
+
+    def address( self, name ):
+        addr = []
+        scope = self.scope
+        definite = scope.definite if scope != None else None
+        hops = 0
+
+        while scope != None:
+            slot = scope.slots.get( name )
+
+            if slot != None:
+                if name in definite:
+                    addr.append( ( hops, slot ) )
+
+                    return tuple( addr ), slot if hops == 0 and len( addr ) == 1 else None
+
+                # In the current frame a slot that was never set on any path so far can be skipped
+                if hops > 0 or name in scope.maybe:
+                    addr.append( ( hops, slot ) )
+
+            definite = scope.parent_definite
+            scope = scope.parent
+            hops += 1
+
+        return tuple( addr ), None
+
+    def state( self ):
+        if self.scope == None: return None
+
+        return ( set( self.scope.definite ), set( self.scope.maybe ) )
+
+    def set_state( self, state ):
+        if self.scope == None: return
+
+        self.scope.definite = set( state[0] )
+        self.scope.maybe = set( state[1] )
+
+    def merge( self, states ):
+        # After a branch, a name is certainly set only if every path set it
+        if self.scope == None: return
+
+        self.scope.definite = set.intersection( *[ state[0] for state in states ] )
+        self.scope.maybe = set.union( *[ state[1] for state in states ] )
+
+
+def loop_counter( node ):
+    # ( slot, name, step ) of a counted loop such as 'for ( var i = 0; i < n; i = i + 1 )', None for
+    # any other loop. The initializer sets the counter, the condition compares it with a Number or a
+    # variable and the update adds or subtracts an integer literal. slot is None for a global counter.
+    # Engines run these loops on the counter's slot directly instead of visiting the condition and the
+    # update. The body may still change the counter, it is read again every iteration.
+    init, cond, update = node.init_node, node.cond_node, node.update_node
+
+    if type( init ).__name__ != 'VarAssignNode' or type( cond ).__name__ != 'BinOpNode' or type( update ).__name__ != 'VarAssignNode':
+        return None
+
+    name = init.var_name_token.value
+    value = update.var_value_node
+
+    if cond.tok.type not in COUNTER_COMPARISONS or not is_access( cond.left_node, name ) or type( cond.right_node ).__name__ not in [ 'NumberNode', 'VarAccessNode' ]:
+        return None
+
+    if update.assign_type != Constants.AT_OLD or update.var_name_token.value != name or type( value ).__name__ != 'BinOpNode':
+        return None
+
+    if value.tok.type not in [ Constants.TT_PLUS, Constants.TT_MINUS ] or not is_access( value.left_node, name ) or type( value.right_node ).__name__ != 'NumberNode' or type( value.right_node.tok.value ) is not int:
+        return None
+
+    # The counter is set, read and updated in one place: the same slot of the frame, or the globals
+    slot = init.decl_slot if init.assign_type == Constants.AT_NEW else init.slot
+
+    if init.assign_type == Constants.AT_OLD and slot == None and init.addr != ():
+        return None
+
+    for ref in [ cond.left_node, update, value.left_node ]:
+        if ref.slot != slot or ( slot == None and ref.addr != () ):
+            return None
+
+    step = value.right_node.tok.value
+
+    return ( slot, name, step if value.tok.type == Constants.TT_PLUS else -step )
+
+def is_access( node, name ):
+    return type( node ).__name__ == 'VarAccessNode' and node.var_name_token.value == name
+
+def collect_declarations( node, declared ):
+    # Names declared with 'var' in a function body, not looking into nested functions
+    node_type = type( node ).__name__
+
+    if node_type in [ 'NoneType', 'FunctionDefNode', 'NumberNode', 'StringNode', 'VarAccessNode' ]:
+        return
+
+    if node_type == 'VarAssignNode':
+        if node.assign_type == Constants.AT_NEW:
+            declared.add( node.var_name_token.value )
+
+        collect_declarations( node.var_value_node, declared )
+
+    elif node_type == 'BinOpNode':
+        collect_declarations( node.left_node, declared )
+        collect_declarations( node.right_node, declared )
+
+    elif node_type == 'IfNode':
+        for child in [ node.if_condition_node ] + node.if_body_node_list + node.elif_condition_node_list + node.else_body_node_list:
+            collect_declarations( child, declared )
+
+        for body in node.elif_body_node_lists:
+            for child in body:
+                collect_declarations( child, declared )
+
+    elif node_type == 'ForNode':
+        for child in [ node.init_node, node.cond_node, node.update_node ] + node.body_node_list:
+            collect_declarations( child, declared )
+
+    elif node_type == 'FunctionCallNode':
+        for child in node.func_arg_nodes_list:
+            collect_declarations( child, declared )
+
+    elif node_type == 'ArrayNode':
+        for child in node.element_nodes:
+            collect_declarations( child, declared )
+
+    elif node_type == 'IndexNode':
+        for child in [ node.node, node.start_node, node.end_node ]:
+            collect_declarations( child, declared )
+
+    elif node_type in [ 'UnOpNode', 'ReturnNode', 'PrintNode', 'InputNode', 'StringifyNode' ]:
+        collect_declarations( node.node, declared )
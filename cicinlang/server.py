@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+
+# 'cicinlang serve': a daemon that runs Cicinlang programs for clients on a Unix socket, so the
+# cost of starting Python and importing the interpreter is paid once instead of per script.
+#
+# A client sends one request per connection, a JSON object on one line:
+#
+#   { "source": "...", or "path": "...",   the program, or a file the server reads it from
+#     "name": "<stdin>",                    file name in error positions ( default: the path or <stdin> )
+#     "stdin": "...",                       lines read by input_str and input_num
+#     "engine": "tree", "optimize": false, "memo_size": 128, "unbuffered": false,
+#     "limits": { "max_steps": ..., "timeout": ..., "max_depth": ..., "max_int_bits": ..., "max_str_len": ... } }
+#
+# and reads JSON lines back: { "output": "..." } as the program prints, { "error": "..." } if it
+# fails, and last { "status": 0 }, 1 when the program failed and 2 for a bad request.
+#
+# The listening socket is opened before a fixed number of worker processes are forked from the
+# fully imported server, and each worker accepts connections from it in turn. Every request runs
+# with fresh globals. Workers keep the compiled programs of recent sources in an LRU cache.
+
+import io
+import os
+import sys
+import json
+import stat
+import signal
+import socket
+import hashlib
+import argparse
+from collections import OrderedDict
+
+from cicinlang.cicinlang import Program, Session, ENGINES
+from cicinlang.client import default_socket_path, private_dir, LIMITS
+from cicinlang.streams import StreamSink, StreamInput
+from cicinlang.values import DEFAULT_MEMO_SIZE
+from cicinlang.budget import Budget
+from cicinlang import errors
+
+DEFAULT_CACHE_ENTRIES = 256
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+
+class BadRequest( ValueError ):
+    pass
+
+
+class ProgramLRU:
+    # Compiled programs keyed by a hash of their source and how they were compiled, including the
+    # size caps constants were folded within. When more than max_entries are held, the least
+    # recently used one is dropped.
+    def __init__( self, max_entries=DEFAULT_CACHE_ENTRIES ):
+        self.max_entries = max_entries
+        self.programs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__( self ):
+        return f'program cache: {len( self.programs )} programs, {self.hits} hits, {self.misses} misses'
+
+    def get( self, fn, ftext, engine, optimize, caps=( None, None ) ):
+        # Raises the lexing and syntax errors of the program, programs with errors are not kept
+        digest = hashlib.sha256()
+
+        for part in ( fn, ftext ):
+            digest.update( part.encode( 'utf-8', 'surrogatepass' ) )
+            digest.update( b'\0' )
+
+        key = ( digest.hexdigest(), engine, optimize, caps )
+        program = self.programs.get( key )
+
+        if program != None:
+            self.hits += 1
+            self.programs.move_to_end( key )
+            return program
+
+        self.misses += 1
+        program = self.programs[key] = Program( fn, ftext, engine, optimize )
+
+        if len( self.programs ) > self.max_entries:
+            self.programs.popitem( last=False )
+
+        return program
+
+
+class MessageStream:
+    # Text stream that sends everything written to it as output messages
+    def __init__( self, conn ):
+        self.conn = conn
+
+    def write( self, text ):
+        if text != '': send( self.conn, { 'output': text } )
+
+    def flush( self ):
+        pass
+
+
+def send( conn, message ):
+    conn.sendall( json.dumps( message ).encode( 'utf-8' ) + b'\n' )
+
+def read_request( conn ):
+    line = conn.makefile( 'rb' ).readline( MAX_REQUEST_SIZE + 1 )
+
+    if len( line ) > MAX_REQUEST_SIZE or not line.endswith( b'\n' ):
+        raise BadRequest( 'Request is too long or not terminated by a newline' )
+
+    try:
+        request = json.loads( line )
+
+    except ValueError:
+        raise BadRequest( 'Request is not valid JSON' )
+
+    if type( request ) is not dict:
+        raise BadRequest( 'Request is not a JSON object' )
+
+    return request
+
+def option( request, name, types, default ):
+    value = request.get( name, default )
+
+    if value is not default and type( value ) not in types:
+        raise BadRequest( f"'{name}' has the wrong type" )
+
+    return value
+
+def make_budget( request ):
+    limits = option( request, 'limits', ( dict, ), {} )
+
+    for name, value in limits.items():
+        if name not in LIMITS: raise BadRequest( f"Unknown limit '{name}'" )
+
+        if type( value ) not in ( int, float ) or ( name != 'timeout' and type( value ) is not int ):
+            raise BadRequest( f"Limit '{name}' has the wrong type" )
+
+    return Budget( **limits ) if len( limits ) > 0 else None
+
+def handle( conn, programs ):
+    # Runs one request and sends back its output and result
+    try:
+        request = read_request( conn )
+
+        engine = option( request, 'engine', ( str, ), 'tree' )
+        optimize = option( request, 'optimize', ( bool, ), False )
+        memo_size = option( request, 'memo_size', ( int, ), DEFAULT_MEMO_SIZE )
+        unbuffered = option( request, 'unbuffered', ( bool, ), False )
+        stdin = option( request, 'stdin', ( str, ), '' )
+        source = option( request, 'source', ( str, ), None )
+        path = option( request, 'path', ( str, ), None )
+        budget = make_budget( request )
+
+        if engine not in ENGINES: raise BadRequest( f"Unknown engine '{engine}'" )
+
+        if ( source == None ) == ( path == None ): raise BadRequest( "Give either 'source' or 'path'" )
+
+        fn = option( request, 'name', ( str, ), path if path != None else '<stdin>' )
+
+    except BadRequest as x:
+        send( conn, { 'error': f'Bad request: {x}' } )
+        send( conn, { 'status': 2 } )
+        return
+
+    if path != None:
+        try:
+            with open( path, "r" ) as f:
+                source = f.read()
+
+        except IOError as x:
+            send( conn, { 'error': f"Error: Cannot open {x.filename}: {x.strerror}" } )
+            send( conn, { 'status': 1 } )
+            return
+
+    output = StreamSink( MessageStream( conn ), buffer_size=0 if unbuffered else 4096 )
+
+    try:
+        caps = ( budget.max_int_bits, budget.max_str_len ) if budget != None else ( None, None )
+        program = programs.get( fn, source, engine, optimize, caps )
+
+    except errors.Exception as x:
+        error = x
+
+    else:
+        _, error = program.run( Session(), memo_size, output, StreamInput( io.StringIO( stdin ) ), None, budget )
+
+    if error != None: send( conn, { 'error': str( error ) } )
+
+    send( conn, { 'status': 1 if error != None else 0 } )
+
+def serve_connections( listener, programs ):
+    # Loop of a worker process. A client that goes away only ends its own request.
+    while True:
+        conn, _ = listener.accept()
+
+        with conn:
+            try:
+                handle( conn, programs )
+
+            except OSError:
+                pass
+
+            except Exception:
+                try:
+                    send( conn, { 'error': 'Unknown Error. Please try again.' } )
+                    send( conn, { 'status': 1 } )
+
+                except OSError:
+                    pass
+
+
+class Server:
+    def __init__( self, socket_path=None, workers=None, cache_entries=DEFAULT_CACHE_ENTRIES ):
+        self.socket_path = socket_path if socket_path != None else default_socket_path()
+        self.workers = workers if workers != None else os.cpu_count() or 1
+        self.cache_entries = cache_entries
+        self.children = set()
+        self.listener = None
+
+    def listen( self ):
+        if os.path.dirname( self.socket_path ) == private_dir(): make_private_dir( private_dir() )
+
+        # A socket file left by a server that is gone is replaced, a live server is not
+        if os.path.lexists( self.socket_path ):
+            if os.lstat( self.socket_path ).st_uid != os.getuid():
+                raise OSError( f'{self.socket_path} belongs to another user' )
+
+            with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as probe:
+                try:
+                    probe.connect( self.socket_path )
+
+                except ( ConnectionRefusedError, FileNotFoundError ):
+                    os.unlink( self.socket_path )
+
+                else:
+                    raise OSError( f'A server is already listening on {self.socket_path}' )
+
+        # Only the user who started the server may run programs in it. The umask keeps the socket
+        # private from the moment it is created.
+        self.listener = socket.socket( socket.AF_UNIX, socket.SOCK_STREAM )
+        umask = os.umask( 0o077 )
+
+        try:
+            self.listener.bind( self.socket_path )
+
+        finally:
+            os.umask( umask )
+
+        os.chmod( self.socket_path, 0o600 )
+        self.listener.listen( 128 )
+
+    def spawn( self ):
+        pid = os.fork()
+
+        if pid > 0:
+            self.children.add( pid )
+            return
+
+        # Worker process, it never returns into the caller
+        status = 0
+
+        try:
+            signal.signal( signal.SIGTERM, signal.SIG_DFL )
+            serve_connections( self.listener, ProgramLRU( self.cache_entries ) )
+
+        except KeyboardInterrupt:
+            pass
+
+        except BaseException:
+            status = 1
+
+        finally:
+            os._exit( status )
+
+    def serve( self ):
+        # Runs until SIGTERM or SIGINT. A worker that dies is replaced.
+        if self.listener == None: self.listen()
+
+        def stop( signum, frame ):
+            raise SystemExit( 0 )
+
+        signal.signal( signal.SIGTERM, stop )
+
+        try:
+            for _ in range( self.workers ):
+                self.spawn()
+
+            while True:
+                pid, _ = os.wait()
+
+                if pid in self.children:
+                    self.children.remove( pid )
+                    self.spawn()
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            self.shutdown()
+
+    def shutdown( self ):
+        for pid in self.children:
+            try:
+                os.kill( pid, signal.SIGTERM )
+                os.waitpid( pid, 0 )
+
+            except ( ProcessLookupError, ChildProcessError ):
+                pass
+
+        self.children.clear()
+        self.listener.close()
+
+        if os.path.exists( self.socket_path ): os.unlink( self.socket_path )
+
+def make_private_dir( path ):
+    # Directory only its owner can use. One that someone else made, or that others can enter,
+    # is refused, the socket in it would not be private.
+    try:
+        os.mkdir( path, 0o700 )
+
+    except FileExistsError:
+        pass
+
+    info = os.lstat( path )
+
+    if not stat.S_ISDIR( info.st_mode ) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise OSError( f'{path} is not a directory that only you can use' )
+
+def main( argv=None ):
+    arg_parser = argparse.ArgumentParser( prog='cicinlang serve', usage='cicinlang serve [--socket PATH] [--workers N] [--cache-entries N]' )
+    arg_parser.add_argument( '--socket', default=None, metavar='PATH', help='socket to listen on ( default: $CICINLANG_SOCKET or cicinlang-<uid>.sock in $XDG_RUNTIME_DIR or /tmp/cicinlang-<uid> )' )
+    arg_parser.add_argument( '--workers', type=int, default=None, metavar='N', help='worker processes, the most requests run at a time ( default: number of CPUs )' )
+    arg_parser.add_argument( '--cache-entries', type=int, default=DEFAULT_CACHE_ENTRIES, metavar='N', help=f'compiled programs kept by every worker ( default: {DEFAULT_CACHE_ENTRIES} )' )
+    args = arg_parser.parse_args( argv )
+
+    server = Server( args.socket, args.workers, args.cache_entries )
+
+    try:
+        server.listen()
+
+    except OSError as x:
+        print( f'Error: {x}', file=sys.stderr )
+        sys.exit( 1 )
+
+    print( f'cicinlang server listening on {server.socket_path} with {server.workers} workers', file=sys.stderr )
+
+    server.serve()
+
+if __name__ == '__main__':
+    main()
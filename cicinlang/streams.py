@@ -0,0 +1,172 @@
+import sys
+from abc import ABC, abstractmethod
+
+DEFAULT_BUFFER_SIZE = 64 * 1024  # Characters collected before a buffered sink writes them out
+
+
+class OutputSink( ABC ):
+    # Receives everything print statements write. Every engine writes whole lines, newline included.
+    @abstractmethod
+    def write( self, text ):
+        pass
+
+    def flush( self ):
+        pass
+
+    def close( self ):
+        self.flush()
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, *exc_info ):
+        self.close()
+
+
+class StreamSink( OutputSink ):
+    # Writes to a text stream in blocks. Text is collected until buffer_size characters are
+    # pending, so a loop printing a million lines makes a few hundred writes instead of a million.
+    # A buffer_size of 0 writes and flushes every line straight away, for interactive use.
+    def __init__( self, stream, buffer_size=DEFAULT_BUFFER_SIZE ):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.pending = []
+        self.size = 0
+
+    def target( self ):
+        return self.stream
+
+    def write( self, text ):
+        if self.buffer_size <= 0:
+            stream = self.target()
+            stream.write( text )
+            stream.flush()
+            return
+
+        self.pending.append( text )
+        self.size += len( text )
+
+        if self.size >= self.buffer_size:
+            self.target().write( ''.join( self.pending ) )
+            self.pending.clear()
+            self.size = 0
+
+    def flush( self ):
+        stream = self.target()
+
+        if len( self.pending ) > 0:
+            stream.write( ''.join( self.pending ) )
+            self.pending.clear()
+            self.size = 0
+
+        stream.flush()
+
+
+class StdoutSink( StreamSink ):
+    # sys.stdout is looked up whenever text is written, so later redirections of it are respected
+    def __init__( self, buffer_size=DEFAULT_BUFFER_SIZE ):
+        super().__init__( None, buffer_size )
+
+    def target( self ):
+        return sys.stdout
+
+
+class FileSink( StreamSink ):
+    def __init__( self, path, buffer_size=DEFAULT_BUFFER_SIZE, mode='w' ):
+        super().__init__( open( path, mode, encoding='utf-8' ), buffer_size )
+
+    def close( self ):
+        self.flush()
+        self.stream.close()
+
+
+class CaptureSink( OutputSink ):
+    # Keeps the output in memory, for programs embedding the interpreter
+    def __init__( self ):
+        self.parts = []
+
+    def write( self, text ):
+        self.parts.append( text )
+
+    def getvalue( self ):
+        return ''.join( self.parts )
+
+    def lines( self ):
+        return self.getvalue().splitlines()
+
+
+class InputSource( ABC ):
+    # Supplies the lines read by input_str and input_num. read_line returns one line without its
+    # newline, or None when the input has ended.
+    @abstractmethod
+    def read_line( self, prompt, output ):
+        pass
+
+    def close( self ):
+        pass
+
+
+class ConsoleInput( InputSource ):
+    # Interactive input through input(). Pending output is flushed so it shows before the prompt.
+    def read_line( self, prompt, output ):
+        output.flush()
+
+        try:
+            return input( prompt if prompt != None else '' )
+
+        except EOFError:
+            return None
+
+
+class StreamInput( InputSource ):
+    # Reads lines from a text stream through its buffer. Prompts are not shown, nobody is there to read them.
+    def __init__( self, stream ):
+        self.stream = stream
+
+    def read_line( self, prompt, output ):
+        line = self.stream.readline()
+
+        if line == '': return None
+
+        return line[:-1] if line[-1] == '\n' else line
+
+
+class FileInput( StreamInput ):
+    def __init__( self, path ):
+        super().__init__( open( path, 'r', encoding='utf-8' ) )
+
+    def close( self ):
+        self.stream.close()
+
+
+class IteratorInput( InputSource ):
+    # Lines supplied by the host program, any iterable of strings
+    def __init__( self, lines ):
+        self.lines = iter( lines )
+
+    def read_line( self, prompt, output ):
+        line = next( self.lines, None )
+
+        return str( line ) if line != None else None
+
+
+class StdinInput( InputSource ):
+    # Asks at the first read whether stdin is a terminal. Then it prompts like input() does,
+    # otherwise stdin is read in batch through StreamInput without prompts.
+    def __init__( self ):
+        self.source = None
+
+    def read_line( self, prompt, output ):
+        if self.source == None:
+            self.source = ConsoleInput() if sys.stdin.isatty() else StreamInput( sys.stdin )
+
+        return self.source.read_line( prompt, output )
+
+
+def make_input( inputs ):
+    # run() accepts an InputSource or any iterable of lines
+    if inputs == None: return StdinInput()
+
+    if isinstance( inputs, InputSource ): return inputs
+
+    return IteratorInput( inputs )
@@ -0,0 +1,645 @@
+import re
+
+from cicinlang.utils import Constants
+from cicinlang.errors import RuntimeException, NameNotFoundError
+from cicinlang.values import Function, NONE, NUMBER_TYPES, memo_state, UNSET, DEFAULT_MEMO_SIZE, bin_op, un_op, type_name, stringify, read_input, make_memo, memo_key, make_array, index_value, slice_value, builtin_callee, BUILTINS
+from cicinlang.resolver import collect_declarations
+from cicinlang.streams import StdoutSink, StdinInput
+from cicinlang.budget import Budget, UNLIMITED
+
+_U = UNSET
+_none = NONE
+
+
+# Runtime helpers called from the generated code. Nodes are passed along so
+# errors carry the same positions as the tree-walking interpreter reports.
+
+def _binop( left, right, node ):
+    return bin_op( left, node.tok, right, node )
+
+def _add( left, right, node ):
+    if type( left ) is int and type( right ) is int: return left + right
+
+    return _binop( left, right, node )
+
+def _sub( left, right, node ):
+    if type( left ) is int and type( right ) is int: return left - right
+
+    return _binop( left, right, node )
+
+def _mul( left, right, node ):
+    if type( left ) is int and type( right ) is int: return left * right
+
+    return _binop( left, right, node )
+
+def _lt( left, right, node ):
+    if type( left ) is int and type( right ) is int: return 1 if left < right else 0
+
+    return _binop( left, right, node )
+
+def _lte( left, right, node ):
+    if type( left ) is int and type( right ) is int: return 1 if left <= right else 0
+
+    return _binop( left, right, node )
+
+def _gt( left, right, node ):
+    if type( left ) is int and type( right ) is int: return 1 if left > right else 0
+
+    return _binop( left, right, node )
+
+def _gte( left, right, node ):
+    if type( left ) is int and type( right ) is int: return 1 if left >= right else 0
+
+    return _binop( left, right, node )
+
+def _ee( left, right, node ):
+    if type( left ) is int and type( right ) is int: return 1 if left == right else 0
+
+    return _binop( left, right, node )
+
+def _ne( left, right, node ):
+    if type( left ) is int and type( right ) is int: return 1 if left != right else 0
+
+    return _binop( left, right, node )
+
+def _unop( value, node ):
+    return un_op( node.tok, value, node )
+
+def _if_cond( value, node ):
+    if type( value ) not in NUMBER_TYPES:
+        raise RuntimeException( f"Condition value for if statement can only be Number, got {type_name( value )}", node )
+
+    return value == 1
+
+def _for_cond( value, node ):
+    if type( value ) not in NUMBER_TYPES:
+        raise RuntimeException( f"Output of condition statement in for loop should be number, got {type_name( value )}", node )
+
+    return value == 1
+
+def _print( value, node, output ):
+    if type( value ) is Function:
+        raise RuntimeException( "Cannot print functions", node.node )
+
+    if memo_state.active > 0:
+        raise RuntimeException( "Cannot print inside a memoized function", node.node )
+
+    output.write( f'{value}\n' )
+
+def _input( prompt, node, output, inputs ):
+    if prompt != None and type( prompt ) is Function:
+        raise RuntimeException( "Cannot print functions", node.node )
+
+    if memo_state.active > 0:
+        raise RuntimeException( "Cannot take input inside a memoized function", node.node if node.node != None else node )
+
+    return read_input( inputs, prompt, output, node.inp_type, node )
+
+def _decl( value, current, node ):
+    if current is not _U:
+        tok = node.var_name_token
+        raise NameNotFoundError( f"'{tok.value}' is already declared.", tok )
+
+    return value
+
+def _declg( table, name, value, node ):
+    if name in table:
+        tok = node.var_name_token
+        raise NameNotFoundError( f"'{name}' is already declared.", tok )
+
+    table[name] = value
+    return value
+
+def _setg( table, name, value, node ):
+    if name not in table:
+        tok = node.var_name_token
+        raise NameNotFoundError( f"'{name}' not found", tok )
+
+    table[name] = value
+    return value
+
+def _missing_var( node ):
+    tok = node.var_name_token
+    raise NameNotFoundError( f"'{tok.value}' not found", tok )
+
+def _missing_func( node ):
+    tok = node.func_name_tok
+    raise NameNotFoundError( f"{tok.value} not found", tok )
+
+def _builtin( node ):
+    # Called when no function is declared under the name of a builtin
+    builtin = builtin_callee( node.func_name_tok.value, node )
+
+    def call( value ):
+        return builtin( value, node )
+
+    return call
+
+def _array( values, node ):
+    return make_array( list( values ), node )
+
+def _mkfn( pyfunc, node, context, memo_size ):
+    func = Function( node.func_arg_toks_list, node.func_body_nodes_list, context )
+    func.memo = make_memo( node, memo_size )
+    func.pyfunc = pyfunc if func.memo == None else _memoize( pyfunc, func.memo )
+
+    return func
+
+def _memoize( pyfunc, cache ):
+    def call( *args ):
+        key = memo_key( args )
+        res = cache.get( key )
+
+        if res is not UNSET: return res
+
+        memo_state.active += 1
+
+        try:
+            res = pyfunc( *args )
+
+        finally:
+            memo_state.active -= 1
+
+        cache.put( key, res )
+
+        return res
+
+    return call
+
+def _callee( func, node, output, inputs ):
+    if type( func ) is not Function:
+        tok = node.func_name_tok
+        raise RuntimeException( f"Cannot invoke function call on type { type_name( func ) }", tok )
+
+    n_params = len( func.args )
+    n_args = len( node.func_arg_nodes_list )
+
+    if n_params != n_args:
+        raise RuntimeException( f"Expected {n_params} arguments, got {n_args}", node )
+
+    if func.pyfunc != None: return func.pyfunc
+
+    return _foreign( func, node, output, inputs )
+
+def _limited_callee( budget ):
+    # _callee counting every call as a step and keeping track of the call depth
+    def callee( func, node, output, inputs ):
+        pyfunc = _callee( func, node, output, inputs )
+
+        def call( *args ):
+            budget.ticks -= 1
+            budget.depth += 1
+
+            try:
+                if budget.ticks < 0 or budget.depth > budget.max_depth: budget.tick( node, budget.depth )
+
+                return pyfunc( *args )
+
+            finally:
+                budget.depth -= 1
+
+        return call
+
+    return callee
+
+def _checked_binop( budget ):
+    def binop( left, right, node ):
+        return budget.bin_op( left, node.tok, right, node )
+
+    return binop
+
+def _foreign( func, node, output, inputs ):
+    # Functions created by another engine in a shared context run through the interpreter
+    from cicinlang.interpreter import Interpreter
+
+    def call( *args ):
+        child_context = func.call_context( node.func_name_tok, args )
+
+        if func.memo != None:
+            return Interpreter( output=output, inputs=inputs ).call_memoized( func, child_context, args )
+
+        return Interpreter( output=output, inputs=inputs ).call( func, child_context )
+
+    return call
+
+
+CALL_PATTERN = re.compile( rb'_callee\( .*?, (_n\d+), _out, _in \)' )
+
+def deepest_call( tb, namespace ):
+    # Call node of the innermost generated frame that was calling a function. The columns of the
+    # instruction each frame was running give the call expression in the generated source.
+    node = None
+
+    while tb != None:
+        code = tb.tb_frame.f_code
+
+        if code.co_filename == '<cicinlang>':
+            line, _, start, end = list( code.co_positions() )[tb.tb_lasti // 2]
+            match = CALL_PATTERN.match( namespace['_source'][line - 1], start, end ) if line != None and start != None else None
+
+            if match: node = namespace[match.group( 1 ).decode()]
+
+        tb = tb.tb_next
+
+    return node
+
+
+HELPERS = {
+    '_U': _U, '_none': _none, '_binop': _binop, '_add': _add, '_sub': _sub, '_mul': _mul,
+    '_lt': _lt, '_lte': _lte, '_gt': _gt, '_gte': _gte, '_ee': _ee, '_ne': _ne, '_unop': _unop,
+    '_if_cond': _if_cond, '_for_cond': _for_cond, '_print': _print, '_input': _input, '_str': stringify,
+    '_decl': _decl, '_declg': _declg, '_setg': _setg, '_missing_var': _missing_var,
+    '_missing_func': _missing_func, '_mkfn': _mkfn, '_callee': _callee, '_builtin': _builtin,
+    '_array': _array, '_index': index_value, '_slice': slice_value,
+}
+
+BIN_HELPERS = {
+    Constants.TT_PLUS: '_add',
+    Constants.TT_MINUS: '_sub',
+    Constants.TT_MUL: '_mul',
+    Constants.TT_LT: '_lt',
+    Constants.TT_LTE: '_lte',
+    Constants.TT_GT: '_gt',
+    Constants.TT_GTE: '_gte',
+    Constants.TT_EE: '_ee',
+    Constants.TT_NE: '_ne',
+}
+
+
+class Scope:
+    def __init__( self, params, declared ):
+        self.params = params
+        self.declared = declared
+        self.nonlocals = set()
+
+
+class Transpiler:
+    '''
+    Turns a parsed program into Python source. Every Cicinlang function becomes a
+    nested Python function whose parameters and 'var' declarations are Python
+    locals, for loops become while loops and globals live in the symbol table of
+    the module context. Locals start out unset so reads fall back to enclosing
+    scopes, exactly like the symbol table chain of the interpreter.
+    '''
+
+    def __init__( self, memo_size=DEFAULT_MEMO_SIZE, output=None, inputs=None, budget=None ):
+        self.memo_size = memo_size  # Cache size of 'memo' functions that do not give one
+        self.output = output if output != None else StdoutSink( buffer_size=0 )  # OutputSink of print statements
+        self.inputs = inputs if inputs != None else StdinInput()  # InputSource of input_str and input_num
+        self.budget = budget if budget != None else Budget()  # Resource limits, none by default
+
+    def transpile( self, ast_list ):
+        self.namespace = dict( HELPERS )
+        self.const_names = {}
+        self.n_names = 0
+        self.scopes = []
+        self.buffers = [ [] ]
+        self.indent = 1
+
+        for node in ast_list:
+            self.statement( node )
+
+        self.line( 'return _none' )
+
+        source = 'def _main():\n' + '\n'.join( self.buffers[0] ) + '\n'
+        self.namespace['_source'] = source.encode().splitlines()  # Read back by deepest_call
+
+        return source, self.namespace
+
+    def run( self, ast_list, context ):
+        return self.execute( *self.compile( ast_list ), context )
+
+    def compile( self, ast_list ):
+        # Python code object of the program and the names it refers to. Both are only read
+        # by execute, so they can be reused for any number of runs.
+        try:
+            source, namespace = self.transpile( ast_list )
+
+            return compile( source, '<cicinlang>', 'exec' ), namespace
+
+        except ( RecursionError, MemoryError ):
+            # Programs nested too deeply for Python to transpile or compile run as bytecode on
+            # the VM, which gives the same results
+            from cicinlang.resolver import Resolver
+            from cicinlang.compiler import Compiler
+
+            Resolver().resolve( ast_list )
+
+            return Compiler().compile( ast_list ), None
+
+    def execute( self, code, namespace, context ):
+        if namespace == None:
+            from cicinlang.vm import VM
+
+            return VM( self.memo_size, self.output, self.inputs, self.budget ).run( code, context )
+
+        namespace = dict( namespace )
+
+        namespace['_G'] = context.symbol_table.table
+        namespace['_ctx'] = context
+        namespace['_memo_size'] = self.memo_size
+        namespace['_out'] = self.output
+        namespace['_in'] = self.inputs
+        namespace['_budget'] = self.budget
+
+        # Without limits the generated code runs exactly as before
+        if self.budget.counted or self.budget.max_depth != UNLIMITED:
+            namespace['_callee'] = _limited_callee( self.budget )
+
+        if self.budget.caps:
+            namespace['_add'] = namespace['_mul'] = namespace['_binop'] = _checked_binop( self.budget )
+
+        exec( code, namespace )
+
+        try:
+            return namespace['_main']()
+
+        except RecursionError as x:
+            # Python's stack ran out, reported like the tree engine does at the innermost call
+            raise RuntimeException( 'Maximum call depth exceeded', deepest_call( x.__traceback__, namespace ) ) from None
+
+    def line( self, text ):
+        self.buffers[-1].append( '    ' * self.indent + text )
+
+    def new_name( self, prefix ):
+        self.n_names += 1
+
+        return f'{prefix}{self.n_names}'
+
+    def ref( self, obj ):
+        name = self.new_name( '_n' )
+        self.namespace[name] = obj
+
+        return name
+
+    def const( self, value ):
+        key = ( type( value ), value )
+
+        if key not in self.const_names:
+            self.const_names[key] = self.ref( value )
+
+        return self.const_names[key]
+
+    def var( self, name, level ):
+        # Each function level has its own Python names, so an unset local never hides the
+        # variable of the same name in an enclosing function
+        return f'v{level}_{name}'
+
+    def block( self, node_list ):
+        if len( node_list ) == 0:
+            self.line( 'pass' )
+
+        for node in node_list:
+            self.statement( node )
+
+    def statement( self, node ):
+        node_type = type( node ).__name__
+
+        if node_type == 'IfNode': self.if_stmt( node )
+
+        elif node_type == 'ForNode': self.for_loop( node )
+
+        elif node_type == 'PrintNode':
+            self.line( f'_print( {self.expr( node.node )}, {self.ref( node )}, _out )' )
+
+        elif node_type == 'ReturnNode':
+            self.line( f'return {self.expr( node.node )}' )
+
+        elif node_type == 'NoneType':
+            pass
+
+        else:
+            self.line( self.expr( node ) )
+
+    def if_stmt( self, node ):
+        cond_ref = self.ref( node.if_condition_node )
+        conds = [ node.if_condition_node ] + node.elif_condition_node_list
+        bodies = [ node.if_body_node_list ] + node.elif_body_node_lists
+        depth = 0
+
+        for i, ( cond, body ) in enumerate( zip( conds, bodies ) ):
+            n_lines = len( self.buffers[-1] )
+            cond_code = self.expr( cond )
+
+            if i > 0 and len( self.buffers[-1] ) == n_lines:
+                self.line( f'elif _if_cond( {cond_code}, {cond_ref} ):' )
+
+            elif i > 0:
+                # The condition defined a function, which has to be emitted inside an else block
+                hoisted = self.buffers[-1][n_lines:]
+                del self.buffers[-1][n_lines:]
+
+                self.line( 'else:' )
+                self.buffers[-1].extend( '    ' + line for line in hoisted )
+                self.indent += 1
+                depth += 1
+                self.line( f'if _if_cond( {cond_code}, {cond_ref} ):' )
+
+            else:
+                self.line( f'if _if_cond( {cond_code}, {cond_ref} ):' )
+
+            self.indent += 1
+            self.block( body )
+            self.indent -= 1
+
+        if len( node.else_body_node_list ) > 0:
+            self.line( 'else:' )
+            self.indent += 1
+            self.block( node.else_body_node_list )
+            self.indent -= 1
+
+        self.indent -= depth
+
+    def for_loop( self, node ):
+        self.statement( node.init_node )
+
+        cond_code = self.expr( node.cond_node )
+        cond_ref = self.ref( node.cond_node )
+
+        self.line( f'while _for_cond( {cond_code}, {cond_ref} ):' )
+        self.indent += 1
+
+        if self.budget.counted:
+            self.line( '_budget.ticks -= 1' )
+            self.line( f'if _budget.ticks < 0: _budget.tick( {cond_ref} )' )
+
+        self.block( node.body_node_list )
+        self.statement( node.update_node )
+        self.indent -= 1
+
+    def read( self, name, missing, level=None ):
+        if level == None: level = len( self.scopes ) - 1
+
+        for j in range( level, -1, -1 ):
+            scope = self.scopes[j]
+            v = self.var( name, j )
+
+            if name in scope.params: return v
+
+            if name in scope.declared:
+                return f'( {v} if {v} is not _U else {self.read( name, missing, j - 1 )} )'
+
+        return f'( _G[{name!r}] if {name!r} in _G else {missing} )'
+
+    def assign( self, name, value, node_ref, level=None ):
+        if level == None: level = len( self.scopes ) - 1
+
+        for j in range( level, -1, -1 ):
+            scope = self.scopes[j]
+            v = self.var( name, j )
+
+            if name in scope.params or name in scope.declared:
+                if j != len( self.scopes ) - 1:
+                    self.scopes[-1].nonlocals.add( v )
+
+                if name in scope.params: return f'( {v} := {value} )'
+
+                return f'( ( {v} := {value} ) if {v} is not _U else {self.assign( name, value, node_ref, j - 1 )} )'
+
+        return f'_setg( _G, {name!r}, {value}, {node_ref} )'
+
+    def expr( self, node ):
+        node_type = type( node ).__name__
+
+        if node_type == 'NumberNode':
+            return self.const( node.tok.value )
+
+        elif node_type == 'StringNode':
+            return self.const( node.tok.value )
+
+        elif node_type == 'BinOpNode':
+            return self.bin_op_chain( node )
+
+        elif node_type == 'UnOpNode':
+            return f'_unop( {self.expr( node.node )}, {self.ref( node )} )'
+
+        elif node_type == 'VarAccessNode':
+            return self.read( node.var_name_token.value, f'_missing_var( {self.ref( node )} )' )
+
+        elif node_type == 'VarAssignNode':
+            name = node.var_name_token.value
+            value = self.expr( node.var_value_node )
+            node_ref = self.ref( node )
+
+            if node.assign_type == Constants.AT_NEW:
+                if len( self.scopes ) == 0:
+                    return f'_declg( _G, {name!r}, {value}, {node_ref} )'
+
+                v = self.var( name, len( self.scopes ) - 1 )
+                return f'( {v} := _decl( {value}, {v}, {node_ref} ) )'
+
+            if len( self.scopes ) == 0:
+                return f'_setg( _G, {name!r}, {value}, {node_ref} )'
+
+            temp = self.new_name( '_t' )
+
+            return f'( {temp} := {value}, {self.assign( name, temp, node_ref )} )[1]'
+
+        elif node_type == 'FunctionDefNode':
+            return f'_mkfn( {self.function_def( node )}, {self.ref( node )}, _ctx, _memo_size )'
+
+        elif node_type == 'FunctionCallNode':
+            node_ref = self.ref( node )
+            name = node.func_name_tok.value
+            args = ', '.join( self.expr( arg ) for arg in node.func_arg_nodes_list )
+
+            if name in BUILTINS:
+                temp = self.new_name( '_t' )
+                callee = self.read( name, 'None' )
+
+                return f'( _callee( {temp}, {node_ref}, _out, _in ) if ( {temp} := {callee} ) is not None else _builtin( {node_ref} ) )( {args} )'
+
+            callee = self.read( name, f'_missing_func( {node_ref} )' )
+
+            return f'_callee( {callee}, {node_ref}, _out, _in )( {args} )'
+
+        elif node_type == 'InputNode':
+            prompt = self.expr( node.node ) if node.node != None else 'None'
+
+            return f'_input( {prompt}, {self.ref( node )}, _out, _in )'
+
+        elif node_type == 'StringifyNode':
+            return f'_str( {self.expr( node.node )} )'
+
+        elif node_type == 'ArrayNode':
+            return f'_array( ( {"".join( self.expr( element_node ) + ", " for element_node in node.element_nodes )}), {self.ref( node )} )'
+
+        elif node_type == 'IndexNode':
+            value = self.expr( node.node )
+            start = self.expr( node.start_node ) if node.start_node != None else 'None'
+
+            if not node.is_slice:
+                return f'_index( {value}, {start}, {self.ref( node )} )'
+
+            end = self.expr( node.end_node ) if node.end_node != None else 'None'
+
+            return f'_slice( {value}, {start}, {end}, {self.ref( node )} )'
+
+    def bin_op_chain( self, node ):
+        # Nested operators such as 'a + b - c' or 'a ^ b ^ c' are evaluated step by step into
+        # temporaries. Nesting one helper call per operator would hit the limit of Python's parser.
+        if 'BinOpNode' not in [ type( node.left_node ).__name__, type( node.right_node ).__name__ ]:
+            helper = BIN_HELPERS.get( node.tok.type, '_binop' )
+
+            return f'{helper}( {self.expr( node.left_node )}, {self.expr( node.right_node )}, {self.ref( node )} )'
+
+        steps = []
+        self.bin_op_steps( node, steps )
+
+        return f'( {", ".join( steps )} )[-1]'
+
+    def bin_op_steps( self, node, steps ):
+        # Appends the steps of node in evaluation order and returns the name of its value
+        if type( node ).__name__ != 'BinOpNode': return self.expr( node )
+
+        left = self.bin_op_steps( node.left_node, steps )
+
+        if type( node.right_node ).__name__ == 'BinOpNode' and type( node.left_node ).__name__ not in [ 'BinOpNode', 'NumberNode', 'StringNode' ]:
+            # The left operand is evaluated before the steps of the right one, as in the other engines
+            temp = self.new_name( '_t' )
+            steps.append( f'{temp} := {left}' )
+            left = temp
+
+        right = self.bin_op_steps( node.right_node, steps )
+        helper = BIN_HELPERS.get( node.tok.type, '_binop' )
+        temp = self.new_name( '_t' )
+        steps.append( f'{temp} := {helper}( {left}, {right}, {self.ref( node )} )' )
+
+        return temp
+
+    def function_def( self, node ):
+        name = self.new_name( '_f' )
+        params = [ tok.value for tok in node.func_arg_toks_list ]
+        declared = set()
+
+        for body_node in node.func_body_nodes_list:
+            collect_declarations( body_node, declared )
+
+        scope = Scope( set( params ), declared )
+
+        level = len( self.scopes )
+        self.scopes.append( scope )
+        self.buffers.append( [] )
+        outer_indent = self.indent
+        self.indent = 1
+
+        self.block( node.func_body_nodes_list )
+        self.line( 'return _none' )
+
+        body = self.buffers.pop()
+        self.scopes.pop()
+        self.indent = outer_indent
+
+        self.line( f'def {name}( {", ".join( self.var( param, level ) for param in params )} ):' )
+
+        if len( scope.nonlocals ) > 0:
+            self.line( f'    nonlocal {", ".join( sorted( scope.nonlocals ) )}' )
+
+        unset = sorted( self.var( name, level ) for name in declared - scope.params )
+
+        if len( unset ) > 0:
+            self.line( f'    {" = ".join( unset )} = _U' )
+
+        self.buffers[-1].extend( '    ' * self.indent + line for line in body )
+
+        return name
@@ -1,3 +1,5 @@
+import re
+import bisect
 import string
 
 class Constants:
@@ -24,6 +26,8 @@ class Constants:
     TT_RPAREN = 'RPAREN'
     TT_LBRACE = 'LBRACE'
     TT_RBRACE = 'RBRACE'
+    TT_LBRACKET = 'LBRACKET'
+    TT_RBRACKET = 'RBRACKET'
     TT_EOF = 'EOF'
     TT_EQ = 'EQ'
     TT_EE = 'EE'
@@ -36,29 +40,88 @@ class Constants:
     TT_KEYWORD = 'KEYWORD'
     TT_SEMICOLON = 'SEMICOLON'
     TT_COMMA = 'COMMA'
+    TT_COLON = 'COLON'
 
 
 class Token:
-    def __init__( self, type_, value=None ):
+    __slots__ = ( 'type', 'value', 'source', 'start', 'end' )
+
+    def __init__( self, type_, value=None, source=None, start=None, end=None ):
         self.type = type_
         self.value = value 
+        self.source = source  # Source the offsets below point into
+        self.start = start 
+        self.end = end 
     
     def __repr__( self ):
         if self.value != None: return f'{self.type}:{self.value}'
         else: return f'{self.type}'
 
-    def set_pos( self, start_pos, end_pos=None ):
-        self.start_pos = start_pos 
+    @property
+    def start_pos( self ):
+        return self.source.position( self.start ) if self.source != None else None
+
+    @property
+    def end_pos( self ):
+        return self.source.position( self.end ) if self.source != None else None
+
+
+class Span:
+    # A region of a source file; tokens and nodes carry the same three attributes
+    __slots__ = ( 'source', 'start', 'end' )
+
+    def __init__( self, source, start, end ):
+        self.source = source 
+        self.start = start 
+        self.end = end 
+
+
+class Source:
+    def __init__( self, fn, text ):
+        self.fn = fn 
+        self.text = text 
+        self.line_starts = None 
+
+    def line_col( self, idx ):
+        # The line index is only built the first time a position is actually needed
+        if self.line_starts == None:
+            self.line_starts = [ 0 ] + [ m.end() for m in re.finditer( '\n', self.text ) ]
+
+        ln = bisect.bisect_right( self.line_starts, idx ) - 1
+
+        return ln, idx - self.line_starts[ln]
+
+    def position( self, idx ):
+        ln, coln = self.line_col( idx )
 
-        if end_pos == None:
-            pos = start_pos.copy()
-            pos.advance()
-            self.end_pos = pos 
+        return Position( self.fn, self.text, idx, ln, coln )
 
-        else: 
-            self.end_pos = end_pos 
-        
-        return self 
+
+class SourceSegment:
+    # Part of a Source starting at base, used by the incremental parser. Offsets of the tokens
+    # and nodes pointing into it are relative to base, so when an edit before the segment moves
+    # it, only base changes. Positions are looked up in the whole Source.
+    def __init__( self, source, base ):
+        self.source = source
+        self.base = base
+
+    @property
+    def fn( self ):
+        return self.source.fn
+
+    @property
+    def text( self ):
+        return self.source.text
+
+    @property
+    def line_starts( self ):
+        return self.source.line_starts
+
+    def line_col( self, idx ):
+        return self.source.line_col( self.base + idx )
+
+    def position( self, idx ):
+        return self.source.position( self.base + idx )
     
 
 class Position:
@@ -88,12 +151,17 @@ class Context:
     def __init__( self, name, parent=None, parent_entry_pos=None ):
         self.name = name 
         self.parent = parent 
-        self.parent_entry_pos = parent_entry_pos 
+        self.parent_entry_pos = parent_entry_pos  # Token of the call that created this context
         self.symbol_table = None 
+        self.slots = None  # Fixed-size variable storage of a function call, laid out by the resolver
+        self.globals = parent.globals if parent != None else None  # Table of the module context
     
     def set_symbol_table( self, symbol_table ):
         self.symbol_table = symbol_table
 
+        if self.parent == None:
+            self.globals = symbol_table.table
+
 
 class SymbolTable:
     def __init__( self, context ):
@@ -104,10 +172,22 @@ class SymbolTable:
         val = self.table.get( key, None )
 
         if val == None and self.context.parent != None:
-            return self.context.parent.table.get( key, None )
+            return self.context.parent.symbol_table.get_value( key )
 
         return val 
 
+    def find( self, key ):
+        # Returns the innermost symbol table that declares key
+        table = self
+
+        while table != None:
+            if key in table.table: return table
+
+            parent = table.context.parent
+            table = parent.symbol_table if parent != None else None
+
+        return None
+
     def set_value( self, key, value ):
         self.table[key] = value 
 
@@ -0,0 +1,472 @@
+import weakref
+import operator
+import threading
+from collections import OrderedDict
+
+from cicinlang.utils import Constants, Context
+from cicinlang.errors import RuntimeException
+
+DEFAULT_MEMO_SIZE = 1024
+
+class Function:
+    def __init__( self, args, nodes, context=None, code=None, layout=None ):
+        self.args = args
+        self.nodes = nodes
+        self.context = context  # Context the function was defined in
+        self.code = code  # Compiled body, only set by the VM engine
+        self.layout = layout  # Slots of its call frame, set by the resolver
+        self.memo = None  # MemoCache of a function defined with 'memo'
+        self.pyfunc = None  # Generated Python function, only set by the Python engine
+
+    def call_context( self, call_tok, args ):
+        # Call frame with the parameters in their slots and every other variable unset
+        context = Context( call_tok.value, self.context, call_tok )
+        slots = [ UNSET ] * self.layout.size
+
+        for slot, value in zip( self.layout.param_slots, args ):
+            slots[slot] = value
+
+        context.slots = slots
+
+        return context
+
+
+class ReturnSignal( BaseException ):
+    # Raised by a return statement of the tree-walking interpreter and caught by the call it returns from.
+    # It is not an Exception, so handlers for errors never catch it by accident.
+    def __init__( self, value ):
+        self.value = value
+
+
+class NoneValue:
+    # Value of statements and of functions that return nothing. There is a single instance, NONE.
+    def __repr__( self ):
+        return 'None'
+
+    __str__ = __repr__
+
+    def __bool__( self ):
+        return False
+
+    def __reduce__( self ):
+        # Copies and unpickled values are the singleton too, so identity checks keep working
+        return 'NONE'
+
+
+NONE = NoneValue()
+
+
+class MemoState( threading.local ):
+    # Per thread, so programs running in other threads never see each other's memoized calls
+    active = 0  # Memoized calls currently running in any engine, print and input are refused while > 0
+
+
+memo_state = MemoState()
+
+
+class MemoCache:
+    # Results of a memoized function keyed by its argument values, least recently used first
+    caches = weakref.WeakSet()  # Every live cache, for --memo-stats
+    caches_lock = threading.Lock()  # Caches are created by programs in any thread
+
+    def __init__( self, size, node ):
+        self.size = size
+        self.node = node  # FunctionDefNode, used to label the statistics
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        with MemoCache.caches_lock:
+            MemoCache.caches.add( self )
+
+    def __repr__( self ):
+        label = '<function>'
+
+        if self.node.source != None:
+            ln, coln = self.node.source.line_col( self.node.start )
+            label = f'<function at Line {ln + 1}, Col {coln + 1}>'
+
+        return f'{label}: {self.hits} hits, {self.misses} misses, {len( self.entries )}/{self.size} entries'
+
+    def get( self, key ):
+        res = self.entries.get( key, UNSET )
+
+        if res is UNSET:
+            self.misses += 1
+
+        else:
+            self.hits += 1
+            self.entries.move_to_end( key )
+
+        return res
+
+    def put( self, key, value ):
+        self.entries[key] = value
+
+        if len( self.entries ) > self.size:
+            self.entries.popitem( last=False )
+
+
+class Unset:
+    # Marks a frame slot whose 'var' has not been executed yet
+    def __repr__( self ):
+        return '<unset>'
+
+
+UNSET = Unset()
+
+
+ROPE_MIN_LENGTH = 1024  # Strings built by '+' become Ropes from this length on
+
+
+class Rope:
+    '''
+    A String built by '+' whose parts are only joined when the whole string is needed: when it
+    is printed, compared, hashed, passed to str() or shown as an input prompt. Appending to the
+    last Rope of a chain adds to the list of parts it shares with the Ropes before it, so
+    's = s + piece;' in a loop takes time linear in the final length instead of quadratic.
+    '''
+    __slots__ = ( 'parts', 'count', 'length' )
+
+    def __init__( self, parts, count, length ):
+        self.parts = parts  # strs, shared by a chain of Ropes. This one is made of the first count.
+        self.count = count
+        self.length = length
+
+    def append( self, piece ):
+        parts = self.parts
+
+        # Another Rope was already built by appending to this one, it keeps the shared list
+        if len( parts ) != self.count: parts = parts[:self.count]
+
+        parts.append( piece )
+
+        return Rope( parts, self.count + 1, self.length + len( piece ) )
+
+    def flatten( self ):
+        if self.count > 1:
+            parts = self.parts if len( self.parts ) == self.count else self.parts[:self.count]
+
+            # Later appends continue from the joined string, other Ropes keep the old list
+            self.parts = [ ''.join( parts ) ]
+            self.count = 1
+
+        return self.parts[0]
+
+    def __str__( self ):
+        return self.flatten()
+
+    def __repr__( self ):
+        return repr( self.flatten() )
+
+    def __format__( self, spec ):
+        return format( self.flatten(), spec )
+
+    def __len__( self ):
+        return self.length
+
+    def __bool__( self ):
+        return self.length > 0
+
+    def __eq__( self, other ):
+        if type( other ) is Rope:
+            if other.length != self.length: return False
+
+            other = other.flatten()
+
+        elif type( other ) is not str:
+            return NotImplemented
+
+        return len( other ) == self.length and self.flatten() == other
+
+    def __ne__( self, other ):
+        res = self.__eq__( other )
+
+        return res if res is NotImplemented else not res
+
+    def __hash__( self ):
+        return hash( self.flatten() )
+
+
+def concat( left, right ):
+    # '+' on two Strings. Short results are plain strs, longer ones Ropes.
+    if type( right ) is Rope: right = right.flatten()
+
+    if type( left ) is Rope: return left.append( right )
+
+    length = len( left ) + len( right )
+
+    if length < ROPE_MIN_LENGTH: return left + right
+
+    return Rope( [ left, right ], 2, length )
+
+
+# Numbers and Strings are plain Python ints, floats and strs, so arithmetic allocates no
+# wrappers. Operations test the Python types, the names Cicinlang programs see are only
+# used in error messages.
+TYPE_NAMES = { int: 'Number', float: 'Number', complex: 'Number', str: 'String', Rope: 'String', NoneValue: 'NoneValue', Function: 'Function' }
+NUMBER_TYPES = ( int, float, complex )  # A negative number raised to a fraction is complex
+STRING_TYPES = ( str, Rope )
+UNHASHED_TYPES = { Rope }  # Values memo_key turns into something hashable first
+ARRAY_TYPES = set()  # Holds Array once cicinlang.arrays is loaded
+
+arrays = None  # cicinlang.arrays, imported when the first Array is made since NumPy is slow to import
+
+def load_arrays( node ):
+    # NumPy is optional, only programs that make Arrays need it. Every other Array operation
+    # gets an Array made after this, so only make_array calls it.
+    global arrays
+
+    if arrays != None: return
+
+    try:
+        from cicinlang import arrays as module
+
+    except ImportError:
+        raise RuntimeException( 'Arrays need NumPy, which is not installed', node )
+
+    TYPE_NAMES[module.Array] = 'Array'
+    UNHASHED_TYPES.add( module.Array )
+    ARRAY_TYPES.add( module.Array )
+    arrays = module
+
+def type_name( value ):
+    return TYPE_NAMES[type( value )]
+
+
+# The operations below are shared by every execution engine so that the
+# type rules and error messages stay identical between them.
+
+def bin_op( left, tok, right, node ):
+    # Dispatches on the Python types of the values, their names are only looked up for errors
+    l_cls = type( left )
+    r_cls = type( right )
+
+    if l_cls in ARRAY_TYPES or r_cls in ARRAY_TYPES: return array_op( left, tok, right, node )
+
+    l_number = l_cls in NUMBER_TYPES
+    l_string = l_cls in STRING_TYPES
+
+    same_types = r_cls in NUMBER_TYPES if l_number else r_cls in STRING_TYPES if l_string else l_cls is r_cls
+
+    is_func = l_cls is Function or r_cls is Function
+
+    diff_types_wo_and_or_ee_ne = not same_types and tok.type not in [ Constants.TT_KEYWORD, Constants.TT_EE, Constants.TT_NE ]
+
+    str_and_not_add_and_or = l_string and tok.type not in [ Constants.TT_PLUS, Constants.TT_EE, Constants.TT_NE, Constants.TT_KEYWORD ]
+
+    if is_func or diff_types_wo_and_or_ee_ne or str_and_not_add_and_or:
+        raise unsupported_bin_op( left, tok, right, node )
+
+    if tok.type == Constants.TT_PLUS:
+        if l_number: return left + right
+
+        if l_string: return concat( left, right )
+
+    elif tok.type == Constants.TT_MINUS: return left - right
+
+    elif tok.type == Constants.TT_MUL: return left * right
+
+    elif tok.type == Constants.TT_EXP: return left ** right
+
+    elif tok.type == Constants.TT_DIV:
+        if right == 0: raise RuntimeException( 'Division by 0', tok )
+
+        return left / right
+
+    elif tok.type == Constants.TT_LT: return 1 if left < right else 0
+
+    elif tok.type == Constants.TT_LTE: return 1 if left <= right else 0
+
+    elif tok.type == Constants.TT_GT: return 1 if left > right else 0
+
+    elif tok.type == Constants.TT_GTE: return 1 if left >= right else 0
+
+    elif tok.type == Constants.TT_EE: return 1 if left == right else 0
+
+    elif tok.type == Constants.TT_NE: return 1 if left != right else 0
+
+    elif tok.type == Constants.TT_KEYWORD and tok.value == 'and': return 1 if left and right else 0
+
+    elif tok.type == Constants.TT_KEYWORD and tok.value == 'or': return 1 if left or right else 0
+
+    raise unsupported_bin_op( left, tok, right, node )
+
+def unsupported_bin_op( left, tok, right, node ):
+    return RuntimeException( f"Unsupported binary operation '{tok.value}' on types: '{type_name( left )}' and '{type_name( right )}'", node )
+
+# Comparisons a counted loop may test its counter with, see resolver.loop_counter
+COUNTER_COMPARISONS = { Constants.TT_LT: operator.lt, Constants.TT_LTE: operator.le, Constants.TT_GT: operator.gt, Constants.TT_GTE: operator.ge }
+
+def array_op( left, tok, right, node ):
+    # Arrays combine elementwise with Arrays of the same length and with Numbers, which apply to every
+    # element. An Array is never equal to a value of another type, other operations on them are errors.
+    other = type( right ) if type( left ) in ARRAY_TYPES else type( left )
+
+    if ( other in ARRAY_TYPES or other in NUMBER_TYPES ) and tok.type in arrays.BIN_UFUNCS:
+        return arrays.bin_op( left, right, tok, node )
+
+    if tok.type == Constants.TT_EE: return 0
+
+    if tok.type == Constants.TT_NE: return 1
+
+    raise unsupported_bin_op( left, tok, right, node )
+
+def un_op( tok, value, node ):
+    cls = type( value )
+
+    is_func = cls is Function
+
+    str_and_not_not = cls in STRING_TYPES and tok.value != 'not'
+
+    array_and_not = cls in ARRAY_TYPES and tok.value == 'not'
+
+    if is_func or str_and_not_not or array_and_not:
+        raise RuntimeException( f"Unsupported unary operator '{tok.value}' on type '{type_name( value )}'", node )
+
+    if tok.type == Constants.TT_PLUS: return value
+
+    elif tok.type == Constants.TT_KEYWORD and tok.value == 'not': return 0 if value else 1
+
+    else: return -1 * value
+
+def stringify( value ):
+    if type( value ) is Function:
+        return '<Function object>'
+
+    return str( value )
+
+def make_memo( node, default_size ):
+    if not node.memo: return None
+
+    return MemoCache( node.memo_size if node.memo_size != None else default_size, node )
+
+def memo_key( args ):
+    # Values are keyed together with their type, keeping 1, 1.0 and "1" apart. Functions are keyed by identity.
+    return tuple( ( type( value ), value ) if type( value ) not in UNHASHED_TYPES else unhashed_key( value ) for value in args )
+
+def unhashed_key( value ):
+    # Ropes are keyed like the str they stand for, Arrays by their elements
+    if type( value ) is Rope: return ( str, value.flatten() )
+
+    return ( arrays.Array, value.dtype.str, value.tobytes() )
+
+def make_array( values, node ):
+    # Value of an array literal
+    load_arrays( node )
+
+    for value, element_node in zip( values, node.element_nodes ):
+        if type( value ) not in NUMBER_TYPES:
+            raise RuntimeException( f"Array elements can only be Number, got {type_name( value )}", element_node )
+
+    return arrays.make_array( values, node )
+
+def index_value( value, idx, node ):
+    check_indexed( value, node )
+    check_index( idx, node.start_node )
+
+    return arrays.index( value, idx, node )
+
+def slice_value( value, start, end, node ):
+    check_indexed( value, node )
+
+    if start != None: check_index( start, node.start_node )
+
+    if end != None: check_index( end, node.end_node )
+
+    return arrays.slice_( value, start, end )
+
+def check_indexed( value, node ):
+    if type( value ) not in ARRAY_TYPES:
+        raise RuntimeException( f"Cannot index type '{type_name( value )}'", node.node )
+
+def check_index( idx, node ):
+    if type( idx ) is not int:
+        raise RuntimeException( f"Array indices can only be integers, got {idx if type( idx ) in NUMBER_TYPES else type_name( idx )}", node )
+
+def builtin_len( value, node ):
+    if type( value ) not in ARRAY_TYPES and type( value ) not in STRING_TYPES:
+        raise RuntimeException( f"len() expects an Array or a String, got {type_name( value )}", node.func_arg_nodes_list[0] )
+
+    return len( value )
+
+def reduction( name ):
+    def builtin( value, node ):
+        if type( value ) not in ARRAY_TYPES:
+            raise RuntimeException( f"{name}() expects an Array, got {type_name( value )}", node.func_arg_nodes_list[0] )
+
+        return arrays.reduce( name, value, node )
+
+    return builtin
+
+
+# Functions of the interpreter, called as builtin( value, call_node ). They are only found by calls,
+# and only when the program declares nothing under their name, so programs can still use these names.
+BUILTINS = { 'len': builtin_len, 'sum': reduction( 'sum' ), 'min': reduction( 'min' ), 'max': reduction( 'max' ) }
+
+def builtin_callee( name, node ):
+    # Builtin a call to an undeclared name falls back to, None if there is none. Builtins take one argument.
+    builtin = BUILTINS.get( name )
+
+    if builtin != None and len( node.func_arg_nodes_list ) != 1:
+        raise RuntimeException( f"Expected 1 arguments, got {len( node.func_arg_nodes_list )}", node )
+
+    return builtin
+
+def load_name( context, addr, name ):
+    # Tries the frame slots the resolver found for a name, then the globals. None if it is not declared.
+    frame = context
+    depth = 0
+
+    for hops, slot in addr:
+        while depth < hops:
+            frame = frame.parent
+            depth += 1
+
+        value = frame.slots[slot]
+
+        if value is not UNSET: return value
+
+    return context.globals.get( name )
+
+def store_name( context, addr, name, value ):
+    # Updates the innermost declaration of a name, returns False if it is not declared
+    frame = context
+    depth = 0
+
+    for hops, slot in addr:
+        while depth < hops:
+            frame = frame.parent
+            depth += 1
+
+        if frame.slots[slot] is not UNSET:
+            frame.slots[slot] = value
+            return True
+
+    if name in context.globals:
+        context.globals[name] = value
+        return True
+
+    return False
+
+def read_input( inputs, prompt, output, inp_type, node ):
+    if type( prompt ) is Rope: prompt = prompt.flatten()
+
+    inp = inputs.read_line( prompt, output )
+
+    if inp == None:
+        raise RuntimeException( "No more input to read", node )
+
+    return convert_input( inp, inp_type, node )
+
+def convert_input( inp, inp_type, node ):
+    if inp_type == 'str':
+        return inp
+
+    try:
+        num = float( inp ) if '.' in inp else int( inp )
+
+    except:
+        raise RuntimeException( f"Could not convert '{inp}' to Number", node )
+
+    return num
@@ -0,0 +1,443 @@
+from cicinlang.errors import RuntimeException, NameNotFoundError
+from cicinlang.values import Function, NUMBER_TYPES, memo_state, UNSET, DEFAULT_MEMO_SIZE, un_op, type_name, stringify, read_input, load_name, store_name, make_memo, memo_key, make_array, index_value, slice_value, builtin_callee, COUNTER_COMPARISONS
+from cicinlang.compiler import Opcodes, Compiler
+from cicinlang.resolver import Resolver
+from cicinlang.streams import StdoutSink, StdinInput
+from cicinlang.budget import Budget
+
+# Opcodes are bound to module globals so the dispatch loop compares against plain ints
+LOAD_CONST = Opcodes.LOAD_CONST
+LOAD_NAME = Opcodes.LOAD_NAME
+STORE_NEW = Opcodes.STORE_NEW
+STORE_OLD = Opcodes.STORE_OLD
+POP_TOP = Opcodes.POP_TOP
+ADD = Opcodes.ADD
+SUB = Opcodes.SUB
+MUL = Opcodes.MUL
+DIV = Opcodes.DIV
+EXP = Opcodes.EXP
+LT = Opcodes.LT
+LTE = Opcodes.LTE
+GT = Opcodes.GT
+GTE = Opcodes.GTE
+EE = Opcodes.EE
+NE = Opcodes.NE
+AND = Opcodes.AND
+OR = Opcodes.OR
+UNARY_POS = Opcodes.UNARY_POS
+UNARY_NEG = Opcodes.UNARY_NEG
+UNARY_NOT = Opcodes.UNARY_NOT
+JUMP = Opcodes.JUMP
+IF_JUMP_IF_FALSE = Opcodes.IF_JUMP_IF_FALSE
+LOOP_JUMP_IF_FALSE = Opcodes.LOOP_JUMP_IF_FALSE
+MAKE_FUNCTION = Opcodes.MAKE_FUNCTION
+GET_CALLEE = Opcodes.GET_CALLEE
+CALL = Opcodes.CALL
+RETURN_VALUE = Opcodes.RETURN_VALUE
+PRINT = Opcodes.PRINT
+INPUT = Opcodes.INPUT
+STRINGIFY = Opcodes.STRINGIFY
+LOAD_FAST = Opcodes.LOAD_FAST
+STORE_FAST = Opcodes.STORE_FAST
+STORE_NEW_FAST = Opcodes.STORE_NEW_FAST
+STORE_NEW_CHECKED = Opcodes.STORE_NEW_CHECKED
+TAIL_CALL = Opcodes.TAIL_CALL
+BUILD_ARRAY = Opcodes.BUILD_ARRAY
+INDEX = Opcodes.INDEX
+SLICE = Opcodes.SLICE
+CALL_BUILTIN = Opcodes.CALL_BUILTIN
+COUNTER_TEST = Opcodes.COUNTER_TEST
+COUNTER_STEP = Opcodes.COUNTER_STEP
+STORE_FAST_POP = Opcodes.STORE_FAST_POP
+STORE_OLD_POP = Opcodes.STORE_OLD_POP
+
+# Binary operations without an integer fast path, and the unary ones, each tested with one lookup
+GENERIC_BIN_OPS = frozenset( [ LTE, GT, GTE, EE, NE, AND, OR, DIV, EXP ] )
+UNARY_OPS = frozenset( [ UNARY_POS, UNARY_NEG, UNARY_NOT ] )
+
+
+class VM:
+    def __init__( self, memo_size=DEFAULT_MEMO_SIZE, output=None, inputs=None, budget=None ):
+        self.memo_size = memo_size  # Cache size of 'memo' functions that do not give one
+        self.output = output if output != None else StdoutSink( buffer_size=0 )  # OutputSink of print statements
+        self.inputs = inputs if inputs != None else StdinInput()  # InputSource of input_str and input_num
+        self.budget = budget if budget != None else Budget()  # Resource limits, none by default
+
+    def run( self, code, context ):
+        active = memo_state.active
+
+        try:
+            return self.execute( code, context )
+
+        finally:
+            # An error can leave memoized frames unfinished
+            memo_state.active = active
+
+    def execute( self, code, context ):
+        # Calls never recurse into execute. The caller's state is saved on an explicit frame
+        # stack instead, so the depth of Cicinlang recursion is only limited by memory.
+        frames = []
+        memo = None  # ( cache, key ) the current frame's result is stored under, if it is memoized
+        depth = 0  # Calls in progress, including those whose frames tail calls dropped
+
+        ops, consts, names, addrs, nodes = code.ops, code.consts, code.names, code.addrs, code.nodes
+        slots, table = context.slots, context.globals
+
+        budget = self.budget
+        bin_op = budget.bin_op
+        caps = budget.caps  # Integer products are checked too, so they cannot take the fast path
+        max_depth = budget.max_depth
+
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+
+        # The branches are ordered by how often their opcodes run in the benchmark corpus, so the
+        # instructions of loops and expressions are found after only a few comparisons
+        while True:
+            op = ops[pc]
+            arg = ops[pc + 1]
+            pc += 2
+
+            if op == LOAD_CONST:
+                push( consts[arg] )
+
+            elif op == LOAD_FAST:
+                push( slots[arg] )
+
+            elif op == ADD:
+                right = pop()
+                left = stack[-1]
+
+                if type( left ) is int and type( right ) is int:
+                    stack[-1] = left + right
+
+                else:
+                    node = nodes[( pc >> 1 ) - 1]
+                    stack[-1] = bin_op( left, node.tok, right, node )
+
+            elif op == LOAD_NAME:
+                name, addr = addrs[arg]
+                value = load_name( context, addr, name ) if addr else table.get( name )
+
+                if value is None:
+                    tok = nodes[( pc >> 1 ) - 1].var_name_token
+                    raise NameNotFoundError( f"'{tok.value}' not found", tok )
+
+                push( value )
+
+            elif op == LOOP_JUMP_IF_FALSE or op == IF_JUMP_IF_FALSE:
+                cond = pop()
+
+                if type( cond ) not in NUMBER_TYPES:
+                    node = nodes[( pc >> 1 ) - 1]
+
+                    if op == IF_JUMP_IF_FALSE:
+                        raise RuntimeException( f"Condition value for if statement can only be Number, got {type_name( cond )}", node )
+
+                    raise RuntimeException( f"Output of condition statement in for loop should be number, got {type_name( cond )}", node )
+
+                if cond != 1:
+                    pc = arg
+
+                elif op == LOOP_JUMP_IF_FALSE:
+                    # Every loop iteration is a step of the budget
+                    budget.ticks -= 1
+                    if budget.ticks < 0: budget.tick( nodes[( pc >> 1 ) - 1] )
+
+            elif op == STORE_OLD_POP:
+                name, addr = addrs[arg]
+
+                if not addr and name in table:
+                    table[name] = pop()
+
+                elif not store_name( context, addr, name, pop() ):
+                    tok = nodes[( pc >> 1 ) - 1].var_name_token
+                    raise NameNotFoundError( f"'{name}' not found", tok )
+
+            elif op == STORE_FAST_POP:
+                slots[arg] = pop()
+
+            elif op == COUNTER_TEST:
+                # Condition of a counted loop, the bound is on the stack and the counter in its slot
+                node = nodes[( pc >> 1 ) - 1]
+                slot, name, step = node.counter
+                bound = pop()
+                i = slots[slot] if slot != None else table[name]
+                cond = node.cond_node
+
+                if type( i ) is int and type( bound ) is int:
+                    cond = COUNTER_COMPARISONS[cond.tok.type]( i, bound )
+
+                else:
+                    cond = bin_op( i, cond.tok, bound, cond )
+
+                    if type( cond ) not in NUMBER_TYPES:
+                        raise RuntimeException( f"Output of condition statement in for loop should be number, got {type_name( cond )}", node.cond_node )
+
+                    cond = cond == 1
+
+                if not cond:
+                    pc = arg
+
+                else:
+                    budget.ticks -= 1
+                    if budget.ticks < 0: budget.tick( node.cond_node )
+
+            elif op == COUNTER_STEP:
+                # Update of a counted loop, then back to its condition
+                node = nodes[( pc >> 1 ) - 1]
+                slot, name, step = node.counter
+                i = slots[slot] if slot != None else table[name]
+
+                if type( i ) is int:
+                    i += step
+
+                else:
+                    update = node.update_node.var_value_node
+                    i = bin_op( i, update.tok, update.right_node.tok.value, update )
+
+                if slot != None: slots[slot] = i
+                else: table[name] = i
+
+                pc = arg
+
+            elif op == LT:
+                right = pop()
+                left = stack[-1]
+
+                if type( left ) is int and type( right ) is int:
+                    stack[-1] = 1 if left < right else 0
+
+                else:
+                    node = nodes[( pc >> 1 ) - 1]
+                    stack[-1] = bin_op( left, node.tok, right, node )
+
+            elif op == MUL:
+                right = pop()
+                left = stack[-1]
+
+                if type( left ) is int and type( right ) is int and not caps:
+                    stack[-1] = left * right
+
+                else:
+                    node = nodes[( pc >> 1 ) - 1]
+                    stack[-1] = bin_op( left, node.tok, right, node )
+
+            elif op == SUB:
+                right = pop()
+                left = stack[-1]
+
+                if type( left ) is int and type( right ) is int:
+                    stack[-1] = left - right
+
+                else:
+                    node = nodes[( pc >> 1 ) - 1]
+                    stack[-1] = bin_op( left, node.tok, right, node )
+
+            elif op == POP_TOP:
+                pop()
+
+            elif op == STORE_FAST:
+                slots[arg] = stack[-1]
+
+            elif op == STORE_OLD:
+                name, addr = addrs[arg]
+
+                if not addr and name in table:
+                    table[name] = stack[-1]
+
+                elif not store_name( context, addr, name, stack[-1] ):
+                    tok = nodes[( pc >> 1 ) - 1].var_name_token
+                    raise NameNotFoundError( f"'{name}' not found", tok )
+
+            elif op == JUMP:
+                pc = arg
+
+            elif op == GET_CALLEE:
+                node = nodes[( pc >> 1 ) - 1]
+                name, addr = addrs[arg]
+                func = load_name( context, addr, name )
+
+                if func == None:
+                    func = builtin_callee( name, node )
+
+                    if func == None:
+                        raise NameNotFoundError( f"{name} not found", node.func_name_tok )
+
+                    push( func )
+                    continue
+
+                if type( func ) is not Function:
+                    raise RuntimeException( f"Cannot invoke function call on type { type_name( func ) }", node.func_name_tok )
+
+                n_params = len( func.args )
+                n_args = len( node.func_arg_nodes_list )
+
+                if n_params != n_args:
+                    raise RuntimeException( f"Expected {n_params} arguments, got {n_args}", node )
+
+                push( func )
+
+            elif op == CALL or op == TAIL_CALL or op == CALL_BUILTIN:
+                node = nodes[( pc >> 1 ) - 1]
+                args = stack[len( stack ) - arg:]
+                del stack[len( stack ) - arg:]
+                func = stack[-1]
+
+                if op == CALL_BUILTIN:
+                    if type( func ) is not Function:
+                        stack[-1] = func( args[0], node )
+                        continue
+
+                    op = CALL
+
+                budget.ticks -= 1
+                if budget.ticks < 0: budget.tick( node )
+
+                # Tail calls add to the depth like other calls, so every engine stops at the same call
+                if depth >= max_depth: budget.tick( node, depth + 1 )
+
+                if func.code == None:
+                    # Functions created by another engine in a shared context are compiled on first use
+                    if func.layout == None:
+                        Resolver().resolve_function( func )
+
+                    func.code = Compiler().compile( func.nodes, '<function>' )
+
+                if func.memo != None:
+                    key = memo_key( args )
+                    res = func.memo.get( key )
+
+                    if res is not UNSET:
+                        # A hit is used like a returned value, a tail call is always followed by RETURN_VALUE
+                        stack[-1] = res
+                        continue
+
+                if op == CALL or memo != None or func.memo != None:
+                    # Memoized frames have to see their result, so they never take part in tail calls
+                    frames.append( ( code, pc, stack, context, memo, depth ) )
+
+                depth += 1
+
+                if func.memo != None:
+                    memo = ( func.memo, key )
+                    memo_state.active += 1
+
+                else:
+                    memo = None
+
+                # For a tail call the current frame is simply dropped, its result is the callee's
+                code = func.code
+                context = func.call_context( node.func_name_tok, args )
+
+                ops, consts, names, addrs, nodes = code.ops, code.consts, code.names, code.addrs, code.nodes
+                slots, table = context.slots, context.globals
+
+                stack = []
+                push = stack.append
+                pop = stack.pop
+                pc = 0
+
+            elif op == RETURN_VALUE:
+                res = pop()
+
+                if memo != None:
+                    memo[0].put( memo[1], res )
+                    memo_state.active -= 1
+
+                if len( frames ) == 0: return res
+
+                code, pc, stack, context, memo, depth = frames.pop()
+
+                ops, consts, names, addrs, nodes = code.ops, code.consts, code.names, code.addrs, code.nodes
+                slots, table = context.slots, context.globals
+
+                push = stack.append
+                pop = stack.pop
+                stack[-1] = res
+
+            elif op in GENERIC_BIN_OPS:
+                right = pop()
+                left = stack[-1]
+                node = nodes[( pc >> 1 ) - 1]
+                stack[-1] = bin_op( left, node.tok, right, node )
+
+            elif op in UNARY_OPS:
+                node = nodes[( pc >> 1 ) - 1]
+                stack[-1] = un_op( node.tok, stack[-1], node )
+
+            elif op == MAKE_FUNCTION:
+                node = nodes[( pc >> 1 ) - 1]
+                func_code = consts[arg]
+                func = Function( node.func_arg_toks_list, node.func_body_nodes_list, context, func_code, func_code.layout )
+                func.memo = make_memo( node, self.memo_size )
+                push( func )
+
+            elif op == STORE_NEW_FAST:
+                slots[arg] = stack[-1]
+
+            elif op == STORE_NEW_CHECKED:
+                if slots[arg] is not UNSET:
+                    tok = nodes[( pc >> 1 ) - 1].var_name_token
+                    raise NameNotFoundError( f"'{tok.value}' is already declared.", tok )
+
+                slots[arg] = stack[-1]
+
+            elif op == STORE_NEW:
+                name = names[arg]
+
+                if name in table:
+                    tok = nodes[( pc >> 1 ) - 1].var_name_token
+                    raise NameNotFoundError( f"'{name}' is already declared.", tok )
+
+                table[name] = stack[-1]
+
+            elif op == PRINT:
+                res = pop()
+
+                if type( res ) is Function:
+                    node = nodes[( pc >> 1 ) - 1].node
+                    raise RuntimeException( "Cannot print functions", node )
+
+                if memo_state.active > 0:
+                    node = nodes[( pc >> 1 ) - 1].node
+                    raise RuntimeException( "Cannot print inside a memoized function", node )
+
+                self.output.write( f'{res}\n' )
+
+            elif op == INPUT:
+                node = nodes[( pc >> 1 ) - 1]
+                prompt = None
+
+                if arg:
+                    res = pop()
+
+                    if type( res ) is Function:
+                        raise RuntimeException( "Cannot print functions", node.node )
+
+                    prompt = res
+
+                if memo_state.active > 0:
+                    raise RuntimeException( "Cannot take input inside a memoized function", node.node if node.node != None else node )
+
+                push( read_input( self.inputs, prompt, self.output, node.inp_type, node ) )
+
+            elif op == STRINGIFY:
+                stack[-1] = stringify( stack[-1] )
+
+            elif op == BUILD_ARRAY:
+                node = nodes[( pc >> 1 ) - 1]
+                values = stack[len( stack ) - arg:]
+                del stack[len( stack ) - arg:]
+                push( make_array( values, node ) )
+
+            elif op == INDEX:
+                idx = pop()
+                stack[-1] = index_value( stack[-1], idx, nodes[( pc >> 1 ) - 1] )
+
+            elif op == SLICE:
+                end = pop() if arg & 2 else None
+                start = pop() if arg & 1 else None
+                stack[-1] = slice_value( stack[-1], start, end, nodes[( pc >> 1 ) - 1] )